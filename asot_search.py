@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import gradio as gr
 import pandas as pd
 import dotenv
@@ -14,6 +15,14 @@ dotenv.load_dotenv()
 
 # Import the MilvusClientASOT class
 from src.MilvusClientASOT import MilvusClientASOT
+from src.canonical_tracks import TrackAppearances, search_tracks, similar_canonical_tracks
+from src.TieredSearchASOT import TieredSearchASOT
+from src.query_router import QueryRouter
+from src.typeahead import build_from_collections, build_from_corpus
+from src.ingest_events import IngestEventLog
+from src.chart_analytics import ChartAnalytics
+from src.stats_service import StatsService
+from src.search_api import SearchAPI, SearchAPIServer
 
 # Initialize MilvusClient
 milvus_client = MilvusClientASOT()
@@ -21,6 +30,55 @@ milvus_client = MilvusClientASOT()
 # Get collection name from environment or use default
 collection_name = os.getenv("MILVUS_COLLECTION", "asot_songs")
 
+# Search the hot and cold tiers together when the collection is tiered
+tiered = os.getenv("TIERED_COLLECTIONS", "false").lower() == "true"
+search_client = TieredSearchASOT(milvus_client) if tiered else milvus_client
+
+# Answer structural queries with scalar filters instead of vector search
+query_router = QueryRouter(search_client, collection_name) if os.getenv("QUERY_ROUTER", "true").lower() == "true" else None
+
+# Canonical tracks collection, one row per unique track; unset or empty disables the tracks search
+tracks_collection = os.getenv("TRACKS_COLLECTION") or None
+track_appearances = TrackAppearances() if tracks_collection else None
+
+# Chart-history aggregates, maintained by the ingestion pipeline
+chart_analytics = ChartAnalytics()
+
+# Autocomplete over artists and titles, built from the collection ('collection'), the
+# local corpus ('corpus') or disabled ('off'), and kept current from the ingest events
+typeahead_source = os.getenv("TYPEAHEAD", "collection").lower()
+searched_collections = ([TieredSearchASOT.hot_collection(collection_name), TieredSearchASOT.cold_collection(collection_name)]
+                        if tiered else [collection_name])
+# Open the event log first, so episodes ingested while the index builds are not missed
+ingest_events = IngestEventLog()
+typeahead = None
+if typeahead_source != "off":
+    typeahead = (build_from_corpus() if typeahead_source == "corpus"
+                 else build_from_collections(milvus_client, searched_collections))
+
+# Collection stats are computed in the background and served from memory
+stats_service = StatsService(search_client, collection_name)
+stats_service.start()
+
+def on_ingest(event):
+    """Bring the in-memory state up to date with episodes inserted by the ingestion process"""
+    if event["collection"] not in searched_collections:
+        return
+    if typeahead is not None:
+        typeahead.add(event["records"])
+    stats_service.notify()
+
+ingest_events.follow(on_ingest)
+
+# JSON API for programmatic clients, sharing the model, connections and caches of the UI
+search_api = None
+if os.getenv("SEARCH_API_PORT"):
+    search_api = SearchAPIServer(SearchAPI(search_client, collection_name, query_router=query_router,
+                                           typeahead=typeahead, stats_service=stats_service,
+                                           milvus_client=milvus_client, tracks_collection=tracks_collection,
+                                           track_appearances=track_appearances))
+    search_api.start()
+
 def format_result(hit):
     """Format a search result into a readable dictionary"""
     result = {}
@@ -63,42 +121,96 @@ def format_result(hit):
     
     return result
 
+def format_track_result(hit):
+    """Format a canonical track hit, summarizing the episodes it appeared in"""
+    result = {}
+    entity = hit['entity']
+    
+    for field, label in [("artist", "Artist"), ("collaborators", "Collaborators"),
+                         ("featured_artists", "Featured Artists"), ("title", "Title"), ("remix_info", "Remix")]:
+        if entity[field] not in (None, 'nav'):
+            result[label] = entity[field]
+    
+    appearances = entity.get('appearances', [])
+    result["Appearances"] = len(appearances)
+    result["Episodes"] = ", ".join(
+        f"{a['episode_id']} (#{a['ranking']})" if a['ranking'] != -1 else str(a['episode_id'])
+        for a in appearances
+    )
+    
+    result["Match Score"] = round(hit['distance'], 4)
+    
+    return result
+
+def hit_label(hit):
+    """Short "Artist - Title" description of a hit"""
+    entity = hit['entity']
+    return " - ".join(entity[field] for field in ("artist", "title") if entity.get(field) not in (None, 'nav'))
+
+def shown_hits(results, tracks=False):
+    """Primary keys of the displayed rows, so a selected row can be searched for similar tracks"""
+    return {"tracks": tracks, "ids": [hit['id'] for hit in results], "labels": [hit_label(hit) for hit in results]}
+
+NO_HITS = {"tracks": False, "ids": [], "labels": []}
+
 def search(query, search_type, limit, sparse_weight=0.3, dense_weight=0.7, rrf_k=60):
     """Perform search on Milvus based on specified parameters"""
     if not query:
-        return "Please enter a search query"
+        return "Please enter a search query", "", NO_HITS
     
     try:
-        # Perform search based on selected type
-        if search_type == "Sparse Search (BM25)":
-            results = milvus_client.sparse_search(
-                collection_name=collection_name,
-                query_text=query,
-                limit=limit
-            )
-        elif search_type == "Dense Search (Vector)":
-            results = milvus_client.dense_search(
-                collection_name=collection_name,
-                query_text=query,
-                limit=limit
-            )
-        elif search_type == "Hybrid Search (Weighted)":
-            results = milvus_client.hybrid_search(
-                collection_name=collection_name,
-                query_text=query,
+        if search_type == "Unique Tracks (Hybrid)":
+            results = search_tracks(
+                milvus_client,
+                tracks_collection,
+                query,
+                track_appearances,
                 limit=limit,
                 ranker_type="weighted",
                 sparse_weight=sparse_weight,
                 dense_weight=dense_weight
             )
-        else:  # "Hybrid Search (RRF)"
-            results = milvus_client.hybrid_search(
-                collection_name=collection_name,
-                query_text=query,
-                limit=limit,
-                ranker_type="rrf",
-                k=rrf_k
-            )
+            return ((pd.DataFrame([format_track_result(hit) for hit in results]) if results else "No results found"),
+                    "", shown_hits(results, tracks=True))
+
+        def vector_search():
+            # Perform search based on selected type
+            if search_type == "Sparse Search (BM25)":
+                return search_client.sparse_search(
+                    collection_name=collection_name,
+                    query_text=query,
+                    limit=limit
+                )
+            elif search_type == "Dense Search (Vector)":
+                return search_client.dense_search(
+                    collection_name=collection_name,
+                    query_text=query,
+                    limit=limit
+                )
+            elif search_type == "Hybrid Search (Weighted)":
+                return search_client.hybrid_search(
+                    collection_name=collection_name,
+                    query_text=query,
+                    limit=limit,
+                    ranker_type="weighted",
+                    sparse_weight=sparse_weight,
+                    dense_weight=dense_weight
+                )
+            else:  # "Hybrid Search (RRF)"
+                return search_client.hybrid_search(
+                    collection_name=collection_name,
+                    query_text=query,
+                    limit=limit,
+                    ranker_type="rrf",
+                    k=rrf_k
+                )
+
+        # Structural queries (episode, position, top voted, artist) skip the vector search
+        if query_router is not None:
+            results, route, elapsed_ms = query_router.search(query, limit, vector_search)
+        else:
+            results, route, elapsed_ms = vector_search(), "vector", None
+        route_text = f"Route: **{route}**" + (f" ({elapsed_ms:.1f} ms)" if elapsed_ms is not None else "")
             
         # Format results
         formatted_results = [format_result(hit) for hit in results]
@@ -106,26 +218,102 @@ def search(query, search_type, limit, sparse_weight=0.3, dense_weight=0.7, rrf_k
         # Convert to DataFrame for display
         if formatted_results:
             df = pd.DataFrame(formatted_results)
-            return df
+            return df, route_text, shown_hits(results)
+        else:
+            return "No results found", route_text, NO_HITS
+    
+    except Exception as e:
+        return f"Error performing search: {str(e)}", "", NO_HITS
+
+def autocomplete(query):
+    """Suggest artists and titles for a partially typed query"""
+    suggestions = typeahead.suggest(query, limit=8) if typeahead is not None else []
+    return gr.update(choices=[(f"{s['value']} ({s['kind']}, {s['count']} songs)", s['value']) for s in suggestions],
+                     value=None, visible=bool(suggestions))
+
+CHART_VIEWS = ["Most-charted artists", "Artists in most episodes", "Most voted artists",
+               "Tracks with most appearances", "Most voted tracks", "Vote trends per era"]
+
+def chart_history(view, limit, years_per_era):
+    """Show one of the precomputed chart-history views"""
+    try:
+        if view == "Most-charted artists":
+            rows = chart_analytics.top_artists(limit, order_by="songs")
+        elif view == "Artists in most episodes":
+            rows = chart_analytics.top_artists(limit, order_by="episodes")
+        elif view == "Most voted artists":
+            rows = chart_analytics.top_artists(limit, order_by="total_votes")
+        elif view == "Tracks with most appearances":
+            rows = chart_analytics.top_tracks(limit, order_by="appearances")
+        elif view == "Most voted tracks":
+            rows = chart_analytics.top_tracks(limit, order_by="total_votes")
+        else:  # "Vote trends per era"
+            rows = chart_analytics.vote_trends(years_per_era)
+        
+        summary = chart_analytics.summary()
+        summary_text = (f"{summary['episodes']} episodes, {summary['songs']} songs, "
+                        f"{summary['artists']} artists, {summary['tracks']} tracks")
+        return (pd.DataFrame(rows) if rows else "No chart history yet"), summary_text
+    except Exception as e:
+        return f"Error loading chart history: {str(e)}", ""
+
+def select_row(evt: gr.SelectData):
+    """Remember which result row was clicked"""
+    return evt.index[0]
+
+def find_similar(shown, row, limit):
+    """Search for tracks similar to the selected result row"""
+    if row is None or row >= len(shown["ids"]):
+        return gr.update(), "Select a result row first", shown
+    
+    try:
+        start = time.perf_counter()
+        if shown["tracks"]:
+            results = similar_canonical_tracks(milvus_client, tracks_collection, shown["ids"][row], track_appearances, k=limit)
+            formatted_results = [format_track_result(hit) for hit in results]
         else:
-            return "No results found"
+            results = search_client.similar_tracks(collection_name, shown["ids"][row], k=limit)
+            formatted_results = [format_result(hit) for hit in results]
+        route_text = f"Similar to **{shown['labels'][row]}** ({(time.perf_counter() - start) * 1000:.1f} ms)"
+        
+        if formatted_results:
+            return pd.DataFrame(formatted_results), route_text, shown_hits(results, tracks=shown["tracks"])
+        return "No similar tracks found", route_text, NO_HITS
     
     except Exception as e:
-        return f"Error performing search: {str(e)}"
+        return f"Error finding similar tracks: {str(e)}", "", NO_HITS
 
-def get_collection_stats():
-    """Get statistics about the collection"""
+def get_collection_stats(force_refresh=False):
+    """Get statistics about the collection, from the stats cache unless a refresh is forced"""
     try:
-        if not milvus_client.client.has_collection(collection_name):
-            return f"Collection '{collection_name}' does not exist"
+        snapshot = stats_service.refresh() if force_refresh else stats_service.get()
+        if snapshot["computed_at"] is None:
+            return f"Error getting collection stats: {snapshot['error']}"
+        computed_text = (f"Computed: {time.strftime('%H:%M:%S', time.localtime(snapshot['computed_at']))} "
+                         f"({stats_service.age_seconds():.0f} s ago, took {snapshot['compute_ms']:.0f} ms)")
+        if snapshot["error"]:
+            computed_text += f"\nLast refresh failed: {snapshot['error']}"
+        if not snapshot["exists"]:
+            return f"Collection '{collection_name}' does not exist\n{computed_text}"
         
-        stats = milvus_client.get_collection_stats(collection_name)
-        episodes = milvus_client.list_episodes(collection_name)
+        stats = snapshot["stats"]
+        episodes = snapshot["episodes"]
         
         stats_text = f"Collection: {collection_name}\n"
         stats_text += f"Total Songs: {stats.get('row_count', 0)}\n"
         stats_text += f"Episodes: {len(episodes)}\n"
+        for tier, tier_stats in ([(t, stats[t]) for t in ("hot", "cold") if t in stats] if tiered else [(None, stats)]):
+            prefix = f"{tier.capitalize()} Tier " if tier else ""
+            if tier:
+                stats_text += f"{prefix}Songs: {tier_stats.get('row_count', 0)}\n"
+            stats_text += f"{prefix}Load State: {tier_stats.get('load_state')} ({tier_stats.get('load_progress')}%)\n"
+            if tier_stats.get('memory_bytes'):
+                stats_text += f"{prefix}Memory: {tier_stats['memory_bytes'] / 1024 ** 2:.1f} MB{' (mmap)' if tier_stats.get('mmap_enabled') else ''}\n"
         stats_text += f"Episode Numbers: {', '.join(episodes)}"
+        if query_router is not None:
+            for route, latency in query_router.latency_summary().items():
+                stats_text += f"\nRoute {route}: {latency['count']} queries, p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms"
+        stats_text += f"\n{computed_text}"
         
         return stats_text
     except Exception as e:
@@ -136,76 +324,132 @@ with gr.Blocks(title="ASOT Song Search") as demo:
     gr.Markdown("# A State of Trance - Song Search")
     gr.Markdown("Search for songs across ASOT episodes using vector search")
     
-    with gr.Row():
-        with gr.Column(scale=3):
-            # Search inputs
-            query_input = gr.Textbox(
-                label="Search Query",
-                placeholder="Enter artist, song title, or any keywords",
-                lines=1
-            )
+    with gr.Tab("Search"):
+        with gr.Row():
+            with gr.Column(scale=3):
+                # Search inputs
+                query_input = gr.Textbox(
+                    label="Search Query",
+                    placeholder="Enter artist, song title, or any keywords",
+                    lines=1
+                )
             
-            search_type = gr.Radio(
-                label="Search Method",
-                choices=[
-                    "Sparse Search (BM25)",
-                    "Dense Search (Vector)",
-                    "Hybrid Search (Weighted)",
-                    "Hybrid Search (RRF)"
-                ],
-                value="Hybrid Search (Weighted)"
-            )
+                suggestions = gr.Radio(
+                    label="Suggestions",
+                    choices=[],
+                    visible=False
+                )
             
-            limit_slider = gr.Slider(
-                label="Number of Results",
-                minimum=1,
-                maximum=50,
-                value=10,
-                step=1
-            )
+                search_type = gr.Radio(
+                    label="Search Method",
+                    choices=[
+                        "Sparse Search (BM25)",
+                        "Dense Search (Vector)",
+                        "Hybrid Search (Weighted)",
+                        "Hybrid Search (RRF)",
+                    ] + (["Unique Tracks (Hybrid)"] if tracks_collection else []),
+                    value="Hybrid Search (Weighted)"
+                )
             
-            with gr.Accordion("Advanced Search Parameters", open=False):
-                with gr.Row():
-                    sparse_weight = gr.Slider(
-                        label="Sparse Weight",
-                        minimum=0.0,
-                        maximum=1.0,
-                        value=0.3,
-                        step=0.05
-                    )
-                    
-                    dense_weight = gr.Slider(
-                        label="Dense Weight",
-                        minimum=0.0,
-                        maximum=1.0,
-                        value=0.7,
-                        step=0.05
-                    )
-                
-                rrf_k = gr.Slider(
-                    label="RRF K Value",
+                limit_slider = gr.Slider(
+                    label="Number of Results",
                     minimum=1,
-                    maximum=100,
-                    value=60,
+                    maximum=50,
+                    value=10,
                     step=1
                 )
             
-            search_button = gr.Button("Search")
+                with gr.Accordion("Advanced Search Parameters", open=False):
+                    with gr.Row():
+                        sparse_weight = gr.Slider(
+                            label="Sparse Weight",
+                            minimum=0.0,
+                            maximum=1.0,
+                            value=0.3,
+                            step=0.05
+                        )
+                    
+                        dense_weight = gr.Slider(
+                            label="Dense Weight",
+                            minimum=0.0,
+                            maximum=1.0,
+                            value=0.7,
+                            step=0.05
+                        )
+                
+                    rrf_k = gr.Slider(
+                        label="RRF K Value",
+                        minimum=1,
+                        maximum=100,
+                        value=60,
+                        step=1
+                    )
+            
+                search_button = gr.Button("Search")
         
-        with gr.Column(scale=1):
-            # Collection info
-            stats_output = gr.Textbox(
-                label="Collection Stats",
-                interactive=False,
-                lines=6
-            )
+            with gr.Column(scale=1):
+                # Collection info
+                stats_output = gr.Textbox(
+                    label="Collection Stats",
+                    interactive=False,
+                    lines=6
+                )
             
-            refresh_stats = gr.Button("Refresh Stats")
+                refresh_stats = gr.Button("Refresh Stats")
+        
+        # Results display
+        results_output = gr.DataFrame(label="Search Results")
+        route_output = gr.Markdown()
+        similar_button = gr.Button("Similar Tracks (select a row first)")
+        
+        # Primary keys of the displayed rows and the selected row
+        displayed_hits = gr.State(NO_HITS)
+        selected_row = gr.State(None)
     
-    # Results display
-    results_output = gr.DataFrame(label="Search Results")
+    with gr.Tab("Chart History"):
+        with gr.Row():
+            chart_view = gr.Radio(
+                label="View",
+                choices=CHART_VIEWS,
+                value=CHART_VIEWS[0]
+            )
+            
+            with gr.Column():
+                chart_limit = gr.Slider(
+                    label="Number of Rows",
+                    minimum=5,
+                    maximum=100,
+                    value=20,
+                    step=5
+                )
+                
+                era_years = gr.Slider(
+                    label="Years per Era (vote trends)",
+                    minimum=1,
+                    maximum=10,
+                    value=1,
+                    step=1
+                )
+        
+        chart_button = gr.Button("Show")
+        chart_summary = gr.Markdown()
+        chart_output = gr.DataFrame(label="Chart History")
     
     # Event handlers
+    query_input.input(
+        fn=autocomplete,
+        inputs=query_input,
+        outputs=suggestions,
+        trigger_mode="always_last",
+        show_progress="hidden"
+    )
+    
+    suggestions.input(
+        fn=lambda value: value,
+        inputs=suggestions,
+        outputs=query_input
+    )
+    
     search_button.click(
         fn=search,
         inputs=[
@@ -216,16 +460,34 @@ with gr.Blocks(title="ASOT Song Search") as demo:
             dense_weight,
             rrf_k
         ],
-        outputs=results_output
+        outputs=[results_output, route_output, displayed_hits]
+    ).then(fn=lambda: None, inputs=None, outputs=selected_row)
+    
+    results_output.select(
+        fn=select_row,
+        inputs=None,
+        outputs=selected_row
+    )
+    
+    similar_button.click(
+        fn=find_similar,
+        inputs=[displayed_hits, selected_row, limit_slider],
+        outputs=[results_output, route_output, displayed_hits]
+    ).then(fn=lambda: None, inputs=None, outputs=selected_row)
+    
+    chart_button.click(
+        fn=chart_history,
+        inputs=[chart_view, chart_limit, era_years],
+        outputs=[chart_output, chart_summary]
     )
     
     refresh_stats.click(
-        fn=get_collection_stats,
+        fn=lambda: get_collection_stats(force_refresh=True),
         inputs=[],
         outputs=stats_output
     )
     
-    # Load stats on first load
+    # Page loads are served from the stats cache
     demo.load(
         fn=get_collection_stats,
         inputs=[],
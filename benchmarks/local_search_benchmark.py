@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dotenv
+dotenv.load_dotenv()
+
+from src.LocalSearchASOT import LocalSearchASOT
+from src.episode_store import load_corpus_records
+
+import argparse
+import os
+import random
+import time
+import numpy as np
+
+SEARCH_MODES = ["sparse", "dense", "hybrid_weighted", "hybrid_rrf"]
+
+
+def synthesize_queries(records, count, seed=42):
+    """Build a query set of artists, titles and "artist title" pairs from the corpus."""
+    rng = random.Random(seed)
+    candidates = []
+    for record in records:
+        artist, title = record.get("artist"), record.get("title")
+        if artist:
+            candidates.append(artist)
+        if title:
+            candidates.append(title)
+        if artist and title:
+            candidates.append(f"{artist} {title}")
+    return [rng.choice(candidates) for _ in range(count)] if candidates else []
+
+
+def run_search(engine, mode, collection_name, query, limit):
+    if mode == "sparse":
+        return engine.sparse_search(collection_name, query, limit=limit)
+    if mode == "dense":
+        return engine.dense_search(collection_name, query, limit=limit)
+    if mode == "hybrid_weighted":
+        return engine.hybrid_search(collection_name, query, limit=limit, ranker_type="weighted")
+    return engine.hybrid_search(collection_name, query, limit=limit, ranker_type="rrf")
+
+
+def hit_key(hit):
+    entity = hit["entity"]
+    return entity["episode_id"], entity["ranking"], entity["title"]
+
+
+def time_engine(engine, mode, collection_name, queries, limit):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = run_search(engine, mode, collection_name, query, limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([hit_key(hit) for hit in hits])
+    return np.asarray(latencies), results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the in-process search engine against Milvus.")
+    parser.add_argument("--collection", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--index-dir", default=None, help="Local index directory (default: LOCAL_INDEX_DIR)")
+    parser.add_argument("--queries", type=int, default=100, help="Number of synthesized queries")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--skip-milvus", action="store_true", help="Only benchmark the local engine")
+    args = parser.parse_args()
+
+    records = load_corpus_records()
+    queries = synthesize_queries(records, args.queries)
+
+    milvus_client = None
+    if not args.skip_milvus:
+        from src.MilvusClientASOT import MilvusClientASOT, UnsupportedByLite
+        milvus_client = MilvusClientASOT()
+
+    # Share the already loaded model when Milvus is benchmarked too
+    engine = LocalSearchASOT(args.index_dir, embeddings=milvus_client.embeddings if milvus_client else None)
+    if not engine.has_collection(args.collection):
+        print(f"Building local collection {args.collection} from {len(records)} records...")
+        start = time.perf_counter()
+        engine.insert_episodes(args.collection, records)
+        print(f"Built in {time.perf_counter() - start:.1f} s")
+    print(engine.get_collection_stats(args.collection))
+
+    # Warm up the model and page in the memory-mapped files
+    engine.dense_search(args.collection, queries[0], limit=args.limit)
+
+    print(f"{'engine':<8} {'mode':<16} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'overlap@k':>10}")
+    for mode in SEARCH_MODES:
+        local_latencies, local_results = time_engine(engine, mode, args.collection, queries, args.limit)
+        print(f"{'local':<8} {mode:<16} {local_latencies.mean():>9.2f} {np.percentile(local_latencies, 50):>8.2f} "
+              f"{np.percentile(local_latencies, 95):>8.2f} {'-':>10}")
+
+        if milvus_client is None:
+            continue
+        try:
+            milvus_latencies, milvus_results = time_engine(milvus_client, mode, args.collection, queries, args.limit)
+        except UnsupportedByLite as e:
+            print(f"{'milvus':<8} {mode:<16} skipped: {e}")
+            continue
+        overlap = np.mean([len(set(a) & set(b)) / max(1, len(b)) for a, b in zip(local_results, milvus_results)])
+        print(f"{'milvus':<8} {mode:<16} {milvus_latencies.mean():>9.2f} {np.percentile(milvus_latencies, 50):>8.2f} "
+              f"{np.percentile(milvus_latencies, 95):>8.2f} {overlap:>10.2f}")
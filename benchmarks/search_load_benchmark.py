@@ -0,0 +1,214 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dotenv
+dotenv.load_dotenv()
+
+from src.MilvusClientASOT import MilvusClientASOT, UnsupportedByLite
+from src.episode_store import load_corpus_records
+from src.song_documents import EMBEDDING_PREFIX
+from benchmarks.local_search_benchmark import synthesize_queries, SEARCH_MODES
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+import pymilvus
+
+PERCENTILES = [50, 95, 99]
+
+
+def latency_summary(values):
+    """Mean, percentiles and max of latencies in milliseconds."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return None
+    summary = {"mean": round(float(values.mean()), 3), "max": round(float(values.max()), 3)}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = round(float(np.percentile(values, percentile)), 3)
+    return summary
+
+
+def timed_search(milvus_client, mode, collection_name, query, limit, query_vector=None):
+    """
+    Run one search, timing the query embedding and the Milvus call separately.
+
+    Returns:
+        tuple: (embedding ms, Milvus ms, number of hits). The Milvus time covers
+            the client-side encoding, the RPC and result decoding.
+    """
+    embedding_ms = 0.0
+    if mode != "sparse" and query_vector is None:
+        start = time.perf_counter()
+        query_vector = milvus_client.embed_query(query)
+        embedding_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if mode == "sparse":
+        hits = milvus_client.sparse_search(collection_name, query, limit=limit)
+    elif mode == "dense":
+        hits = milvus_client.dense_search(collection_name, query, limit=limit, query_vector=query_vector)
+    elif mode == "hybrid_weighted":
+        hits = milvus_client.hybrid_search(collection_name, query, limit=limit, ranker_type="weighted",
+                                           query_vector=query_vector)
+    else:
+        hits = milvus_client.hybrid_search(collection_name, query, limit=limit, ranker_type="rrf",
+                                           query_vector=query_vector)
+    return embedding_ms, (time.perf_counter() - start) * 1000, len(hits)
+
+
+def run_load(milvus_client, mode, collection_name, queries, limit, concurrency, query_vectors=None):
+    """
+    Replay the queries from `concurrency` threads and measure throughput and latency.
+
+    Args:
+        query_vectors (list, optional): Precomputed query embeddings, to measure Milvus alone.
+
+    Returns:
+        dict: 'qps', 'errors', and latency summaries of 'total_ms', 'embedding_ms' and 'milvus_ms'.
+    """
+    samples, errors = [], []
+    lock = threading.Lock()
+
+    def worker(offset):
+        for i in range(offset, len(queries), concurrency):
+            try:
+                sample = timed_search(milvus_client, mode, collection_name, queries[i], limit,
+                                      query_vector=query_vectors[i] if query_vectors is not None else None)
+            except UnsupportedByLite:
+                raise
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                samples.append(sample)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, offset) for offset in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    embedding, milvus, hits = zip(*samples) if samples else ((), (), ())
+    return {
+        "queries": len(queries),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "seconds": round(elapsed, 3),
+        "qps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "mean_hits": round(float(np.mean(hits)), 2) if hits else None,
+        "total_ms": latency_summary([e + m for e, m in zip(embedding, milvus)]),
+        "embedding_ms": latency_summary(embedding) if query_vectors is None and mode != "sparse" else None,
+        "milvus_ms": latency_summary(milvus),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline_path):
+    """Print the change of QPS and p50/p99 latency against an earlier results file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nChange against {baseline_path} ({baseline['meta'].get('git_revision')}, {baseline['meta']['timestamp']})")
+    print(f"{'mode':<16} {'conc':>5} {'qps':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    previous = {(run["mode"], run.get("concurrency")): run for run in baseline["runs"]}
+    for run in results["runs"]:
+        before = previous.get((run["mode"], run.get("concurrency")))
+        if before is None or not run.get("total_ms") or not before.get("total_ms"):
+            continue
+        change = lambda new, old: f"{(new - old) / old * 100:+.1f}%" if old else "-"
+        print(f"{run['mode']:<16} {run['concurrency']:>5} {change(run['qps'], before['qps']):>9} "
+              f"{change(run['total_ms']['p50'], before['total_ms']['p50']):>9} "
+              f"{change(run['total_ms']['p99'], before['total_ms']['p99']):>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Milvus search methods and report QPS and latency percentiles.")
+    parser.add_argument("--collection", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--uri", default=None,
+                        help="Milvus server URI or Milvus Lite database file (default: MILVUS_LITE_DB / MILVUS_URI)")
+    parser.add_argument("--modes", nargs="+", default=SEARCH_MODES, choices=SEARCH_MODES)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16], help="Client threads, one run each")
+    parser.add_argument("--queries", type=int, default=500, help="Number of synthesized queries per run")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed queries before each mode")
+    parser.add_argument("--cached-embeddings", action="store_true",
+                        help="Embed the queries up front and measure Milvus alone")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    milvus_client = MilvusClientASOT(uri=args.uri)
+    queries = synthesize_queries(load_corpus_records(), args.queries)
+    if not queries:
+        sys.exit("No queries could be synthesized: the corpus is empty")
+    milvus_client.load_collection(args.collection)
+
+    query_vectors = None
+    if args.cached_embeddings:
+        start = time.perf_counter()
+        query_vectors = milvus_client.embeddings([EMBEDDING_PREFIX + query for query in queries])
+        print(f"Embedded {len(queries)} queries in {time.perf_counter() - start:.1f} s")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "uri": milvus_client.uri,
+            "milvus_lite": milvus_client.is_lite,
+            "pymilvus": pymilvus.__version__,
+            "python": platform.python_version(),
+            "collection": args.collection,
+            "rows": milvus_client.get_collection_stats(args.collection)["row_count"],
+            "queries": len(queries),
+            "limit": args.limit,
+            "cached_embeddings": args.cached_embeddings,
+        },
+        "runs": [],
+    }
+
+    print(f"{'mode':<16} {'conc':>5} {'qps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'embed p50':>10} {'milvus p50':>11} {'errors':>7}")
+    for mode in args.modes:
+        try:
+            for query in queries[:args.warmup]:
+                timed_search(milvus_client, mode, args.collection, query, args.limit)
+        except UnsupportedByLite as e:
+            print(f"{mode:<16} skipped: {e}")
+            results["runs"].append({"mode": mode, "skipped": str(e)})
+            continue
+
+        for concurrency in args.concurrency:
+            run = run_load(milvus_client, mode, args.collection, queries, args.limit, concurrency, query_vectors)
+            results["runs"].append({"mode": mode, "concurrency": concurrency, **run})
+            total, embedding, milvus = run["total_ms"] or {}, run["embedding_ms"] or {}, run["milvus_ms"] or {}
+            print(f"{mode:<16} {concurrency:>5} {run['qps'] or 0:>9.1f} {total.get('p50', 0):>9.2f} "
+                  f"{total.get('p95', 0):>9.2f} {total.get('p99', 0):>9.2f} {embedding.get('p50', 0):>10.2f} "
+                  f"{milvus.get('p50', 0):>11.2f} {run['errors']:>7}")
+
+    if milvus_client.is_lite and any(mode.startswith("hybrid") for mode in args.modes):
+        print("Note: Milvus Lite has no BM25; hybrid modes ran as dense searches.")
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dotenv
+dotenv.load_dotenv()
+
+from src.MilvusClientASOT import MilvusClientASOT
+from src.migrate_vectors import migrate_collection
+from src.vector_compression import VECTOR_TYPES
+from src.episode_store import load_corpus_records
+from benchmarks.local_search_benchmark import synthesize_queries, hit_key
+
+import argparse
+import importlib.util
+import os
+import time
+import numpy as np
+
+
+def variant_collection(baseline, variant):
+    """Name of the collection holding a variant such as 'float16' or 'float16:256'."""
+    vector_type, _, dim = variant.partition(":")
+    return f"{baseline}_{vector_type}" + (f"_{dim}" if dim else "")
+
+
+def measure_load(milvus_client, collection_name):
+    """Seconds to load a released collection into memory."""
+    milvus_client.release_collection(collection_name)
+    start = time.perf_counter()
+    milvus_client.load_collection(collection_name)
+    return time.perf_counter() - start
+
+
+def default_variants():
+    """float16, bfloat16 (only when the optional ml_dtypes package is installed) and float16 with PCA to 256."""
+    variants = ["float16", "float16:256"]
+    if importlib.util.find_spec("ml_dtypes") is not None:
+        variants.insert(1, "bfloat16")
+    return variants
+
+
+def raw_vector_megabytes(config, stats):
+    """Rows x dim x bytes per value of the dense field: the raw vectors, without index or segment overhead."""
+    return stats["row_count"] * config["dim"] * VECTOR_TYPES[config["vector_type"]] / 1024 ** 2
+
+
+def loaded_megabytes(stats):
+    """Memory of the loaded segments as reported by the query nodes, None where unreported (Milvus Lite)."""
+    return stats["memory_bytes"] / 1024 ** 2 if stats.get("memory_bytes") is not None else None
+
+
+def search_all(milvus_client, collection_name, queries, limit):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = milvus_client.dense_search(collection_name, query, limit=limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({hit_key(hit) for hit in hits})
+    return np.asarray(latencies), results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare compressed dense vector storage against the float32 baseline.")
+    parser.add_argument("--baseline", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--variants", nargs="+", default=default_variants(),
+                        help="Vector type, optionally with a PCA dimension, e.g. float16:256 "
+                             "(default: float16, bfloat16 if ml_dtypes is installed, float16:256)")
+    parser.add_argument("--queries", type=int, default=100, help="Number of synthesized queries")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    milvus_client = MilvusClientASOT()
+    queries = synthesize_queries(load_corpus_records(), args.queries)
+
+    collections = [args.baseline]
+    for variant in args.variants:
+        collection_name = variant_collection(args.baseline, variant)
+        if not milvus_client.client.has_collection(collection_name):
+            vector_type, _, dim = variant.partition(":")
+            print(f"Creating {collection_name} from {args.baseline}...")
+            migrate_collection(milvus_client, args.baseline, collection_name, vector_type=vector_type,
+                               pca_dim=int(dim) if dim else None)
+        collections.append(collection_name)
+
+    baseline_results = None
+    print(f"{'collection':<28} {'type':<9} {'dim':>5} {'raw vec MB':>11} {'loaded MB':>10} {'load s':>7} "
+          f"{'p50 ms':>7} {'recall@k':>9}")
+    for collection_name in collections:
+        config = milvus_client.dense_config(collection_name)
+        load_seconds = measure_load(milvus_client, collection_name)
+        stats = milvus_client.get_collection_stats(collection_name)
+        latencies, results = search_all(milvus_client, collection_name, queries, args.limit)
+        if baseline_results is None:
+            baseline_results = results
+        recall = np.mean([len(a & b) / max(1, len(b)) for a, b in zip(results, baseline_results)])
+        loaded = loaded_megabytes(stats)
+        print(f"{collection_name:<28} {config['vector_type']:<9} {config['dim']:>5} "
+              f"{raw_vector_megabytes(config, stats):>11.2f} {f'{loaded:.2f}' if loaded is not None else '-':>10} "
+              f"{load_seconds:>7.2f} {np.percentile(latencies, 50):>7.2f} {recall:>9.3f}")
+    print("raw vec MB: rows x dim x bytes per value. loaded MB: memory reported by the query nodes, "
+          "including indexes and scalar fields (not reported by Milvus Lite).")
@@ -0,0 +1,417 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.Logger import Logger
+from src.song_documents import EMBEDDING_PREFIX, build_document_text, build_data_point
+
+import argparse
+import os
+import re
+import shutil
+import ujson
+import numpy as np
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+# BM25 parameters, matching the Milvus defaults
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rows of the float16 matrix upcast to float32 at a time during dense search
+DENSE_CHUNK_ROWS = 65536
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, like the Milvus standard analyzer."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize_score(score: np.ndarray, metric_type: str) -> np.ndarray:
+    """
+    Map raw scores into [0, 1] the way the Milvus WeightedRanker does before weighting.
+
+    Args:
+        score: Raw distances of one sub-search.
+        metric_type: "IP" or "BM25".
+
+    Returns:
+        np.ndarray: Normalized scores.
+    """
+    if metric_type == "IP":
+        return 0.5 + np.arctan(score) / np.pi
+    if metric_type == "BM25":
+        return 2 * np.arctan(score) / np.pi
+    raise ValueError(f"Unsupported metric type: {metric_type}")
+
+
+class SentenceTransformerEmbeddings:
+    """
+    Minimal stand-in for pymilvus' SentenceTransformerEmbeddingFunction.
+
+    Loads the model lazily and returns L2-normalized vectors, so the local
+    engine needs neither pymilvus nor a Milvus server.
+    """
+
+    def __init__(self, model_name: str = "intfloat/e5-large-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+
+class _LocalCollection:
+    """Files of one local collection, loaded memory-mapped."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = ujson.load(f)
+        with open(os.path.join(path, "docs.json"), "r", encoding="utf-8") as f:
+            self.docs = ujson.load(f)
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab = {term: i for i, term in enumerate(ujson.load(f))}
+
+        self.num_docs = self.meta["num_docs"]
+        self.dense = np.memmap(os.path.join(path, "dense.f16"), dtype=np.float16, mode="r",
+                               shape=(self.num_docs, self.meta["dim"])) if self.num_docs else np.zeros((0, self.meta["dim"]), np.float16)
+
+        bm25 = np.load(os.path.join(path, "bm25.npz"))
+        self.offsets = bm25["offsets"]
+        self.doc_ids = bm25["doc_ids"]
+        self.weights = bm25["weights"]
+        self.idf = bm25["idf"]
+
+
+class LocalSearchASOT:
+    """
+    In-process search engine over the local ASOT corpus, without any vector database.
+
+    It exposes the same dense_search / sparse_search / hybrid_search interface as
+    MilvusClientASOT. Each collection is a directory holding a memory-mapped
+    float16 matrix of the e5 embeddings, searched with vectorized matrix
+    products, and an array-backed BM25 inverted index built from the same text
+    as MilvusClientASOT.prepare_data_for_insertion.
+    """
+
+    def __init__(self, index_dir: str = None, embeddings=None):
+        """
+        Args:
+            index_dir (str, optional): Directory holding one subdirectory per collection.
+                Defaults to LOCAL_INDEX_DIR, then "local_index".
+            embeddings (callable, optional): Embedding function with a `dim` attribute,
+                e.g. MilvusClientASOT().embeddings to share an already loaded model.
+                Loaded lazily on first use when omitted.
+        """
+        self.logger = Logger('local_search_logger', os.getenv("LOG_MISC", "DEBUG")).logger
+        self.index_dir = index_dir or os.getenv("LOCAL_INDEX_DIR", "local_index")
+        self._embeddings = embeddings
+        self._collections: Dict[str, _LocalCollection] = {}
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = SentenceTransformerEmbeddings()
+            self.logger.debug("Dense embeddings initialized.")
+        return self._embeddings
+
+    def _collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.index_dir, collection_name)
+
+    def _get_collection(self, collection_name: str) -> _LocalCollection:
+        if collection_name not in self._collections:
+            if not self.has_collection(collection_name):
+                raise ValueError(f"Collection {collection_name} does not exist")
+            self._collections[collection_name] = _LocalCollection(self._collection_path(collection_name))
+        return self._collections[collection_name]
+
+    def has_collection(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self._collection_path(collection_name), "meta.json"))
+
+    def delete_collection(self, collection_name: str):
+        """Delete a local collection."""
+        self._collections.pop(collection_name, None)
+        if self.has_collection(collection_name):
+            shutil.rmtree(self._collection_path(collection_name))
+            self.logger.info(f"Collection {collection_name} deleted")
+        else:
+            self.logger.warning(f"Collection {collection_name} does not exist")
+
+    def insert_data(self, collection_name: str, documents: List[Dict[str, Any]]) -> int:
+        """
+        Add documents to a local collection, creating it if needed.
+
+        Only the new documents are embedded, and their vectors are appended to
+        the dense matrix file in place, without reading the existing rows. The
+        BM25 index, which is cheap to compute, is rebuilt over all documents.
+
+        Args:
+            collection_name (str): Name of the collection.
+            documents (list): Song records with Milvus field names.
+
+        Returns:
+            int: Total number of documents in the collection.
+        """
+        path = self._collection_path(collection_name)
+        docs, dim = [], None
+        if self.has_collection(collection_name):
+            existing = self._get_collection(collection_name)
+            docs, dim = list(existing.docs), existing.meta["dim"]
+        existing_rows = len(docs)
+
+        new_docs = []
+        for doc in documents:
+            data_point = build_data_point(doc)
+            data_point["text"] = build_document_text(doc)
+            new_docs.append(data_point)
+
+        new_dense = None
+        if new_docs:
+            new_dense = np.asarray(self.embeddings([EMBEDDING_PREFIX + doc["text"] for doc in new_docs]), dtype=np.float16)
+            if dim is not None and new_dense.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {new_dense.shape[1]} does not match collection "
+                                 f"{collection_name} ({dim})")
+            dim = new_dense.shape[1]
+            docs.extend(new_docs)
+        if dim is None:
+            dim = self.embeddings.dim
+
+        self._write_collection(path, docs, dim, existing_rows, new_dense)
+        self._collections.pop(collection_name, None)
+        self.logger.debug(f"Inserted {len(new_docs)} documents into local collection {collection_name}")
+        return len(docs)
+
+    def insert_episodes(self, collection_name: str, documents: List[Dict[str, Any]]) -> int:
+        """
+        Add documents whose episode_id is not already in the local collection.
+
+        Args:
+            collection_name (str): Name of the collection.
+            documents (Iterable): Song records with Milvus field names.
+
+        Returns:
+            int: Number of documents inserted.
+        """
+        existing = set(self.list_episodes(collection_name)) if self.has_collection(collection_name) else set()
+        to_insert = [doc for doc in documents if doc.get("episode_id") is not None and doc.get("episode_id") not in existing]
+        if not to_insert:
+            self.logger.info("No new episodes found to insert.")
+            return 0
+        self.insert_data(collection_name, to_insert)
+        return len(to_insert)
+
+    def _write_collection(self, path: str, docs: List[Dict[str, Any]], dim: int, existing_rows: int,
+                          new_dense: Optional[np.ndarray]):
+        """
+        Write a collection to a temporary directory and swap it in.
+
+        The dense matrix is the one file that grows with the corpus, so it is
+        not rewritten: new rows are appended to the existing file, which is then
+        hard-linked into the new directory. Readers only map the rows counted in
+        meta.json, so open memory maps stay valid, and rows left behind by an
+        interrupted insert are cut before appending.
+        """
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        dense_path = os.path.join(path, "dense.f16")
+        if existing_rows:
+            with open(dense_path, "r+b") as f:
+                f.truncate(existing_rows * dim * np.dtype(np.float16).itemsize)
+                f.seek(0, os.SEEK_END)
+                if new_dense is not None:
+                    f.write(new_dense.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(dense_path, os.path.join(tmp_path, "dense.f16"))
+            except OSError:
+                # File systems without hard links
+                shutil.copyfile(dense_path, os.path.join(tmp_path, "dense.f16"))
+        elif new_dense is not None and len(new_dense):
+            new_dense.tofile(os.path.join(tmp_path, "dense.f16"))
+
+        terms, arrays = self._build_bm25([doc["text"] for doc in docs])
+        np.savez(os.path.join(tmp_path, "bm25.npz"), **arrays)
+        with open(os.path.join(tmp_path, "vocab.json"), "w", encoding="utf-8") as f:
+            ujson.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, "docs.json"), "w", encoding="utf-8") as f:
+            ujson.dump(docs, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            ujson.dump({"num_docs": len(docs), "dim": int(dim), "vocab_size": len(terms),
+                        "k1": BM25_K1, "b": BM25_B}, f)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _build_bm25(texts: List[str]):
+        """
+        Build a CSR-style inverted index with precomputed BM25 term weights.
+
+        Postings of term t are doc_ids[offsets[t]:offsets[t + 1]], and the matching
+        entries of `weights` hold the length-normalized term frequency part of BM25,
+        so a query only needs idf[t] * weights summed per document.
+        """
+        term_ids: Dict[str, int] = {}
+        posting_terms, posting_docs, posting_tfs = [], [], []
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_len[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                posting_docs.append(doc_id)
+                posting_tfs.append(tf)
+
+        posting_terms = np.asarray(posting_terms, dtype=np.int64)
+        order = np.argsort(posting_terms, kind="stable")
+        doc_ids = np.asarray(posting_docs, dtype=np.int32)[order]
+        tfs = np.asarray(posting_tfs, dtype=np.float32)[order]
+
+        df = np.bincount(posting_terms, minlength=len(term_ids)).astype(np.float32)
+        offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        avgdl = float(doc_len.mean()) if len(texts) and doc_len.mean() > 0 else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[doc_ids] / avgdl)
+        weights = (tfs * (BM25_K1 + 1) / (tfs + norm)).astype(np.float32)
+        idf = np.log(1 + (len(texts) - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        return list(term_ids), {"offsets": offsets, "doc_ids": doc_ids, "weights": weights, "idf": idf}
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, limit: int, candidates: Optional[np.ndarray] = None):
+        if candidates is None:
+            candidates = np.arange(len(scores))
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def _hits(self, collection: _LocalCollection, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        return [{"id": int(i), "distance": float(scores[i]), "entity": collection.docs[i]} for i in ids]
+
+    def _dense_scores(self, collection: _LocalCollection, query_text: str) -> np.ndarray:
+        query_vector = np.asarray(self.embeddings([EMBEDDING_PREFIX + query_text])[0], dtype=np.float32)
+        scores = np.empty(collection.num_docs, dtype=np.float32)
+        for start in range(0, collection.num_docs, DENSE_CHUNK_ROWS):
+            block = collection.dense[start:start + DENSE_CHUNK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query_vector
+        return scores
+
+    def _sparse_scores(self, collection: _LocalCollection, query_text: str) -> np.ndarray:
+        scores = np.zeros(collection.num_docs, dtype=np.float32)
+        for term, count in Counter(tokenize(query_text)).items():
+            term_id = collection.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = collection.offsets[term_id], collection.offsets[term_id + 1]
+            # Doc IDs are unique within a posting list, so fancy-index addition is safe
+            scores[collection.doc_ids[start:end]] += count * collection.idf[term_id] * collection.weights[start:end]
+        return scores
+
+    def dense_search(self, collection_name, query_text, limit=5):
+        """
+        Perform a dense vector search using the query text.
+
+        Args:
+            collection_name (str): Name of the collection to search
+            query_text (str): Text query to generate dense embedding
+            limit (int, optional): Maximum number of results. Defaults to 5.
+
+        Returns:
+            list: Hits with 'id', 'distance' (inner product) and 'entity' keys
+        """
+        collection = self._get_collection(collection_name)
+        scores = self._dense_scores(collection, query_text)
+        return self._hits(collection, self._top_k(scores, limit), scores)
+
+    def sparse_search(self, collection_name, query_text, limit=5):
+        """
+        Perform a BM25 search using the query text.
+
+        Args:
+            collection_name (str): Name of the collection to search
+            query_text (str): Text query for sparse search
+            limit (int, optional): Maximum number of results. Defaults to 5.
+
+        Returns:
+            list: Hits with 'id', 'distance' (BM25 score) and 'entity' keys
+        """
+        collection = self._get_collection(collection_name)
+        scores = self._sparse_scores(collection, query_text)
+        return self._hits(collection, self._top_k(scores, limit, np.flatnonzero(scores > 0)), scores)
+
+    def hybrid_search(self, collection_name, query_text, limit=5, ranker_type="weighted", **kwargs):
+        """
+        Perform a hybrid search fusing the sparse and dense results like the Milvus rankers.
+
+        Each side contributes its top `limit` candidates. The weighted ranker
+        normalizes scores with arctan per metric before weighting them; RRF sums
+        1 / (k + rank) over both result lists.
+
+        Args:
+            collection_name (str): Name of the collection to search
+            query_text (str): Text query for generating dense embedding and sparse search
+            ranker_type (str): Type of ranker to use ('weighted' or 'rrf')
+            limit (int, optional): Maximum number of results. Defaults to 5.
+            **kwargs: Parameters for the specific ranker:
+                - If ranker_type is 'weighted': sparse_weight (default=0.3), dense_weight (default=0.7)
+                - If ranker_type is 'rrf': k (default=60)
+
+        Returns:
+            list: Hits with 'id', 'distance' (fused score) and 'entity' keys
+        """
+        collection = self._get_collection(collection_name)
+        sparse_scores = self._sparse_scores(collection, query_text)
+        dense_scores = self._dense_scores(collection, query_text)
+        sparse_ids = self._top_k(sparse_scores, limit, np.flatnonzero(sparse_scores > 0))
+        dense_ids = self._top_k(dense_scores, limit)
+
+        fused = np.zeros(collection.num_docs, dtype=np.float32)
+        if ranker_type.lower() == "weighted":
+            sparse_weight = kwargs.get("sparse_weight", 0.3)
+            dense_weight = kwargs.get("dense_weight", 0.7)
+            fused[sparse_ids] += sparse_weight * normalize_score(sparse_scores[sparse_ids], "BM25")
+            fused[dense_ids] += dense_weight * normalize_score(dense_scores[dense_ids], "IP")
+        elif ranker_type.lower() == "rrf":
+            k = kwargs.get("k", 60)
+            fused[sparse_ids] += 1.0 / (k + np.arange(1, len(sparse_ids) + 1))
+            fused[dense_ids] += 1.0 / (k + np.arange(1, len(dense_ids) + 1))
+        else:
+            raise ValueError(f"Unknown ranker type: {ranker_type}")
+
+        candidates = np.union1d(sparse_ids, dense_ids)
+        return self._hits(collection, self._top_k(fused, limit, candidates), fused)
+
+    def list_episodes(self, collection_name: str) -> list[str]:
+        """Return the sorted unique episode IDs of a local collection."""
+        collection = self._get_collection(collection_name)
+        return sorted({doc["episode_id"] for doc in collection.docs})
+
+    def get_collection_stats(self, collection_name: str) -> dict:
+        """Return the row count, vector dimension and on-disk size of a local collection."""
+        collection = self._get_collection(collection_name)
+        path = self._collection_path(collection_name)
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        return {"collection_name": collection_name, "row_count": collection.num_docs, "dim": collection.meta["dim"],
+                "vocab_size": collection.meta["vocab_size"], "size_bytes": size}
+
+
+if __name__ == "__main__":
+    from src.episode_store import load_corpus_records
+
+    parser = argparse.ArgumentParser(description="Build a local in-process search index from the episode corpus.")
+    parser.add_argument("--collection", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--index-dir", default=None, help="Index directory (default: LOCAL_INDEX_DIR)")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the existing local collection first")
+    args = parser.parse_args()
+
+    engine = LocalSearchASOT(args.index_dir)
+    if args.rebuild and engine.has_collection(args.collection):
+        engine.delete_collection(args.collection)
+    inserted = engine.insert_episodes(args.collection, load_corpus_records())
+    print(f"Inserted {inserted} documents into local collection {args.collection}: {engine.get_collection_stats(args.collection)}")
@@ -8,39 +8,119 @@ from pymilvus import WeightedRanker, MilvusException, RRFRanker
 
 from pymilvus import Function, FunctionType
 from pymilvus import DataType
+from pymilvus.client.types import LoadState
 from pymilvus.model.dense import SentenceTransformerEmbeddingFunction
 
 from src.Logger import Logger
 from src.Singleton import Singleton
+from src.song_documents import (OUTPUT_FIELDS, EMBEDDING_PREFIX, STRING_DEFAULT, TRACK_TEXT_FIELDS,
+                                build_document_text, build_data_point, build_track_text)
+from src.vector_compression import default_vector_type, cast_vectors, decode_vector, projection_path, PCAProjection
+from src.migrate_vectors import copied_fields, iter_collection
+from src.canonical_tracks import track_key
+from src.query_router import quote
+from src.knn_graph import KnnGraph, graph_path, distinct_neighbours, SIMILAR_OVERFETCH
+from src.ingestion_profile import ingestion_profile
+from src import search_metrics
+from src.collection_snapshot import (SNAPSHOT_FORMAT_VERSION, MANIFEST_FILE, PROJECTION_FILE, field_manifest,
+                                     shard_schema, shard_rows_for, write_shard, write_manifest, read_manifest,
+                                     verify_shards, iter_shard_rows, pack_dynamic_fields, unpack_dynamic_fields)
 import json
+import time
+import heapq
+import shutil
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 
 import os
 
+# Milvus field type of the dense field for each supported storage type
+DENSE_DATA_TYPES = {
+    "float32": DataType.FLOAT_VECTOR,
+    "float16": DataType.FLOAT16_VECTOR,
+    "bfloat16": DataType.BFLOAT16_VECTOR,
+}
+
+# Dense index per index profile: "hot" favours latency, "cold" favours memory
+DENSE_INDEX_PROFILES = {
+    "default": {"index_type": "IVF_FLAT", "params": {"nlist": 128}},
+    "hot": {"index_type": "HNSW", "params": {"M": 16, "efConstruction": 200}},
+    "cold": {"index_type": "IVF_SQ8", "params": {"nlist": 128}},
+}
+
+def sort_value(value):
+    """Sort key for scalar fields: numbers (and numeric strings like episode IDs) before text."""
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    if isinstance(value, str) and value.isdigit():
+        return (0, int(value), "")
+    return (1, 0, str(value))
+
+class UnsupportedByLite(RuntimeError):
+    """An operation Milvus Lite does not implement (BM25 sparse search, mmap); it needs a Milvus server."""
+
 class MilvusClientASOT(metaclass=Singleton):
     """
     MilvusClient is a singleton class that provides a client for the Milvus database.
     It provides methods to create collections, insert data, and perform searches.
     """
 
-    def __init__(self):
+    def __init__(self, uri: str = None):
+        """
+        Args:
+            uri (str, optional): Milvus server URI, or the path of a local Milvus Lite
+                database file (e.g. "asot.db"). Defaults to MILVUS_LITE_DB if set,
+                then MILVUS_URI, then http://localhost:19530.
+        """
 
         self.logger = Logger('milvus_logger', os.getenv("LOG_MISC", "DEBUG")).logger
 
-        self.client = MC(host="localhost", port="19530")
+        # pymilvus itself parses MILVUS_URI on import and rejects file paths,
+        # so the Milvus Lite database is configured through its own variable.
+        self.uri = uri or os.getenv("MILVUS_LITE_DB") or os.getenv("MILVUS_URI", "http://localhost:19530")
+        # Anything that is not a network address is a Milvus Lite database file
+        self.is_lite = not self.uri.startswith(("http://", "https://", "tcp://", "unix:"))
+        self.client = MC(uri=self.uri, token=os.getenv("MILVUS_TOKEN", ""))
 
+        if self.is_lite:
+            self.logger.warning(f"Using embedded Milvus Lite database at {self.uri}. "
+                                "BM25 full-text search is not supported: sparse search is disabled "
+                                "and hybrid search falls back to dense search.")
         self.logger.debug("Milvus Client successfully initialized.")
 
         self.embeddings = SentenceTransformerEmbeddingFunction("intfloat/e5-large-v2")
         self.sparse_embedding_function = None
         self.logger.debug("Dense embeddings initialized.")
+
+        # Storage type, dimension and projection of the dense field, per collection
+        self._dense_configs = {}
+
+        # Collections known to be loaded, so searches don't check the load state every time
+        self._loaded_collections = set()
+        # Searches load an unloaded collection on demand instead of failing
+        self.auto_load = os.getenv("MILVUS_AUTO_LOAD", "true").lower() == "true"
+
+        # Primary key field and precomputed neighbour graph (with its file mtime), per collection
+        self._primary_fields = {}
+        self._knn_graphs = {}
+
+        # Callbacks notified of every insert, see add_insert_listener
+        self._insert_listeners = []
         
-    def create_schema(self, auto_id=True, enable_dynamic_field=True):
+    def create_schema(self, auto_id=True, enable_dynamic_field=True, vector_type=None, dim=None):
         """
         Create a schema for a Milvus collection with required fields and BM25 function.
+
+        Milvus Lite silently drops server-side functions, so on Lite the sparse
+        field and BM25 function are left out of the schema entirely.
         
         Args:
             auto_id (bool): Whether to auto-generate IDs
             enable_dynamic_field (bool): Whether to enable dynamic fields
+            vector_type (str, optional): Storage type of the dense field, 'float32',
+                'float16' or 'bfloat16'. Defaults to DENSE_VECTOR_TYPE or float32.
+            dim (int, optional): Dimension of the dense field. Defaults to the embedding
+                dimension; a smaller value requires a saved PCA projection.
         
         Returns:
             CollectionSchema: A complete schema object for the collection
@@ -76,8 +156,13 @@ class MilvusClientASOT(metaclass=Singleton):
         schema.add_field(field_name="URL", datatype=DataType.VARCHAR, max_length=2048) # Assuming a max length for URL
 
         # Vector fields for search
-        schema.add_field(field_name="sparse", datatype=DataType.SPARSE_FLOAT_VECTOR)
-        schema.add_field(field_name="dense", datatype=DataType.FLOAT_VECTOR, dim=self.embeddings.dim) 
+        if not self.is_lite:
+            schema.add_field(field_name="sparse", datatype=DataType.SPARSE_FLOAT_VECTOR)
+        schema.add_field(field_name="dense", datatype=DENSE_DATA_TYPES[vector_type or default_vector_type()],
+                         dim=dim or self.embeddings.dim)
+
+        if self.is_lite:
+            return schema
 
         # Define function to generate sparse vectors
         bm25_function = Function(
@@ -91,23 +176,36 @@ class MilvusClientASOT(metaclass=Singleton):
         
         return schema
     
-    def create_indices(self, collection_name):
+    def create_indices(self, collection_name, index_profile=None):
         """
         Prepare index parameters for both dense and sparse vector fields.
         
         Args:
             collection_name (str): Name of the collection for index preparation
+            index_profile (str, optional): Dense index profile from DENSE_INDEX_PROFILES:
+                'default' (IVF_FLAT), 'hot' (HNSW) or 'cold' (IVF_SQ8). Ignored on Milvus Lite.
         """
         # Prepare index parameters
         index_params = self.client.prepare_index_params()
         
         # Add indexes
+        if self.is_lite:
+            # Milvus Lite only implements brute-force search
+            index_params.add_index(
+                field_name="dense",
+                index_name="dense_index",
+                index_type="FLAT",
+                metric_type="IP",
+            )
+            return index_params
+
+        dense_index = DENSE_INDEX_PROFILES[index_profile or "default"]
         index_params.add_index(
             field_name="dense",
             index_name="dense_index",
-            index_type="IVF_FLAT",
+            index_type=dense_index["index_type"],
             metric_type="IP",
-            params={"nlist": 128},
+            params=dense_index["params"],
         )
         
         index_params.add_index(
@@ -120,7 +218,7 @@ class MilvusClientASOT(metaclass=Singleton):
         
         return index_params
     
-    def create_collection(self, collection_name, schema, index_params):
+    def create_collection(self, collection_name, schema, index_params, mmap=None):
         """
         Create a new collection in Milvus with the provided schema and index parameters.
         
@@ -128,74 +226,125 @@ class MilvusClientASOT(metaclass=Singleton):
             collection_name (str): Name of the collection
             schema (CollectionSchema): Schema for the collection
             index_params: Index parameters for the collection
+            mmap (bool, optional): Create the collection with memory-mapped raw data
+                (see enable_mmap). Defaults to MILVUS_MMAP; ignored on Milvus Lite.
         """
+        if mmap is None:
+            mmap = os.getenv("MILVUS_MMAP", "false").lower() == "true"
+
+        properties = {}
+        if mmap and not self.is_lite:
+            properties["mmap.enabled"] = "true"
+
         self.client.create_collection(
             collection_name=collection_name,
             schema=schema,
-            index_params=index_params
+            index_params=index_params,
+            properties=properties or None
         )
         
         self.logger.debug(f"Created collection: {collection_name}")
 
-    def prepare_data_for_insertion(self, documents):
+    def prepare_data_for_insertion(self, documents, dense_vectors=None):
         """
         Prepare documents for insertion into Milvus by generating dense embeddings.
         
         Args:
             documents (list): List of dictionaries with job position fields
+            dense_vectors (list, optional): Precomputed dense vectors, one per document,
+                e.g. checkpointed by an earlier ingestion run. Skips embedding when given.
             
         Returns:
             list: List of documents ready for insertion with dense embeddings
         """
-        prepared_data = []
-        
-        # Define fields to include in the concatenated text field
-        text_fields = ['episode_id', 'ranking', 'artist', 'collaborators', 'featured_artists', 'title', 'remix_info', 'popularity_score', 'vote_count', 'URL']
+        with ingestion_profile.span("prepare") as counters:
+            prepared_data = []
 
-        # Extract text and prepare data points
-        docs_texts_to_embed = []
-        for doc in documents:
-            # Construct the text field by concatenating specified fields
-            text_parts = []
-            for field in text_fields:
-                value = doc.get(field)
-                # Only include non-null, non-default values
-                if value is not None and value != 'nav' and value != -1:
-                    text_parts.append(str(value))
-            
-            constructed_text = " ".join(text_parts)
-            docs_texts_to_embed.append("query: " + constructed_text)
-
-            # Prepare the data point without the 'text' field initially
-            # Explicitly handle None values for each field
-            data_point = {
-                "episode_id": doc.get('episode_id') if doc.get('episode_id') is not None else 'nav',
-                "ranking": doc.get('ranking') if doc.get('ranking') is not None else -1,
-                "artist": doc.get('artist') if doc.get('artist') is not None else 'nav',
-                "collaborators": doc.get('collaborators') if doc.get('collaborators') is not None else 'nav',
-                "featured_artists": doc.get('featured_artists') if doc.get('featured_artists') is not None else 'nav',
-                "title": doc.get('title') if doc.get('title') is not None else 'nav',
-                "remix_info": doc.get('remix_info') if doc.get('remix_info') is not None else 'nav',
-                "popularity_score": doc.get('popularity_score') if doc.get('popularity_score') is not None else -1,
-                "vote_count": doc.get('vote_count') if doc.get('vote_count') is not None else -1,
-                "URL": doc.get('URL') if doc.get('URL') is not None else 'nav'
-            }
-            prepared_data.append(data_point)
-         
-        # Generate dense embeddings in batch using the constructed texts
-        dense_vectors = self.embeddings(docs_texts_to_embed)
-        
-        # Add dense vectors and the constructed text back to the prepared data
-        for i, data_point in enumerate(prepared_data):
-            data_point["dense"] = dense_vectors[i]
-            # Extract the original constructed text (without "query: ")
-            data_point["text"] = docs_texts_to_embed[i][len("query: "):] 
-        
-        return prepared_data
+            # Extract text and prepare data points
+            docs_texts_to_embed = []
+            for doc in documents:
+                # Construct the text field by concatenating specified fields
+                docs_texts_to_embed.append(EMBEDDING_PREFIX + build_document_text(doc))
+
+                # Prepare the data point without the 'text' field initially
+                prepared_data.append(build_data_point(doc))
+            counters["rows"] = len(prepared_data)
+
+            # Generate dense embeddings in batch using the constructed texts
+            if dense_vectors is None:
+                with ingestion_profile.span("embed", rows=len(docs_texts_to_embed),
+                                            bytes=sum(len(text.encode("utf-8")) for text in docs_texts_to_embed)):
+                    dense_vectors = self.embeddings(docs_texts_to_embed)
+            elif len(dense_vectors) != len(prepared_data):
+                raise ValueError(f"Got {len(dense_vectors)} dense vectors for {len(prepared_data)} documents")
+
+            # Add dense vectors and the constructed text back to the prepared data
+            for i, data_point in enumerate(prepared_data):
+                data_point["dense"] = dense_vectors[i]
+                # Extract the original constructed text (without "query: ")
+                data_point["text"] = docs_texts_to_embed[i][len(EMBEDDING_PREFIX):]
+
+            return prepared_data
+
+    def dense_config(self, collection_name: str) -> dict:
+        """
+        Storage type, dimension and PCA projection of a collection's dense field.
+
+        Read from the collection schema once and cached, so collections created
+        with different vector types can be queried side by side.
+
+        Args:
+            collection_name (str): Name of the collection
+
+        Returns:
+            dict: 'vector_type', 'dim' and 'projection' (None for full-dimension vectors)
+
+        Raises:
+            ValueError: If the dense field is dimension-reduced but no projection is saved.
+        """
+        if collection_name in self._dense_configs:
+            return self._dense_configs[collection_name]
+
+        description = self.client.describe_collection(collection_name)
+        field = next(field for field in description["fields"] if field["name"] == "dense")
+        vector_type = next(name for name, data_type in DENSE_DATA_TYPES.items() if data_type == field["type"])
+        dim = int(field["params"]["dim"])
+
+        projection = None
+        if dim != self.embeddings.dim:
+            projection = PCAProjection.load(projection_path(collection_name))
+            if projection is None or projection.dim != dim:
+                raise ValueError(f"Collection {collection_name} stores {dim}-d vectors but no matching PCA "
+                                 f"projection was found at {projection_path(collection_name)}")
+
+        config = {"vector_type": vector_type, "dim": dim, "projection": projection}
+        self._dense_configs[collection_name] = config
+        return config
+
+    def encode_dense(self, collection_name: str, vectors) -> list:
+        """
+        Project and cast full-precision embeddings to the collection's dense field format.
+
+        Args:
+            collection_name (str): Name of the collection
+            vectors: Embeddings as returned by the embedding model
+
+        Returns:
+            list: Vectors ready for insertion or search
+        """
+        config = self.dense_config(collection_name)
+        if config["vector_type"] == "float32" and config["projection"] is None:
+            return vectors
+        if config["projection"] is not None:
+            vectors = config["projection"].transform(vectors)
+        return cast_vectors(vectors, config["vector_type"])
 
     def insert_data(self, collection_name, prepared_data):
         """
         Insert data into a collection. Always prepares embeddings before insertion.
+
+        Full-precision dense vectors are projected and cast to the collection's
+        dense field format here, so callers never need to know it.
         
         Args:
             collection_name (str): Name of the collection
@@ -206,22 +355,51 @@ class MilvusClientASOT(metaclass=Singleton):
         """
 
         self.logger.debug(f"Prepared {len(prepared_data)} documents with embeddings")
-        
-        # Insert prepared data
-        res = self.client.insert(
-            collection_name=collection_name,
-            data=prepared_data
-        )
+
+        with ingestion_profile.span("insert", rows=len(prepared_data)):
+            if prepared_data and "dense" in prepared_data[0]:
+                dense_vectors = self.encode_dense(collection_name, [data_point["dense"] for data_point in prepared_data])
+                prepared_data = [{**data_point, "dense": dense_vector}
+                                 for data_point, dense_vector in zip(prepared_data, dense_vectors)]
+
+            # Insert prepared data
+            res = self.client.insert(
+                collection_name=collection_name,
+                data=prepared_data
+            )
         self.logger.debug(f"Inserted {len(prepared_data)} documents into {collection_name}")
+
+        with ingestion_profile.span("listeners", rows=len(prepared_data)):
+            for listener in self._insert_listeners:
+                try:
+                    listener(collection_name, prepared_data)
+                except Exception as e:
+                    # The rows are in; a failing listener must not fail the ingestion
+                    self.logger.warning(f"Insert listener {listener} failed: {e}")
         
         return res
 
-    def create_collection_if_not_exists(self, collection_name: str) -> bool:
+    def add_insert_listener(self, listener):
+        """
+        Register a callback run after every successful insert_data call.
+
+        Args:
+            listener (callable): Called with the collection name and the inserted
+                rows, e.g. IngestEventLog(...).append to notify other processes.
+        """
+        self._insert_listeners.append(listener)
+
+    def create_collection_if_not_exists(self, collection_name: str, vector_type: str = None, dim: int = None,
+                                        index_profile: str = None, mmap: bool = None) -> bool:
         """
         Creates a collection if it doesn't already exist.
 
         Args:
             collection_name (str): Name of the collection to create.
+            vector_type (str, optional): Storage type of the dense field (see create_schema).
+            dim (int, optional): Dimension of the dense field (see create_schema).
+            index_profile (str, optional): Dense index profile (see create_indices).
+            mmap (bool, optional): Memory-map the collection (see create_collection).
 
         Returns:
             bool: True if the collection was created, False if it already existed.
@@ -236,11 +414,11 @@ class MilvusClientASOT(metaclass=Singleton):
         
         try:
             # Create schema and indices
-            schema = self.create_schema()
-            index_params = self.create_indices(collection_name)
+            schema = self.create_schema(vector_type=vector_type, dim=dim)
+            index_params = self.create_indices(collection_name, index_profile=index_profile)
             
             # Create collection
-            self.create_collection(collection_name, schema, index_params)
+            self.create_collection(collection_name, schema, index_params, mmap=mmap)
             self.logger.info(f"Successfully created collection: {collection_name}")
             return True
         except MilvusException as e:
@@ -250,6 +428,149 @@ class MilvusClientASOT(metaclass=Singleton):
             self.logger.error(f"Unexpected error during collection creation for {collection_name}: {str(e)}")
             raise
 
+    def load_collection(self, collection_name: str, partition_names: list = None, wait: bool = True,
+                        timeout: float = None):
+        """
+        Load a collection, or some of its partitions, into query node memory.
+
+        Args:
+            collection_name (str): Name of the collection
+            partition_names (list, optional): Load only these partitions.
+            wait (bool): Block until loading has finished. When False, follow
+                the progress with get_load_state.
+            timeout (float, optional): Seconds to wait for the load to finish.
+        """
+        start = time.perf_counter()
+        if partition_names:
+            self.client.load_partitions(collection_name, partition_names, timeout=timeout, _async=not wait)
+        else:
+            self.client.load_collection(collection_name, timeout=timeout, _async=not wait)
+
+        if wait:
+            self._loaded_collections.add(collection_name)
+            self.logger.info(f"Loaded {collection_name}{f' partitions {partition_names}' if partition_names else ''} "
+                             f"in {time.perf_counter() - start:.2f} s")
+        else:
+            self.logger.info(f"Started loading {collection_name}")
+
+    def release_collection(self, collection_name: str, partition_names: list = None):
+        """
+        Release a collection, or some of its partitions, from query node memory.
+
+        Args:
+            collection_name (str): Name of the collection
+            partition_names (list, optional): Release only these partitions.
+        """
+        if partition_names:
+            self.client.release_partitions(collection_name, partition_names)
+        else:
+            self.client.release_collection(collection_name)
+        self._loaded_collections.discard(collection_name)
+        self.logger.info(f"Released {collection_name}{f' partitions {partition_names}' if partition_names else ''}")
+
+    def get_load_state(self, collection_name: str, partition_name: str = None) -> dict:
+        """
+        Report whether a collection (or partition) is loaded.
+
+        Args:
+            collection_name (str): Name of the collection
+            partition_name (str, optional): Report a single partition instead.
+
+        Returns:
+            dict: 'state' ('NotExist', 'NotLoad', 'Loading' or 'Loaded') and
+                'progress' (percentage of the data loaded).
+        """
+        load_state = self.client.get_load_state(collection_name, partition_name=partition_name or "")
+        state = load_state["state"]
+        if state == LoadState.Loaded:
+            progress = 100
+        elif state == LoadState.Loading:
+            progress = int(load_state.get("progress", 0))
+        else:
+            progress = 0
+        return {"state": state.name, "progress": progress}
+
+    def ensure_loaded(self, collection_name: str):
+        """
+        Make sure a collection is loaded before searching it.
+
+        Searching an unloaded collection fails on the server, so it is either
+        loaded on demand (MILVUS_AUTO_LOAD, the default) or rejected with a clear error.
+
+        Raises:
+            RuntimeError: If the collection is not loaded and auto-loading is disabled.
+        """
+        if collection_name in self._loaded_collections:
+            search_metrics.cache_lookup("loaded_collections", True)
+            return
+        search_metrics.cache_lookup("loaded_collections", False)
+        state = self.get_load_state(collection_name)["state"]
+        if state != LoadState.Loaded.name:
+            if not self.auto_load:
+                raise RuntimeError(f"Collection {collection_name} is not loaded ({state}). "
+                                   "Load it first with load_collection.")
+            self.logger.warning(f"Collection {collection_name} is not loaded ({state}), loading it now.")
+            self.load_collection(collection_name)
+        self._loaded_collections.add(collection_name)
+
+    def enable_mmap(self, collection_name: str, enabled: bool = True, fields: list = None):
+        """
+        Memory-map a collection's raw data and indexes instead of holding them in RAM.
+
+        Milvus only accepts the change on a released collection, so a loaded
+        collection is released and loaded again afterwards.
+
+        Args:
+            collection_name (str): Name of the collection
+            enabled (bool): Whether to enable or disable mmap.
+            fields (list, optional): Only change these fields; by default the whole
+                collection and all of its indexes are changed.
+
+        Raises:
+            UnsupportedByLite: On Milvus Lite, which has no mmap support.
+        """
+        if self.is_lite:
+            raise UnsupportedByLite("Memory-mapped collections are not supported by Milvus Lite. "
+                                    "Connect to a Milvus server to use mmap.")
+
+        was_loaded = self.get_load_state(collection_name)["state"] != LoadState.NotLoad.name
+        if was_loaded:
+            self.release_collection(collection_name)
+
+        value = "true" if enabled else "false"
+        if fields:
+            for field_name in fields:
+                self.client.alter_collection_field(collection_name, field_name, field_params={"mmap.enabled": value})
+        else:
+            self.client.alter_collection_properties(collection_name, properties={"mmap.enabled": value})
+            for index_name in self.client.list_indexes(collection_name):
+                self.client.alter_index_properties(collection_name, index_name, properties={"mmap.enabled": value})
+        self.logger.info(f"{'Enabled' if enabled else 'Disabled'} mmap on {collection_name}"
+                         f"{f' fields {fields}' if fields else ''}")
+
+        if was_loaded:
+            self.load_collection(collection_name)
+
+    def get_memory_usage(self, collection_name: str) -> int | None:
+        """
+        Memory used by the loaded segments of a collection on the query nodes.
+
+        Returns:
+            int | None: Size in bytes, or None when the server does not report it (Milvus Lite).
+        """
+        if self.is_lite:
+            return None
+        try:
+            segments = self.client._get_connection().get_query_segment_info(collection_name)
+        except Exception as e:
+            self.logger.warning(f"Could not get segment memory of {collection_name}: {str(e)}")
+            return None
+        return sum(segment.mem_size for segment in segments)
+
+    def has_collection(self, collection_name: str) -> bool:
+        """Check whether a collection exists."""
+        return self.client.has_collection(collection_name)
+
     def list_collections(self) -> list:
         """
         List all collections in the Milvus instance.
@@ -295,6 +616,13 @@ class MilvusClientASOT(metaclass=Singleton):
             # Combine the information
             result = description.copy()
             result["row_count"] = stats.get("row_count", 0)
+
+            # Loading and memory footprint
+            load_state = self.get_load_state(collection_name)
+            result["load_state"] = load_state["state"]
+            result["load_progress"] = load_state["progress"]
+            result["memory_bytes"] = self.get_memory_usage(collection_name) if load_state["state"] == LoadState.Loaded.name else 0
+            result["mmap_enabled"] = str(description.get("properties", {}).get("mmap.enabled", "false")).lower() == "true"
             
             return result
             
@@ -343,17 +671,263 @@ class MilvusClientASOT(metaclass=Singleton):
             self.logger.error(f"Unexpected error while querying episode IDs: {str(e)}")
             raise
 
+    def has_episode(self, collection_name: str, episode_id: str) -> bool:
+        """
+        Check whether any document of an episode is already in the collection.
+
+        Unlike list_episodes this only fetches a single row.
+
+        Args:
+            collection_name (str): The name of the collection to query.
+            episode_id (str): The episode ID to look for.
+
+        Returns:
+            bool: True if the episode is present.
+        """
+        if not self.client.has_collection(collection_name):
+            return False
+
+        results = self.client.query(
+            collection_name=collection_name,
+            filter=f"episode_id == {quote(str(episode_id))}",
+            output_fields=["id"],
+            limit=1,
+        )
+        return len(results) > 0
+
+    def iter_rows(self, collection_name: str, output_fields: list, filter_expr: str = "", batch_size: int = 1000):
+        """
+        Stream every row matching a filter, past the result window of a plain query.
+
+        Args:
+            collection_name (str): Name of the collection
+            output_fields (list): Fields to return.
+            filter_expr (str, optional): Milvus boolean expression; all rows by default.
+            batch_size (int): Rows fetched per request.
+
+        Yields:
+            dict: One row at a time.
+        """
+        self.ensure_loaded(collection_name)
+        iterator = self.client.query_iterator(collection_name, batch_size=batch_size, filter=filter_expr,
+                                              output_fields=output_fields)
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            iterator.close()
+
+    def list_artists(self, collection_name: str) -> list[str]:
+        """
+        Retrieve the distinct (main) artist names present in the collection.
+
+        Args:
+            collection_name (str): The name of the collection to query.
+
+        Returns:
+            list[str]: A sorted list of artist names.
+        """
+        if not self.client.has_collection(collection_name):
+            raise ValueError(f"Collection {collection_name} does not exist")
+
+        # Iterate, as a plain query is capped at Milvus' result window of 16384 rows
+        return sorted({row["artist"] for row in self.iter_rows(collection_name, ["artist"], 'artist != "nav"')})
+
+    def scalar_search(self, collection_name: str, filter_expr: str, limit: int = 5, output_fields: list = None,
+                      sort_by: str = None, descending: bool = True) -> list:
+        """
+        Answer a structured query with a scalar filter instead of a vector search.
+
+        Milvus queries have no ordering, so when sorting, the matching rows are
+        streamed with a query iterator and only the top `limit` are kept.
+
+        Args:
+            collection_name (str): Name of the collection to query
+            filter_expr (str): Milvus boolean expression, e.g. 'episode_id == "329"'
+            limit (int, optional): Maximum number of results.
+            output_fields (list, optional): Fields to return. Defaults to OUTPUT_FIELDS.
+            sort_by (str, optional): Field to sort the matches by; numeric strings sort as numbers.
+            descending (bool): Sort order.
+
+        Returns:
+            list: Hits shaped like search results ('id', 'distance', 'entity'), with
+                a distance of 1.0 since every hit matches exactly.
+        """
+        with search_metrics.track("scalar_search") as observation:
+            self.ensure_loaded(collection_name)
+            output_fields = output_fields or OUTPUT_FIELDS
+
+            if sort_by:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                rows = observation.time_rpc(select, limit, self.iter_rows(collection_name, output_fields, filter_expr),
+                                            key=lambda row: sort_value(row.get(sort_by)))
+            else:
+                rows = observation.time_rpc(
+                    self.client.query,
+                    collection_name=collection_name,
+                    filter=filter_expr,
+                    output_fields=output_fields,
+                    limit=limit,
+                )
+
+            return observation.results([{"id": row.get("id", row.get("track_id")), "distance": 1.0,
+                                         "entity": {key: value for key, value in row.items() if key != "id"}}
+                                        for row in rows])
+
+    def primary_field(self, collection_name: str) -> str:
+        """Name of a collection's primary key field ('id' for songs, 'track_id' for tracks)."""
+        if collection_name not in self._primary_fields:
+            description = self.client.describe_collection(collection_name)
+            self._primary_fields[collection_name] = next(field["name"] for field in description["fields"]
+                                                         if field.get("is_primary"))
+        return self._primary_fields[collection_name]
+
+    def knn_graph(self, collection_name: str) -> KnnGraph | None:
+        """The precomputed neighbour graph of a collection, reloaded when the file changes."""
+        path = graph_path(collection_name)
+        if not os.path.exists(path):
+            self._knn_graphs.pop(collection_name, None)
+            return None
+        mtime = os.path.getmtime(path)
+        cached = self._knn_graphs.get(collection_name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, KnnGraph.load(path))
+            self._knn_graphs[collection_name] = cached
+        return cached[1]
+
+    def get_dense_vector(self, collection_name: str, primary_key, output_fields: list = None) -> dict | None:
+        """
+        Fetch a stored row with its dense vector decoded to float32.
+
+        The vector is in the collection's stored space (projected, if the
+        collection is dimension-reduced), ready for search_by_vectors.
+
+        Args:
+            collection_name (str): Name of the collection
+            primary_key: Primary key of the row
+            output_fields (list, optional): Other fields to return.
+
+        Returns:
+            dict | None: The row, or None if there is no such primary key.
+        """
+        self.ensure_loaded(collection_name)
+        rows = self.client.get(collection_name, ids=[primary_key], output_fields=["dense"] + (output_fields or []))
+        if not rows:
+            return None
+        row = dict(rows[0])
+        row["dense"] = decode_vector(row["dense"], self.dense_config(collection_name)["vector_type"])
+        return row
+
+    def search_by_vectors(self, collection_name: str, vectors: list, limit: int = 5, output_fields: list = None,
+                          search_params: dict = None) -> list:
+        """
+        Search with vectors already in the collection's stored space, e.g. vectors read back from it.
+
+        Unlike dense_search, the vectors are only cast to the storage type, not projected again.
+
+        Args:
+            collection_name (str): Name of the collection to search
+            vectors (list): float32 vectors of the collection's dense dimension
+            limit (int, optional): Maximum number of results per vector.
+            output_fields (list, optional): Fields to return. Defaults to OUTPUT_FIELDS.
+            search_params (dict, optional): Index search parameters.
+
+        Returns:
+            list: One list of hits per vector.
+        """
+        with search_metrics.track("search_by_vectors") as observation:
+            results = self._search_stored_vectors(observation, collection_name, vectors, limit,
+                                                  output_fields, search_params)
+            for hits in results:
+                observation.results(hits)
+            return results
+
+    def _search_stored_vectors(self, observation, collection_name: str, vectors: list, limit: int,
+                               output_fields: list = None, search_params: dict = None) -> list:
+        """search_by_vectors, timed as an RPC of an operation that is already being tracked."""
+        self.ensure_loaded(collection_name)
+        vector_type = self.dense_config(collection_name)["vector_type"]
+        if vector_type != "float32":
+            vectors = cast_vectors(vectors, vector_type)
+        return observation.time_rpc(
+            self.client.search,
+            collection_name=collection_name,
+            data=list(vectors),
+            anns_field="dense",
+            limit=limit,
+            output_fields=output_fields or OUTPUT_FIELDS,
+            search_params={"metric_type": "IP", "params": search_params or {}}
+        )
+
+    def similar_tracks(self, collection_name: str, primary_key, k: int = 10, output_fields: list = None) -> list:
+        """
+        "More like this": the tracks closest to a stored one.
+
+        The stored dense vector is searched with, so nothing is re-embedded.
+        Other appearances of the same track and repeats of a track are left
+        out. When a neighbour graph was precomputed with knn_graph.py and
+        covers the row, its neighbours are looked up instead of searched.
+
+        Args:
+            collection_name (str): Name of the collection
+            primary_key: Primary key of the track to find neighbours for
+            k (int, optional): Number of similar tracks.
+            output_fields (list, optional): Fields to return. Defaults to OUTPUT_FIELDS.
+
+        Returns:
+            list: Hits shaped like search results ('id', 'distance', 'entity'), best first.
+        """
+        output_fields = output_fields or OUTPUT_FIELDS
+
+        with search_metrics.track("similar_tracks") as observation:
+            graph = self.knn_graph(collection_name)
+            covered = graph is not None and primary_key in graph and k <= graph.k
+            search_metrics.cache_lookup("similar_graph", covered)
+            if covered:
+                neighbours = graph.lookup(primary_key, k)
+                self.ensure_loaded(collection_name)
+                rows = observation.time_rpc(self.client.get, collection_name,
+                                            ids=[neighbour for neighbour, _ in neighbours], output_fields=output_fields)
+                primary = self.primary_field(collection_name)
+                rows = {row[primary]: row for row in rows}
+                # Neighbours deleted since the graph was built are skipped
+                return observation.results([
+                    {"id": neighbour, "distance": score,
+                     "entity": {key: value for key, value in rows[neighbour].items() if key != primary}}
+                    for neighbour, score in neighbours if neighbour in rows])
+
+            source = observation.time_rpc(self.get_dense_vector, collection_name, primary_key,
+                                          output_fields=TRACK_TEXT_FIELDS)
+            if source is None:
+                return observation.results([])
+            hits = self._search_stored_vectors(observation, collection_name, [source["dense"]],
+                                               limit=k * SIMILAR_OVERFETCH + 1,
+                                               output_fields=list(dict.fromkeys(output_fields + TRACK_TEXT_FIELDS)))[0]
+            return observation.results(distinct_neighbours(primary_key, track_key(source), hits, k))
+
     def delete_collection(self, collection_name):
         """
         Delete a collection from Milvus.
         """
+        self._dense_configs.pop(collection_name, None)
+        self._loaded_collections.discard(collection_name)
+        self._primary_fields.pop(collection_name, None)
+        self._knn_graphs.pop(collection_name, None)
         if self.client.has_collection(collection_name):
             self.client.drop_collection(collection_name)
             self.logger.info(f"Collection {collection_name} deleted")
         else:
             self.logger.warning(f"Collection {collection_name} does not exist")
         
-    def dense_search(self, collection_name, query_text, limit=5):
+    def embed_query(self, query_text):
+        """Full-precision embedding of a search query."""
+        return self.embeddings([EMBEDDING_PREFIX + query_text])[0]
+
+    def dense_search(self, collection_name, query_text, limit=5, output_fields=None, search_params=None,
+                     query_vector=None):
         """
         Perform a dense vector search using the query text.
         
@@ -361,23 +935,38 @@ class MilvusClientASOT(metaclass=Singleton):
             collection_name (str): Name of the collection to search
             query_text (str): Text query to generate dense embedding
             limit (int, optional): Maximum number of results. Defaults to 10.
+            output_fields (list, optional): Fields to return. Defaults to OUTPUT_FIELDS.
+            search_params (dict, optional): Index search parameters, e.g. {"ef": 64} for HNSW.
+            query_vector (optional): Precomputed embed_query(query_text), to share one
+                embedding between searches of several collections.
         
         Returns:
             list: List of search results with job position data
         """
-        query_vector = self.embeddings(["query: " + query_text])[0]
-        search_params = {"metric_type": "IP", "params": {}}
-        results = self.client.search(
+        with search_metrics.track("dense_search") as observation:
+            return self._dense_search(observation, collection_name, query_text, limit, output_fields,
+                                      search_params, query_vector)
+
+    def _dense_search(self, observation, collection_name, query_text, limit, output_fields, search_params,
+                      query_vector):
+        """dense_search, recording into a search_metrics observation (shared with the Lite hybrid fallback)."""
+        self.ensure_loaded(collection_name)
+        if query_vector is None:
+            query_vector = observation.time_embedding(self.embed_query, query_text)
+        query_vector = self.encode_dense(collection_name, [query_vector])[0]
+        search_params = {"metric_type": "IP", "params": search_params or {}}
+        results = observation.time_rpc(
+            self.client.search,
             collection_name=collection_name,
             data=[query_vector],
             anns_field="dense",
             limit=limit,
-            output_fields=["episode_id", "text", "ranking", "artist", "collaborators", "featured_artists", "title", "remix_info", "popularity_score", "vote_count", "URL"],
+            output_fields=output_fields or OUTPUT_FIELDS,
             search_params=search_params
         )[0]
-        return results
+        return observation.results(results)
     
-    def sparse_search(self, collection_name, query_text, limit=5):
+    def sparse_search(self, collection_name, query_text, limit=5, output_fields=None):
         """
         Perform a sparse vector search using the query text with BM25.
         
@@ -385,22 +974,34 @@ class MilvusClientASOT(metaclass=Singleton):
             collection_name (str): Name of the collection to search
             query_text (str): Text query for sparse search
             limit (int, optional): Maximum number of results. Defaults to 10.
+            output_fields (list, optional): Fields to return. Defaults to OUTPUT_FIELDS.
         
         Returns:
             list: List of search results with job position data
+
+        Raises:
+            UnsupportedByLite: On Milvus Lite, which has no BM25 support.
         """
-        search_params = {"metric_type": "BM25", "params": {}}
-        results = self.client.search(
-            collection_name=collection_name,
-            data=[query_text],
-            anns_field="sparse",
-            limit=limit,
-            output_fields=["episode_id", "text", "ranking", "artist", "collaborators", "featured_artists", "title", "remix_info", "popularity_score", "vote_count", "URL"],
-            search_params=search_params
-        )[0]
-        return results
+        with search_metrics.track("sparse_search") as observation:
+            if self.is_lite:
+                raise UnsupportedByLite("Sparse (BM25) search is not supported by Milvus Lite. "
+                                        "Use dense search or connect to a Milvus server.")
+
+            self.ensure_loaded(collection_name)
+            search_params = {"metric_type": "BM25", "params": {}}
+            results = observation.time_rpc(
+                self.client.search,
+                collection_name=collection_name,
+                data=[query_text],
+                anns_field="sparse",
+                limit=limit,
+                output_fields=output_fields or OUTPUT_FIELDS,
+                search_params=search_params
+            )[0]
+            return observation.results(results)
 
-    def hybrid_search(self, collection_name, query_text, limit=5, ranker_type="weighted", **kwargs):
+    def hybrid_search(self, collection_name, query_text, limit=5, ranker_type="weighted", output_fields=None,
+                      search_params=None, query_vector=None, **kwargs):
         """
         Perform a hybrid search combining dense and sparse vector searches.
         More info: https://milvus.io/docs/multi-vector-search.md
@@ -410,51 +1011,343 @@ class MilvusClientASOT(metaclass=Singleton):
             query_text (str): Text query for generating dense embedding and sparse search
             ranker_type (str): Type of ranker to use ('weighted' or 'rrf')
             limit (int, optional): Maximum number of results. Defaults to 10.
+            output_fields (list, optional): Fields to return. Defaults to OUTPUT_FIELDS.
+            search_params (dict, optional): Dense index search parameters (see dense_search).
+            query_vector (optional): Precomputed embed_query(query_text) (see dense_search).
             **kwargs: Parameters for the specific ranker:
                 - If ranker_type is 'weighted': sparse_weight (default=0.3), dense_weight (default=0.7)
                 - If ranker_type is 'rrf': k (default=60)
         
         Returns:
-            list: List of search results with job position data
+            list: List of search results with job position data. On Milvus Lite, which
+                has no BM25 support, these are plain dense search results.
         """
-        sparse_search_param = {
-            "data": [query_text],
-            "anns_field": "sparse",
-            "param": {"metric_type": "BM25", "params": {}},
-            "limit": limit
-        }
-        sparse_req = AnnSearchRequest(**sparse_search_param)
-
-        query_dense_vector = self.embeddings(["query: " + query_text])[0]
-        dense_search_param = {
-            "data": [query_dense_vector],
-            "anns_field": "dense",
-            "param": {"metric_type": "IP", "params": {}},
-            "limit": limit
+        with search_metrics.track("hybrid_search", search_metrics.ranker_label(ranker_type)) as observation:
+            if self.is_lite:
+                self.logger.warning("Hybrid search is not supported by Milvus Lite, falling back to dense search.")
+                return self._dense_search(observation, collection_name, query_text, limit, output_fields,
+                                          search_params, query_vector)
+
+            self.ensure_loaded(collection_name)
+            sparse_search_param = {
+                "data": [query_text],
+                "anns_field": "sparse",
+                "param": {"metric_type": "BM25", "params": {}},
+                "limit": limit
+            }
+            sparse_req = AnnSearchRequest(**sparse_search_param)
+
+            if query_vector is None:
+                query_vector = observation.time_embedding(self.embed_query, query_text)
+            query_dense_vector = self.encode_dense(collection_name, [query_vector])[0]
+            dense_search_param = {
+                "data": [query_dense_vector],
+                "anns_field": "dense",
+                "param": {"metric_type": "IP", "params": search_params or {}},
+                "limit": limit
+            }
+            dense_req = AnnSearchRequest(**dense_search_param)
+
+            # Create appropriate ranker based on type
+            if ranker_type.lower() == "weighted":
+                sparse_weight = kwargs.get("sparse_weight", 0.3)
+                dense_weight = kwargs.get("dense_weight", 0.7)
+                ranker = WeightedRanker(sparse_weight, dense_weight)
+                self.logger.debug(f"Using WeightedRanker with weights {sparse_weight} and {dense_weight}")
+            elif ranker_type.lower() == "rrf":
+                k = kwargs.get("k", 60)
+                ranker = RRFRanker(k)
+                self.logger.debug(f"Using RRFRanker with k={k}")
+            else:
+                raise ValueError(f"Unknown ranker type: {ranker_type}")
+
+            results = observation.time_rpc(
+                self.client.hybrid_search,
+                collection_name=collection_name,
+                reqs=[sparse_req, dense_req],
+                ranker=ranker,
+                limit=limit,
+                output_fields=output_fields or OUTPUT_FIELDS
+            )[0]
+            return observation.results(results)
+
+    def create_tracks_schema(self, vector_type=None, dim=None):
+        """
+        Create the schema of a canonical tracks collection: one row per unique track.
+
+        The primary key is the deterministic track ID computed from the normalized
+        artist/title/remix (see canonical_tracks.track_id), so it is not auto-generated.
+
+        Args:
+            vector_type (str, optional): Storage type of the dense field (see create_schema).
+            dim (int, optional): Dimension of the dense field (see create_schema).
+
+        Returns:
+            CollectionSchema: A complete schema object for the tracks collection
+        """
+        schema = self.client.create_schema(auto_id=False, enable_dynamic_field=True)
+
+        schema.add_field(field_name="track_id", datatype=DataType.INT64, is_primary=True)
+        schema.add_field(field_name="track_key", datatype=DataType.VARCHAR, max_length=2048)
+        schema.add_field(field_name="artist", datatype=DataType.VARCHAR, max_length=512)
+        schema.add_field(field_name="collaborators", datatype=DataType.VARCHAR, max_length=512)
+        schema.add_field(field_name="featured_artists", datatype=DataType.VARCHAR, max_length=512)
+        schema.add_field(field_name="title", datatype=DataType.VARCHAR, max_length=512)
+        schema.add_field(field_name="remix_info", datatype=DataType.VARCHAR, max_length=512)
+        schema.add_field(field_name="text", datatype=DataType.VARCHAR, max_length=10000, enable_analyzer=True)
+
+        if not self.is_lite:
+            schema.add_field(field_name="sparse", datatype=DataType.SPARSE_FLOAT_VECTOR)
+        schema.add_field(field_name="dense", datatype=DENSE_DATA_TYPES[vector_type or default_vector_type()],
+                         dim=dim or self.embeddings.dim)
+
+        if not self.is_lite:
+            schema.add_function(Function(
+                name="track_text_bm25_emb",
+                input_field_names=["text"],
+                output_field_names=["sparse"],
+                function_type=FunctionType.BM25,
+            ))
+
+        return schema
+
+    def create_tracks_collection_if_not_exists(self, collection_name: str, vector_type: str = None, dim: int = None) -> bool:
+        """
+        Creates a canonical tracks collection if it doesn't already exist.
+
+        Args:
+            collection_name (str): Name of the tracks collection.
+            vector_type (str, optional): Storage type of the dense field (see create_schema).
+            dim (int, optional): Dimension of the dense field (see create_schema).
+
+        Returns:
+            bool: True if the collection was created, False if it already existed.
+        """
+        if self.client.has_collection(collection_name):
+            self.logger.info(f"Collection {collection_name} already exists. Skipping creation.")
+            return False
+
+        try:
+            self.create_collection(collection_name, self.create_tracks_schema(vector_type=vector_type, dim=dim),
+                                   self.create_indices(collection_name))
+            self.logger.info(f"Successfully created tracks collection: {collection_name}")
+            return True
+        except MilvusException as e:
+            self.logger.error(f"Failed to create tracks collection {collection_name}: {str(e)}")
+            raise
+
+    def existing_ids(self, collection_name: str, ids: list, id_field: str = "id", batch_size: int = 1000) -> set:
+        """
+        Return which of the given primary keys are already present in a collection.
+
+        Args:
+            collection_name (str): The name of the collection to query.
+            ids (list): Primary keys to look up.
+            id_field (str): Name of the primary key field.
+            batch_size (int): Number of keys per query.
+
+        Returns:
+            set: The subset of `ids` found in the collection.
+        """
+        found = set()
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            results = self.client.query(
+                collection_name=collection_name,
+                filter=f"{id_field} in {chunk}",
+                output_fields=[id_field],
+            )
+            found.update(item[id_field] for item in results)
+        return found
+
+    def insert_tracks(self, collection_name: str, tracks: list):
+        """
+        Embed and insert canonical tracks.
+
+        Args:
+            collection_name (str): Name of the tracks collection.
+            tracks (list): Dictionaries with 'track_id', 'track_key' and the
+                TRACK_TEXT_FIELDS, as built by canonical_tracks.
+
+        Returns:
+            The result of the insert operation, or None if there was nothing to insert.
+        """
+        if not tracks:
+            return None
+
+        prepared_data = []
+        for track in tracks:
+            data_point = {"track_id": track["track_id"], "track_key": track["track_key"]}
+            for field in TRACK_TEXT_FIELDS:
+                value = track.get(field)
+                data_point[field] = value if value is not None else STRING_DEFAULT
+            data_point["text"] = build_track_text(track)
+            prepared_data.append(data_point)
+
+        dense_vectors = self.embeddings([EMBEDDING_PREFIX + data_point["text"] for data_point in prepared_data])
+        for data_point, dense_vector in zip(prepared_data, dense_vectors):
+            data_point["dense"] = dense_vector
+
+        return self.insert_data(collection_name, prepared_data)
+
+    def export_collection(self, collection_name: str, snapshot_dir: str, shard_rows: int = None,
+                          batch_size: int = 1000, workers: int = 4) -> dict:
+        """
+        Export every row of a collection, vectors included, to a snapshot directory.
+
+        Rows are streamed with a query iterator into zstd-compressed Parquet shards,
+        and a manifest records the schema, indexes, dense field format, row counts
+        and shard checksums, so the collection can be restored without re-embedding.
+        Auto-generated primary keys and BM25 sparse vectors are not exported; the
+        imported collection regenerates them. Dynamic fields are exported as a
+        JSON column and restored on import.
+
+        Args:
+            collection_name (str): Name of the collection to export.
+            snapshot_dir (str): Directory to write; must not already hold a snapshot.
+            shard_rows (int, optional): Maximum rows per shard. Defaults to a size
+                giving `workers` import workers a few shards each (see shard_rows_for).
+            batch_size (int): Rows fetched per query iteration.
+            workers (int): Import parallelism the default shard size is chosen for.
+
+        Returns:
+            dict: The snapshot manifest.
+
+        Raises:
+            ValueError: If the collection does not exist, the directory already holds
+                a snapshot, or a dynamic field value cannot be serialized.
+        """
+        if not self.client.has_collection(collection_name):
+            raise ValueError(f"Collection {collection_name} does not exist")
+        if os.path.exists(os.path.join(snapshot_dir, MANIFEST_FILE)):
+            raise ValueError(f"{snapshot_dir} already contains a snapshot")
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+        start = time.perf_counter()
+        self.ensure_loaded(collection_name)
+        description = self.client.describe_collection(collection_name)
+        exported = copied_fields(description)
+        fields = [field_manifest(field) for field in description["fields"] if field["name"] in exported]
+        dynamic_field = bool(description.get("enable_dynamic_field"))
+        schema = shard_schema(fields, dynamic_field)
+        schema_fields = {field["name"] for field in description["fields"]}
+        if shard_rows is None:
+            row_count = self.client.query(collection_name, filter="", output_fields=["count(*)"])[0]["count(*)"]
+            shard_rows = shard_rows_for(row_count, workers)
+
+        shards, buffer = [], []
+        for rows in iter_collection(self, collection_name, exported + ["$meta"] if dynamic_field else exported,
+                                    batch_size):
+            buffer.extend(pack_dynamic_fields(rows, schema_fields) if dynamic_field else rows)
+            while len(buffer) >= shard_rows:
+                shards.append(write_shard(buffer[:shard_rows], schema, snapshot_dir, len(shards)))
+                buffer = buffer[shard_rows:]
+                self.logger.debug(f"Exported {sum(shard['rows'] for shard in shards)} rows of {collection_name}")
+        if buffer:
+            shards.append(write_shard(buffer, schema, snapshot_dir, len(shards)))
+
+        config = self.dense_config(collection_name)
+        if config["projection"] is not None:
+            shutil.copyfile(projection_path(collection_name), os.path.join(snapshot_dir, PROJECTION_FILE))
+
+        indexes = []
+        for index_name in self.client.list_indexes(collection_name):
+            index = self.client.describe_index(collection_name, index_name)
+            indexes.append({key: value for key, value in index.items()
+                            if key not in ("total_rows", "indexed_rows", "pending_index_rows", "state")})
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "collection": collection_name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "row_count": sum(shard["rows"] for shard in shards),
+            "fields": fields,
+            "functions": [function["name"] for function in description.get("functions", [])],
+            "indexes": indexes,
+            "dense": {"vector_type": config["vector_type"], "dim": config["dim"],
+                      "projection": PROJECTION_FILE if config["projection"] is not None else None},
+            "mmap_enabled": str(description.get("properties", {}).get("mmap.enabled", "false")).lower() == "true",
+            "dynamic_field": dynamic_field,
+            "shards": shards,
         }
-        dense_req = AnnSearchRequest(**dense_search_param)
-
-        # Create appropriate ranker based on type
-        if ranker_type.lower() == "weighted":
-            sparse_weight = kwargs.get("sparse_weight", 0.3)
-            dense_weight = kwargs.get("dense_weight", 0.7)
-            ranker = WeightedRanker(sparse_weight, dense_weight)
-            self.logger.debug(f"Using WeightedRanker with weights {sparse_weight} and {dense_weight}")
-        elif ranker_type.lower() == "rrf":
-            k = kwargs.get("k", 60)
-            ranker = RRFRanker(k)
-            self.logger.debug(f"Using RRFRanker with k={k}")
+        write_manifest(snapshot_dir, manifest)
+        self.logger.info(f"Exported {manifest['row_count']} rows of {collection_name} to {snapshot_dir} "
+                         f"({len(shards)} shards) in {time.perf_counter() - start:.1f} s")
+        return manifest
+
+    def import_collection(self, snapshot_dir: str, collection_name: str = None, workers: int = 4,
+                          batch_size: int = 1000) -> dict:
+        """
+        Restore a snapshot written by export_collection into a new collection.
+
+        Shard checksums and row counts are verified first. The collection is created
+        without indexes, shards are inserted by parallel workers, and the indexes are
+        built once all rows are in, which is faster than indexing while inserting.
+
+        Args:
+            snapshot_dir (str): Snapshot directory.
+            collection_name (str, optional): Target collection. Defaults to the exported name.
+            workers (int): Number of shards inserted in parallel.
+            batch_size (int): Rows per insert.
+
+        Returns:
+            dict: The 'collection' name and the number of 'rows' imported.
+
+        Raises:
+            ValueError: If the snapshot is corrupted, the collection exists, or the
+                imported row count does not match the manifest.
+        """
+        manifest = read_manifest(snapshot_dir)
+        verify_shards(snapshot_dir, manifest)
+        collection_name = collection_name or manifest["collection"]
+        if self.client.has_collection(collection_name):
+            raise ValueError(f"Collection {collection_name} already exists")
+
+        start = time.perf_counter()
+        dense = manifest["dense"]
+        if dense["projection"]:
+            os.makedirs(os.path.dirname(projection_path(collection_name)) or ".", exist_ok=True)
+            shutil.copyfile(os.path.join(snapshot_dir, dense["projection"]), projection_path(collection_name))
+
+        dense_index = next((index for index in manifest["indexes"] if index.get("field_name") == "dense"), {})
+        index_profile = next((profile for profile, index in DENSE_INDEX_PROFILES.items()
+                              if index["index_type"] == dense_index.get("index_type")), None)
+
+        if any(field["name"] == "track_id" for field in manifest["fields"]):
+            schema = self.create_tracks_schema(vector_type=dense["vector_type"], dim=dense["dim"])
         else:
-            raise ValueError(f"Unknown ranker type: {ranker_type}")
+            schema = self.create_schema(vector_type=dense["vector_type"], dim=dense["dim"])
+        self.create_collection(collection_name, schema, None, mmap=manifest["mmap_enabled"])
 
-        results = self.client.hybrid_search(
-            collection_name=collection_name,
-            reqs=[sparse_req, dense_req],
-            ranker=ranker,
-            limit=limit,
-            output_fields=["episode_id", "text", "ranking", "artist", "collaborators", "featured_artists", "title", "remix_info", "popularity_score", "vote_count", "URL"]
-        )[0]
-        return results
+        def import_shard(shard):
+            imported = 0
+            for rows in iter_shard_rows(os.path.join(snapshot_dir, shard["file"]), batch_size):
+                # Vectors are stored exactly as in the source collection (already projected)
+                vectors = cast_vectors([row["dense"] for row in rows], dense["vector_type"])
+                for row, vector in zip(rows, vectors):
+                    row["dense"] = vector
+                if manifest.get("dynamic_field"):
+                    unpack_dynamic_fields(rows)
+                self.client.insert(collection_name=collection_name, data=rows)
+                imported += len(rows)
+            self.logger.debug(f"Imported shard {shard['file']} ({imported} rows)")
+            return imported
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot_import") as executor:
+            inserted = sum(executor.map(import_shard, manifest["shards"]))
+
+        self.client.flush(collection_name)
+        self.client.create_index(collection_name, self.create_indices(collection_name, index_profile=index_profile))
+        self.load_collection(collection_name)
+
+        row_count = self.client.query(collection_name, filter="", output_fields=["count(*)"])[0]["count(*)"]
+        if row_count != manifest["row_count"] or inserted != manifest["row_count"]:
+            raise ValueError(f"Imported {row_count} rows into {collection_name}, expected {manifest['row_count']}")
+
+        self.logger.info(f"Imported {row_count} rows into {collection_name} from {snapshot_dir} "
+                         f"in {time.perf_counter() - start:.1f} s")
+        return {"collection": collection_name, "rows": row_count}
 
     def insert_episodes(self, collection_name: str, documents: list) -> dict | None:
         """
@@ -463,7 +1356,8 @@ class MilvusClientASOT(metaclass=Singleton):
 
         Args:
             collection_name (str): The name of the collection.
-            documents (list): A list of dictionaries representing the documents to insert. 
+            documents (Iterable): Dictionaries representing the documents to insert, e.g. the
+                              generator returned by read_and_merge_json_files.
                               Each dictionary must contain an 'episode_id' key.
 
         Returns:
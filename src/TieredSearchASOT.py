@@ -0,0 +1,371 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.Logger import Logger
+from src.MilvusClientASOT import MilvusClientASOT, sort_value
+from src.migrate_vectors import copied_fields
+from src.vector_compression import decode_vector
+from src.canonical_tracks import track_key
+from src.knn_graph import distinct_neighbours, SIMILAR_OVERFETCH
+from src.song_documents import OUTPUT_FIELDS, TRACK_TEXT_FIELDS
+from src import search_metrics
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable
+
+# Collections of a tiered collection "asot_songs" are "asot_songs_hot" and "asot_songs_cold"
+HOT_SUFFIX = "_hot"
+COLD_SUFFIX = "_cold"
+
+# IVF_SQ8 probes of the cold tier; the hot tier's HNSW ef is derived from the limit
+COLD_NPROBE = 16
+
+
+def episode_number(episode_id: str) -> int:
+    """Numeric value of an episode ID, -1 if it is not a number."""
+    try:
+        return int(episode_id)
+    except (TypeError, ValueError):
+        return -1
+
+
+def hit_key(hit) -> tuple:
+    """Identify a song across tiers, where primary keys differ."""
+    entity = hit["entity"]
+    if "episode_id" in entity and "ranking" in entity:
+        return entity["episode_id"], entity["ranking"], entity.get("title")
+    return (hit["id"],)
+
+
+class TieredSearchASOT:
+    """
+    Hot/cold tiering of a song collection.
+
+    The newest HOT_EPISODES episodes live in a small hot collection on an HNSW
+    index; the archive lives in a cold collection on a compact, memory-mapped
+    IVF_SQ8 index. Searches fan out to both tiers concurrently and merge the
+    hits by score, with the same method signatures as MilvusClientASOT so the
+    two are interchangeable. rebalance() moves episodes between tiers as they age.
+    """
+
+    def __init__(self, milvus_client: MilvusClientASOT = None, hot_episodes: int = None, search_workers: int = None):
+        """
+        Args:
+            milvus_client (MilvusClientASOT, optional): Client shared by both tiers.
+            hot_episodes (int, optional): Number of most recent episodes kept hot.
+                Defaults to HOT_EPISODES or 52 (one year of weekly episodes).
+            search_workers (int, optional): Tier searches run at a time, shared by all
+                concurrent searches. Defaults to TIERED_SEARCH_WORKERS, or two per
+                search API worker (SEARCH_API_WORKERS, default 8) so every request
+                can search both tiers at once.
+        """
+        self.logger = Logger('tiered_logger', os.getenv("LOG_MISC", "DEBUG")).logger
+        self.milvus_client = milvus_client or MilvusClientASOT()
+        # Empty values, as in env.example, count as unset
+        self.hot_episodes = hot_episodes or int(os.getenv("HOT_EPISODES") or 52)
+        self.search_workers = search_workers or int(os.getenv("TIERED_SEARCH_WORKERS")
+                                                    or 2 * int(os.getenv("SEARCH_API_WORKERS") or 8))
+        self._executor = ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix="tier_search")
+
+    @staticmethod
+    def hot_collection(collection_name: str) -> str:
+        return collection_name + HOT_SUFFIX
+
+    @staticmethod
+    def cold_collection(collection_name: str) -> str:
+        return collection_name + COLD_SUFFIX
+
+    def create_tiers(self, collection_name: str):
+        """Create the hot (HNSW, in memory) and cold (IVF_SQ8, mmap) collections if needed."""
+        self.milvus_client.create_collection_if_not_exists(self.hot_collection(collection_name),
+                                                           index_profile="hot", mmap=False)
+        self.milvus_client.create_collection_if_not_exists(self.cold_collection(collection_name),
+                                                           index_profile="cold", mmap=True)
+
+    def _tiers(self, collection_name: str) -> List[tuple]:
+        """Existing tiers with the dense search parameters of their index."""
+        tiers = []
+        hot, cold = self.hot_collection(collection_name), self.cold_collection(collection_name)
+        if self.milvus_client.has_collection(hot):
+            tiers.append((hot, "hot"))
+        if self.milvus_client.has_collection(cold):
+            tiers.append((cold, "cold"))
+        return tiers
+
+    @staticmethod
+    def _search_params(tier: str, limit: int) -> dict:
+        return {"ef": max(64, limit)} if tier == "hot" else {"nprobe": COLD_NPROBE}
+
+    def has_collection(self, collection_name: str) -> bool:
+        return len(self._tiers(collection_name)) > 0
+
+    def _fan_out(self, collection_name: str, limit: int, search) -> List[Dict[str, Any]]:
+        """
+        Run `search(tier_collection, tier)` on every tier concurrently and merge the hits.
+
+        Hits are merged by score, and a song found in both tiers (mid-migration)
+        is only returned once.
+        """
+        tiers = self._tiers(collection_name)
+        if not tiers:
+            raise ValueError(f"No tiers of collection {collection_name} exist")
+
+        futures = [self._executor.submit(search, tier_collection, tier) for tier_collection, tier in tiers]
+        merged = {}
+        for future in futures:
+            for hit in future.result():
+                key = hit_key(hit)
+                if key not in merged or hit["distance"] > merged[key]["distance"]:
+                    merged[key] = hit
+        return sorted(merged.values(), key=lambda hit: hit["distance"], reverse=True)[:limit]
+
+    def dense_search(self, collection_name, query_text, limit=5, output_fields=None):
+        """Dense search over both tiers; see MilvusClientASOT.dense_search."""
+        # The per-tier searches are recorded by the client; the query is only embedded here
+        with search_metrics.track("tiered_dense_search") as observation:
+            # Embed once in the calling thread, the tiers only differ in index parameters
+            query_vector = observation.time_embedding(self.milvus_client.embed_query, query_text)
+            return observation.results(self._fan_out(
+                collection_name, limit, lambda tier_collection, tier: self.milvus_client.dense_search(
+                    tier_collection, query_text, limit=limit, output_fields=output_fields,
+                    search_params=self._search_params(tier, limit), query_vector=query_vector)))
+
+    def sparse_search(self, collection_name, query_text, limit=5, output_fields=None):
+        """BM25 search over both tiers; see MilvusClientASOT.sparse_search."""
+        with search_metrics.track("tiered_sparse_search") as observation:
+            return observation.results(self._fan_out(
+                collection_name, limit, lambda tier_collection, tier: self.milvus_client.sparse_search(
+                    tier_collection, query_text, limit=limit, output_fields=output_fields)))
+
+    def hybrid_search(self, collection_name, query_text, limit=5, ranker_type="weighted", output_fields=None, **kwargs):
+        """
+        Hybrid search over both tiers; see MilvusClientASOT.hybrid_search.
+
+        Weighted scores are normalized by Milvus and compare directly across tiers;
+        RRF scores only depend on the rank within each tier, so RRF results interleave them.
+        """
+        with search_metrics.track("tiered_hybrid_search", search_metrics.ranker_label(ranker_type)) as observation:
+            query_vector = observation.time_embedding(self.milvus_client.embed_query, query_text)
+            return observation.results(self._fan_out(
+                collection_name, limit, lambda tier_collection, tier: self.milvus_client.hybrid_search(
+                    tier_collection, query_text, limit=limit, ranker_type=ranker_type, output_fields=output_fields,
+                    search_params=self._search_params(tier, limit), query_vector=query_vector, **kwargs)))
+
+    def scalar_search(self, collection_name, filter_expr, limit=5, output_fields=None, sort_by=None, descending=True):
+        """Scalar query over both tiers; see MilvusClientASOT.scalar_search."""
+        tiers = self._tiers(collection_name)
+        futures = [self._executor.submit(self.milvus_client.scalar_search, tier_collection, filter_expr,
+                                         limit=limit, output_fields=output_fields, sort_by=sort_by,
+                                         descending=descending)
+                   for tier_collection, _ in tiers]
+        hits = [hit for future in futures for hit in future.result()]
+        if sort_by:
+            hits.sort(key=lambda hit: sort_value(hit["entity"].get(sort_by)), reverse=descending)
+        return hits[:limit]
+
+    def similar_tracks(self, collection_name, primary_key, k=10, output_fields=None):
+        """
+        Similar tracks over both tiers; see MilvusClientASOT.similar_tracks.
+
+        The row is looked up in whichever tier holds it and its vector searched
+        in both. Neighbour graphs cover a single collection, so they are not used here.
+        """
+        source = None
+        for tier_collection, _ in self._tiers(collection_name):
+            source = self.milvus_client.get_dense_vector(tier_collection, primary_key, output_fields=TRACK_TEXT_FIELDS)
+            if source is not None:
+                break
+        if source is None:
+            return []
+
+        limit = k * SIMILAR_OVERFETCH + 1
+        output_fields = list(dict.fromkeys((output_fields or OUTPUT_FIELDS) + TRACK_TEXT_FIELDS))
+        hits = self._fan_out(collection_name, limit, lambda tier_collection, tier: self.milvus_client.search_by_vectors(
+            tier_collection, [source["dense"]], limit=limit, output_fields=output_fields,
+            search_params=self._search_params(tier, limit))[0])
+        return distinct_neighbours(primary_key, track_key(source), hits, k)
+
+    def list_artists(self, collection_name: str) -> list[str]:
+        """Sorted artist names present in any tier."""
+        artists = set()
+        for tier_collection, _ in self._tiers(collection_name):
+            artists.update(self.milvus_client.list_artists(tier_collection))
+        return sorted(artists)
+
+    def list_episodes(self, collection_name: str) -> list[str]:
+        """Sorted episode IDs present in any tier."""
+        episodes = set()
+        for tier_collection, _ in self._tiers(collection_name):
+            episodes.update(self.milvus_client.list_episodes(tier_collection))
+        return sorted(episodes)
+
+    def get_collection_stats(self, collection_name: str) -> dict:
+        """
+        Statistics of both tiers.
+
+        Returns:
+            dict: Total 'row_count' plus the full statistics of each tier under 'hot' and 'cold'.
+        """
+        result = {"row_count": 0}
+        for tier_collection, tier in self._tiers(collection_name):
+            stats = self.milvus_client.get_collection_stats(tier_collection)
+            result[tier] = stats
+            result["row_count"] += stats["row_count"]
+        return result
+
+    def insert_episodes(self, collection_name: str, documents: Iterable[Dict[str, Any]]):
+        """
+        Insert the documents of episodes not present in any tier into the hot tier.
+
+        Older episodes are moved to the cold tier by the next rebalance().
+        """
+        existing_episode_ids = set(self.list_episodes(collection_name))
+        new_documents = (doc for doc in documents if doc.get("episode_id") not in existing_episode_ids)
+        return self.milvus_client.insert_episodes(self.hot_collection(collection_name), new_documents)
+
+    def hot_cutoff(self, episodes: Iterable[str]) -> int:
+        """Lowest episode number that belongs in the hot tier."""
+        newest = max((episode_number(episode_id) for episode_id in episodes), default=-1)
+        return newest - self.hot_episodes + 1
+
+    def move_episodes(self, source: str, target: str, episode_ids: List[str], batch_size: int = 1000) -> int:
+        """
+        Move all songs of some episodes from one collection to another.
+
+        The target is cleared of those episodes first, so an interrupted move
+        can simply be repeated. Rows are streamed from the source and inserted
+        batch by batch, and only deleted from the source once all are copied.
+
+        Returns:
+            int: Number of songs moved.
+        """
+        if not episode_ids:
+            return 0
+        episode_filter = f"episode_id in {list(episode_ids)}"
+        vector_type = self.milvus_client.dense_config(source)["vector_type"]
+        fields = copied_fields(self.milvus_client.client.describe_collection(source))
+
+        self.milvus_client.client.delete(target, filter=episode_filter)
+        moved, batch = 0, []
+        for row in self.milvus_client.iter_rows(source, fields, filter_expr=episode_filter, batch_size=batch_size):
+            row = dict(row)
+            row["dense"] = decode_vector(row["dense"], vector_type)
+            batch.append(row)
+            if len(batch) == batch_size:
+                self.milvus_client.insert_data(target, batch)
+                moved, batch = moved + len(batch), []
+        if batch:
+            self.milvus_client.insert_data(target, batch)
+            moved += len(batch)
+        self.milvus_client.client.delete(source, filter=episode_filter)
+        return moved
+
+    def rebalance(self, collection_name: str, batch_episodes: int = 20) -> dict:
+        """
+        Move episodes that aged out of the hot window to the cold tier, and
+        episodes inside the window (e.g. after raising HOT_EPISODES) back to the hot tier.
+
+        Args:
+            collection_name (str): Base name of the tiered collection.
+            batch_episodes (int): Episodes moved per query/insert/delete round.
+
+        Returns:
+            dict: Number of episodes moved 'to_cold' and 'to_hot'.
+        """
+        self.create_tiers(collection_name)
+        hot, cold = self.hot_collection(collection_name), self.cold_collection(collection_name)
+        hot_episodes = self.milvus_client.list_episodes(hot)
+        cold_episodes = self.milvus_client.list_episodes(cold)
+        cutoff = self.hot_cutoff(hot_episodes + cold_episodes)
+
+        to_cold = [episode_id for episode_id in hot_episodes if episode_number(episode_id) < cutoff]
+        to_hot = [episode_id for episode_id in cold_episodes if episode_number(episode_id) >= cutoff]
+
+        for source, target, episode_ids in ((hot, cold, to_cold), (cold, hot, to_hot)):
+            for start in range(0, len(episode_ids), batch_episodes):
+                batch = episode_ids[start:start + batch_episodes]
+                moved = self.move_episodes(source, target, batch)
+                self.logger.info(f"Moved {len(batch)} episodes ({moved} songs) from {source} to {target}")
+
+        self.logger.info(f"Rebalanced {collection_name}: hot tier starts at episode {cutoff}, "
+                         f"{len(to_cold)} episodes moved to cold, {len(to_hot)} to hot")
+        return {"to_cold": len(to_cold), "to_hot": len(to_hot)}
+
+    def import_collection(self, source: str, collection_name: str, batch_size: int = 1000) -> int:
+        """
+        Split an existing single collection into the two tiers, leaving the source untouched.
+
+        Rows are streamed from the source with a query iterator and inserted into
+        their tier batch by batch.
+
+        Returns:
+            int: Number of songs copied.
+
+        Raises:
+            ValueError: If fewer or more rows were copied than the source holds.
+        """
+        self.create_tiers(collection_name)
+        cutoff = self.hot_cutoff(self.milvus_client.list_episodes(source))
+        fields = copied_fields(self.milvus_client.client.describe_collection(source))
+        vector_type = self.milvus_client.dense_config(source)["vector_type"]
+        hot, cold = self.hot_collection(collection_name), self.cold_collection(collection_name)
+
+        copied, tiers = 0, {hot: [], cold: []}
+        for row in self.milvus_client.iter_rows(source, fields, batch_size=batch_size):
+            row = dict(row)
+            row["dense"] = decode_vector(row["dense"], vector_type)
+            tier_collection = hot if episode_number(row["episode_id"]) >= cutoff else cold
+            tiers[tier_collection].append(row)
+            if len(tiers[tier_collection]) == batch_size:
+                self.milvus_client.insert_data(tier_collection, tiers[tier_collection])
+                copied += batch_size
+                tiers[tier_collection] = []
+        for tier_collection, tier_rows in tiers.items():
+            if tier_rows:
+                self.milvus_client.insert_data(tier_collection, tier_rows)
+                copied += len(tier_rows)
+
+        source_rows = self.milvus_client.client.query(source, filter="", output_fields=["count(*)"])[0]["count(*)"]
+        if copied != source_rows:
+            raise ValueError(f"Copied {copied} songs from {source}, which holds {source_rows}")
+        self.logger.info(f"Imported {copied} songs from {source} into the tiers of {collection_name}")
+        return copied
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Manage the hot/cold tiers of a song collection.")
+    parser.add_argument("command", choices=["setup", "rebalance", "stats"],
+                        help="setup: create the tiers (optionally from --from); rebalance: move aged episodes "
+                             "between tiers; stats: show per-tier statistics")
+    parser.add_argument("--collection", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--from", dest="source", default=None, help="Existing single collection to split into tiers")
+    parser.add_argument("--hot-episodes", type=int, default=None, help="Recent episodes kept hot (default: HOT_EPISODES)")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Keep running and rebalance every INTERVAL seconds")
+    args = parser.parse_args()
+
+    tiers = TieredSearchASOT(hot_episodes=args.hot_episodes)
+
+    if args.command == "setup":
+        tiers.create_tiers(args.collection)
+        if args.source:
+            tiers.import_collection(args.source, args.collection)
+    elif args.command == "rebalance":
+        while True:
+            print(tiers.rebalance(args.collection))
+            if args.interval is None:
+                break
+            time.sleep(args.interval)
+
+    stats = tiers.get_collection_stats(args.collection)
+    print(f"{args.collection}: {stats['row_count']} songs")
+    for tier in ("hot", "cold"):
+        if tier in stats:
+            print(f"  {tier}: {stats[tier]['row_count']} songs, {stats[tier]['load_state']}, "
+                  f"mmap={stats[tier]['mmap_enabled']}, memory={stats[tier]['memory_bytes']}")
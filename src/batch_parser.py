@@ -0,0 +1,159 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.http_client import request_with_retry, get_session, DEFAULT_TIMEOUT
+from src.song_parser import (ANTHROPIC_API_URL, build_parse_request, extract_songs_from_response,
+                             get_claude_headers)
+from src.ingestion_profile import ingestion_profile
+
+import json
+import os
+import time
+from typing import List, Dict, Any, Iterator, Tuple
+
+# The Message Batches API accepts up to 100,000 requests per batch; keep batches
+# smaller so a single failed submission does not hold up a whole backfill.
+MAX_BATCH_SIZE = int(os.getenv("CLAUDE_BATCH_SIZE", "1000"))
+
+
+def _custom_id(episode: str) -> str:
+    return f"episode-{episode}"
+
+
+def submit_parse_batch(tracklists: Dict[str, str]) -> str:
+    """
+    Submit one Message Batches job parsing several episode tracklists.
+
+    Args:
+        tracklists: Mapping of episode number to raw tracklist text.
+
+    Returns:
+        The batch ID assigned by the API.
+    """
+    requests_payload = [
+        {"custom_id": _custom_id(episode), "params": build_parse_request(raw_text)}
+        for episode, raw_text in tracklists.items()
+    ]
+    response = request_with_retry(
+        "POST",
+        f"{ANTHROPIC_API_URL}/v1/messages/batches",
+        headers=get_claude_headers(),
+        json={"requests": requests_payload}
+    )
+    batch = response.json()
+    print(f"Submitted batch {batch['id']} with {len(requests_payload)} episodes")
+    return batch["id"]
+
+
+def wait_for_batch(batch_id: str, poll_interval: float = 30.0, timeout: float = 24 * 3600) -> Dict[str, Any]:
+    """
+    Poll a batch until it has finished processing.
+
+    Args:
+        batch_id: The batch ID returned by submit_parse_batch.
+        poll_interval: Seconds between status checks.
+        timeout: Maximum seconds to wait before giving up.
+
+    Returns:
+        The final batch object, including its results_url.
+
+    Raises:
+        TimeoutError: If the batch is still processing after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        response = request_with_retry(
+            "GET",
+            f"{ANTHROPIC_API_URL}/v1/messages/batches/{batch_id}",
+            headers=get_claude_headers()
+        )
+        batch = response.json()
+        if batch.get("processing_status") == "ended":
+            print(f"Batch {batch_id} ended: {batch.get('request_counts')}")
+            return batch
+
+        if time.monotonic() + poll_interval > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.get('processing_status')} after {timeout} seconds")
+        print(f"Batch {batch_id} is {batch.get('processing_status')}, checking again in {poll_interval} seconds...")
+        time.sleep(poll_interval)
+
+
+def iter_batch_results(batch: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the JSONL results of a finished batch.
+
+    Args:
+        batch: A batch object whose processing_status is "ended".
+
+    Yields:
+        One result entry per request, with 'custom_id' and 'result' keys.
+    """
+    results_url = batch.get("results_url")
+    if not results_url:
+        raise ValueError(f"Batch {batch.get('id')} has no results_url")
+
+    response = get_session().get(results_url, headers=get_claude_headers(), stream=True, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    with response:
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+
+def parse_songs_with_claude_batch(items: List[Tuple[str, str, str]], poll_interval: float = 30.0,
+                                  timeout: float = 24 * 3600) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """
+    Parse many ASOT song lists through the Message Batches API.
+
+    Tracklists are cleaned, submitted in batches of at most MAX_BATCH_SIZE and
+    polled to completion. Each successful result goes through the same JSON
+    extraction as parse_songs_with_claude, so the output matches the
+    synchronous path.
+
+    Args:
+        items: List of (raw_text, episode, url) tuples.
+        poll_interval: Seconds between batch status checks.
+        timeout: Maximum seconds to wait for each batch.
+
+    Returns:
+        Tuple containing:
+        - Mapping of episode to its parsed song list
+        - Mapping of episode to an error message for requests that failed
+    """
+    urls = {episode: url for _, episode, url in items}
+    episodes_by_id = {_custom_id(episode): episode for episode in urls}
+    parsed: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+
+    batch_bytes = sum(len(raw_text.encode("utf-8")) for raw_text, _, _ in items)
+    with ingestion_profile.span("batch_parse", bytes=batch_bytes):
+        for start in range(0, len(items), MAX_BATCH_SIZE):
+            chunk = items[start:start + MAX_BATCH_SIZE]
+            batch_id = submit_parse_batch({episode: raw_text for raw_text, episode, _ in chunk})
+            batch = wait_for_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+
+            for entry in iter_batch_results(batch):
+                episode = episodes_by_id.get(entry.get("custom_id"))
+                if episode is None:
+                    continue
+                result = entry.get("result", {})
+                if result.get("type") != "succeeded":
+                    errors[episode] = f"Batch request {result.get('type')}: {result.get('error')}"
+                    continue
+                try:
+                    usage = result["message"].get("usage", {})
+                    ingestion_profile.count("batch_parse", input_tokens=usage.get("input_tokens", 0),
+                                            output_tokens=usage.get("output_tokens", 0))
+                    content = result["message"]["content"][0]["text"]
+                    parsed[episode] = extract_songs_from_response(content, episode, urls[episode])
+                    ingestion_profile.count("batch_parse", rows=len(parsed[episode]))
+                except Exception as e:
+                    errors[episode] = str(e)
+
+    # Requests missing from the results file are failures too
+    for episode in urls:
+        if episode not in parsed and episode not in errors:
+            errors[episode] = "No result returned for batch request"
+
+    return parsed, errors
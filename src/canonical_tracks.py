@@ -0,0 +1,287 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.song_documents import TRACK_OUTPUT_FIELDS, STRING_DEFAULT, INT_DEFAULT
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import List, Dict, Any, Iterable, Tuple
+
+# Separators between artist names, e.g. "A & B", "A feat. B", "A vs B", "A x B"
+_ARTIST_SEPARATORS = re.compile(r"\s*(?:,|&|\+|/|\band\b|\bfeat\.?|\bft\.?|\bfeaturing\b|\bvs\.?|\bversus\b|\bx\b|\bpres\.?|\bpresents\b|\bwith\b)\s*",
+                                re.IGNORECASE)
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# Remix descriptions that mean "no remix"
+_ORIGINAL_MIX = {"", "original", "original mix", "original version", "extended mix", "radio edit", "extended"}
+
+
+def normalize_text(value: Any) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    if value is None or value == STRING_DEFAULT:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def split_artists(value: Any) -> List[str]:
+    """Individual artist names of a credit such as "Talla 2XLC vs Sean Tyas", as written."""
+    if value is None or value == STRING_DEFAULT:
+        return []
+    return [name.strip() for name in _ARTIST_SEPARATORS.split(str(value)) if name.strip()]
+
+
+def normalize_artists(doc: Dict[str, Any]) -> List[str]:
+    """
+    Normalized, de-duplicated and sorted names of everyone credited on a track.
+
+    The parser is not consistent about whether a collaborator ends up in
+    'artist', 'collaborators' or 'featured_artists', so all three are pooled.
+    """
+    names = set()
+    for field in ("artist", "collaborators", "featured_artists"):
+        for name in split_artists(doc.get(field)):
+            normalized = normalize_text(name)
+            if normalized:
+                names.add(normalized)
+    return sorted(names)
+
+
+def normalize_remix(value: Any) -> str:
+    """Normalized remix description, empty for original/extended mixes."""
+    remix = normalize_text(value)
+    return "" if remix in _ORIGINAL_MIX else remix
+
+
+def track_key(doc: Dict[str, Any]) -> str:
+    """
+    Canonical key identifying a track across episodes.
+
+    Args:
+        doc (dict): Song record with Milvus field names.
+
+    Returns:
+        str: "artists|title|remix" in normalized form.
+    """
+    return f"{' & '.join(normalize_artists(doc))}|{normalize_text(doc.get('title'))}|{normalize_remix(doc.get('remix_info'))}"
+
+
+def identifies_track(doc: Dict[str, Any]) -> bool:
+    """
+    Whether a song record names its track, i.e. has an artist or a title.
+
+    Records with neither would all share one track key, so they are left out
+    of anything that groups appearances by track.
+    """
+    return bool(normalize_artists(doc) or normalize_text(doc.get("title")))
+
+
+def track_id(key: str) -> int:
+    """Deterministic positive 63-bit ID of a track key, used as the Milvus primary key."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big") & 0x7FFFFFFFFFFFFFFF
+
+
+def group_tracks(documents: Iterable[Dict[str, Any]]) -> Tuple[Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split song records into unique tracks and their appearances.
+
+    Args:
+        documents (Iterable): Song records with Milvus field names.
+
+    Returns:
+        Tuple containing:
+        - Mapping of track ID to the track fields (first appearance wins)
+        - List of appearance rows (track_id, episode_id, ranking, popularity_score, vote_count, URL)
+
+        Records without an artist or a title are skipped.
+    """
+    tracks, appearances = {}, []
+    for doc in documents:
+        if not identifies_track(doc):
+            continue
+        key = track_key(doc)
+        tid = track_id(key)
+        if tid not in tracks:
+            tracks[tid] = {"track_id": tid, "track_key": key, **{field: doc.get(field) for field in
+                           ("artist", "collaborators", "featured_artists", "title", "remix_info")}}
+        appearances.append({
+            "track_id": tid,
+            "episode_id": doc.get("episode_id"),
+            "ranking": doc.get("ranking") if doc.get("ranking") is not None else INT_DEFAULT,
+            "popularity_score": doc.get("popularity_score") if doc.get("popularity_score") is not None else INT_DEFAULT,
+            "vote_count": doc.get("vote_count") if doc.get("vote_count") is not None else INT_DEFAULT,
+            "URL": doc.get("URL") if doc.get("URL") is not None else STRING_DEFAULT,
+        })
+    return tracks, appearances
+
+
+class TrackAppearances:
+    """
+    Lightweight SQLite table of where each canonical track charted.
+
+    One row per (track, episode, ranking), indexed by track and by episode, so
+    search hits on the tracks collection can be expanded without touching Milvus.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv("TRACK_APPEARANCES_DB", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "track_appearances.db"))
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS appearances (
+                    track_id INTEGER NOT NULL,
+                    episode_id TEXT NOT NULL,
+                    ranking INTEGER NOT NULL,
+                    popularity_score INTEGER NOT NULL,
+                    vote_count INTEGER NOT NULL,
+                    URL TEXT NOT NULL,
+                    PRIMARY KEY (track_id, episode_id, ranking)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS appearances_episode ON appearances (episode_id)")
+
+    def add(self, appearances: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update appearance rows.
+
+        Returns:
+            int: Number of rows written.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO appearances (track_id, episode_id, ranking, popularity_score, vote_count, URL) "
+                "VALUES (:track_id, :episode_id, :ranking, :popularity_score, :vote_count, :URL)",
+                appearances
+            )
+        return len(appearances)
+
+    def for_tracks(self, track_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Appearances of the given tracks, ordered by episode.
+
+        Returns:
+            dict: Mapping of track ID to its appearance rows.
+        """
+        if not track_ids:
+            return {}
+        placeholders = ",".join("?" for _ in track_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM appearances WHERE track_id IN ({placeholders}) ORDER BY CAST(episode_id AS INTEGER), ranking",
+                list(track_ids)
+            ).fetchall()
+        result = {tid: [] for tid in track_ids}
+        for row in rows:
+            result[row["track_id"]].append(dict(row))
+        return result
+
+    def count(self) -> Dict[str, int]:
+        """Number of appearances and of distinct tracks."""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) AS appearances, COUNT(DISTINCT track_id) AS tracks FROM appearances").fetchone()
+        return dict(row)
+
+
+def ingest_tracks(milvus_client, collection_name: str, documents: Iterable[Dict[str, Any]],
+                  appearances_store: TrackAppearances) -> Dict[str, int]:
+    """
+    Add songs to the canonical tracks layer, embedding each unique track only once.
+
+    Tracks already present in the collection are not re-embedded; only their new
+    appearances are recorded.
+
+    Args:
+        milvus_client: MilvusClientASOT instance.
+        collection_name (str): Name of the tracks collection.
+        documents (Iterable): Song records with Milvus field names.
+        appearances_store (TrackAppearances): Where appearances are recorded.
+
+    Returns:
+        dict: Number of 'new_tracks', 'known_tracks' and 'appearances' processed.
+    """
+    milvus_client.create_tracks_collection_if_not_exists(collection_name)
+    tracks, appearances = group_tracks(documents)
+
+    known = milvus_client.existing_ids(collection_name, list(tracks), id_field="track_id")
+    new_tracks = [track for tid, track in tracks.items() if tid not in known]
+    milvus_client.insert_tracks(collection_name, new_tracks)
+    appearances_store.add(appearances)
+
+    print(f"Tracks layer: {len(new_tracks)} new tracks embedded, {len(known)} already known, {len(appearances)} appearances")
+    return {"new_tracks": len(new_tracks), "known_tracks": len(known), "appearances": len(appearances)}
+
+
+def search_tracks(milvus_client, collection_name: str, query_text: str, appearances_store: TrackAppearances,
+                  limit: int = 5, search_type: str = "hybrid", **kwargs) -> List[Dict[str, Any]]:
+    """
+    Search the canonical tracks collection, then expand each hit with its appearances.
+
+    Args:
+        milvus_client: MilvusClientASOT instance.
+        collection_name (str): Name of the tracks collection.
+        query_text (str): Text query.
+        appearances_store (TrackAppearances): Where appearances are recorded.
+        limit (int): Maximum number of tracks.
+        search_type (str): 'sparse', 'dense' or 'hybrid'.
+        **kwargs: Ranker parameters forwarded to hybrid_search (ranker_type, weights, k).
+
+    Returns:
+        list: Hits with 'id', 'distance' and 'entity' keys; each entity carries an
+            'appearances' list of the episodes the track charted in.
+    """
+    if search_type == "sparse":
+        results = milvus_client.sparse_search(collection_name, query_text, limit=limit, output_fields=TRACK_OUTPUT_FIELDS)
+    elif search_type == "dense":
+        results = milvus_client.dense_search(collection_name, query_text, limit=limit, output_fields=TRACK_OUTPUT_FIELDS)
+    else:
+        results = milvus_client.hybrid_search(collection_name, query_text, limit=limit, output_fields=TRACK_OUTPUT_FIELDS, **kwargs)
+
+    return with_appearances(results, appearances_store)
+
+
+def similar_canonical_tracks(milvus_client, collection_name: str, track_id: int, appearances_store: TrackAppearances,
+                             k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Tracks most similar to a canonical track (see MilvusClientASOT.similar_tracks), expanded with their appearances.
+
+    Returns:
+        list: Hits shaped like search_tracks results.
+    """
+    results = milvus_client.similar_tracks(collection_name, track_id, k=k, output_fields=TRACK_OUTPUT_FIELDS)
+    return with_appearances(results, appearances_store)
+
+
+def with_appearances(results, appearances_store: TrackAppearances) -> List[Dict[str, Any]]:
+    """Copy track hits into dictionaries whose entity carries an 'appearances' list."""
+    hits = [{"id": hit["id"], "distance": hit["distance"], "entity": dict(hit["entity"])} for hit in results]
+    appearances = appearances_store.for_tracks([hit["id"] for hit in hits])
+    for hit in hits:
+        hit["entity"]["appearances"] = appearances.get(hit["id"], [])
+    return hits
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    from src.MilvusClientASOT import MilvusClientASOT
+    from src.episode_store import load_corpus_records
+
+    parser = argparse.ArgumentParser(description="Build the canonical tracks collection from the episode corpus.")
+    parser.add_argument("--collection", default=os.getenv("TRACKS_COLLECTION") or "asot_tracks")
+    args = parser.parse_args()
+
+    records = load_corpus_records()
+    counts = ingest_tracks(MilvusClientASOT(), args.collection, records, TrackAppearances())
+    print(f"{len(records)} songs -> {counts['new_tracks'] + counts['known_tracks']} unique tracks")
@@ -0,0 +1,299 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.canonical_tracks import normalize_text, identifies_track, track_key, track_id
+from src.query_router import episode_year
+from src.song_documents import OUTPUT_FIELDS, STRING_DEFAULT, INT_DEFAULT
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional
+
+# Columns the top_artists and top_tracks views can be ranked by
+ARTIST_ORDERS = ["songs", "episodes", "total_votes"]
+TRACK_ORDERS = ["appearances", "total_votes"]
+
+# Aggregates merged into existing rows: counts add up, bests and ranges widen
+_MERGE = """
+    songs = songs + excluded.songs,
+    episodes = episodes + excluded.episodes,
+    voted_songs = voted_songs + excluded.voted_songs,
+    total_votes = total_votes + excluded.total_votes,
+    best_ranking = COALESCE(MIN(best_ranking, excluded.best_ranking), best_ranking, excluded.best_ranking),
+    first_episode = COALESCE(MIN(first_episode, excluded.first_episode), first_episode, excluded.first_episode),
+    last_episode = COALESCE(MAX(last_episode, excluded.last_episode), last_episode, excluded.last_episode)
+"""
+
+
+def episode_number(episode_id: str) -> Optional[int]:
+    try:
+        return int(episode_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _known(value) -> Optional[int]:
+    """Scalar value, or None for the INT_DEFAULT placeholder."""
+    return None if value is None or value == INT_DEFAULT else int(value)
+
+
+def _aggregate(episode_id: str, songs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Counts of a group of songs of one episode, in the shape of an aggregate row."""
+    number = episode_number(episode_id)
+    votes = [_known(song.get("vote_count")) for song in songs]
+    rankings = [ranking for ranking in (_known(song.get("ranking")) for song in songs) if ranking is not None]
+    return {
+        "songs": len(songs),
+        "episodes": 1,
+        "voted_songs": sum(1 for vote in votes if vote is not None),
+        "total_votes": sum(vote for vote in votes if vote is not None),
+        "best_ranking": min(rankings) if rankings else None,
+        "first_episode": number,
+        "last_episode": number,
+    }
+
+
+class ChartAnalytics:
+    """
+    Precomputed chart-history aggregates in a small SQLite database.
+
+    Per-episode, per-artist and per-track counts are updated as episodes are
+    inserted: only the new episodes' songs are read, and their counts are
+    merged into the existing rows with upserts. An episode is only ever
+    counted once, so feeding the same episode twice is harmless.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv("ANALYTICS_DB", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "chart_analytics.db"))
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        aggregate_columns = """
+            songs INTEGER NOT NULL,
+            episodes INTEGER NOT NULL,
+            voted_songs INTEGER NOT NULL,
+            total_votes INTEGER NOT NULL,
+            best_ranking INTEGER,
+            first_episode INTEGER,
+            last_episode INTEGER
+        """
+        with self._conn:
+            # The ingestion process writes while the search app reads
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS episodes (
+                    episode_id TEXT PRIMARY KEY,
+                    episode_number INTEGER,
+                    year INTEGER,
+                    songs INTEGER NOT NULL,
+                    voted_songs INTEGER NOT NULL,
+                    total_votes INTEGER NOT NULL,
+                    max_votes INTEGER,
+                    avg_popularity REAL,
+                    added_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS artists (
+                    artist_key TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    {aggregate_columns}
+                )
+            """)
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS tracks (
+                    track_id INTEGER PRIMARY KEY,
+                    artist TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    remix_info TEXT NOT NULL,
+                    {aggregate_columns}
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS episodes_year ON episodes (year)")
+
+    def add_episodes(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Fold the songs of new episodes into the aggregates.
+
+        Args:
+            records (Iterable): Song records with Milvus field names. Records of
+                episodes already counted, and records without an episode ID, are skipped.
+
+        Returns:
+            int: Number of episodes added.
+        """
+        by_episode = defaultdict(list)
+        for record in records:
+            if record.get("episode_id") is not None:
+                by_episode[str(record["episode_id"])].append(record)
+        if not by_episode:
+            return 0
+
+        with self._lock, self._conn:
+            placeholders = ",".join("?" for _ in by_episode)
+            known = {row["episode_id"] for row in self._conn.execute(
+                f"SELECT episode_id FROM episodes WHERE episode_id IN ({placeholders})", list(by_episode))}
+
+            now = time.time()
+            for episode_id, songs in by_episode.items():
+                if episode_id in known:
+                    continue
+                self._add_episode(episode_id, songs, now)
+        return len(by_episode) - len(known)
+
+    def _add_episode(self, episode_id: str, songs: List[Dict[str, Any]], now: float):
+        number = episode_number(episode_id)
+        episode = _aggregate(episode_id, songs)
+        votes = [vote for vote in (_known(song.get("vote_count")) for song in songs) if vote is not None]
+        popularity = [score for score in (_known(song.get("popularity_score")) for song in songs) if score is not None]
+        self._conn.execute(
+            "INSERT INTO episodes (episode_id, episode_number, year, songs, voted_songs, total_votes, max_votes, "
+            "avg_popularity, added_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (episode_id, number, episode_year(number) if number is not None else None, episode["songs"],
+             episode["voted_songs"], episode["total_votes"], max(votes) if votes else None,
+             sum(popularity) / len(popularity) if popularity else None, now))
+
+        # Every credit on a song counts it once, whichever field it is in. Credits are
+        # kept as written, since '&' also joins acts such as "Above & Beyond"
+        artist_songs, artist_names = defaultdict(list), {}
+        for song in songs:
+            credited = {}
+            for field in ("artist", "collaborators", "featured_artists"):
+                credit = song.get(field)
+                if credit is not None and credit != STRING_DEFAULT:
+                    credited.setdefault(normalize_text(credit), str(credit).strip())
+            for artist_key, name in credited.items():
+                if artist_key:
+                    artist_songs[artist_key].append(song)
+                    artist_names.setdefault(artist_key, name)
+        self._conn.executemany(
+            f"INSERT INTO artists (artist_key, name, songs, episodes, voted_songs, total_votes, best_ranking, "
+            f"first_episode, last_episode) VALUES (:artist_key, :name, :songs, :episodes, :voted_songs, "
+            f":total_votes, :best_ranking, :first_episode, :last_episode) "
+            f"ON CONFLICT (artist_key) DO UPDATE SET {_MERGE}",
+            [{"artist_key": artist_key, "name": artist_names[artist_key], **_aggregate(episode_id, artist_songs_)}
+             for artist_key, artist_songs_ in artist_songs.items()])
+
+        track_songs = defaultdict(list)
+        for song in songs:
+            if identifies_track(song):
+                track_songs[track_id(track_key(song))].append(song)
+        self._conn.executemany(
+            f"INSERT INTO tracks (track_id, artist, title, remix_info, songs, episodes, voted_songs, total_votes, "
+            f"best_ranking, first_episode, last_episode) VALUES (:track_id, :artist, :title, :remix_info, :songs, "
+            f":episodes, :voted_songs, :total_votes, :best_ranking, :first_episode, :last_episode) "
+            f"ON CONFLICT (track_id) DO UPDATE SET {_MERGE}",
+            [{"track_id": tid, "artist": track_songs_[0].get("artist") or STRING_DEFAULT,
+              "title": track_songs_[0].get("title") or STRING_DEFAULT,
+              "remix_info": track_songs_[0].get("remix_info") or STRING_DEFAULT, **_aggregate(episode_id, track_songs_)}
+             for tid, track_songs_ in track_songs.items()])
+
+    def top_artists(self, limit: int = 20, order_by: str = "songs") -> List[Dict[str, Any]]:
+        """
+        Most-charted artists.
+
+        Args:
+            limit (int): Number of artists.
+            order_by (str): One of ARTIST_ORDERS.
+        """
+        if order_by not in ARTIST_ORDERS:
+            raise ValueError(f"Cannot order artists by {order_by}; use one of {ARTIST_ORDERS}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, songs, episodes, voted_songs, total_votes, best_ranking, first_episode, last_episode "
+                f"FROM artists ORDER BY {order_by} DESC, songs DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def top_tracks(self, limit: int = 20, order_by: str = "appearances") -> List[Dict[str, Any]]:
+        """
+        Tracks with the most episode appearances (or votes).
+
+        Args:
+            limit (int): Number of tracks.
+            order_by (str): One of TRACK_ORDERS.
+        """
+        if order_by not in TRACK_ORDERS:
+            raise ValueError(f"Cannot order tracks by {order_by}; use one of {TRACK_ORDERS}")
+        column = "songs" if order_by == "appearances" else order_by
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT artist, title, remix_info, songs AS appearances, total_votes, best_ranking, first_episode, "
+                f"last_episode FROM tracks ORDER BY {column} DESC, songs DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def vote_trends(self, years_per_era: int = 1) -> List[Dict[str, Any]]:
+        """
+        Votes per era of the show, from the per-episode aggregates.
+
+        Args:
+            years_per_era (int): Width of an era in (approximate broadcast) years.
+
+        Returns:
+            list: One row per era with its first and last year, episode and song
+                counts, total votes and average votes per voted song and per episode.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT MIN(year) AS from_year, MAX(year) AS to_year, COUNT(*) AS episodes, SUM(songs) AS songs, "
+                "SUM(voted_songs) AS voted_songs, SUM(total_votes) AS total_votes, "
+                "ROUND(1.0 * SUM(total_votes) / NULLIF(SUM(voted_songs), 0), 1) AS votes_per_voted_song, "
+                "ROUND(1.0 * SUM(total_votes) / COUNT(*), 1) AS votes_per_episode "
+                "FROM episodes WHERE year IS NOT NULL GROUP BY (year - 2001) / ? ORDER BY from_year",
+                (years_per_era,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self) -> Dict[str, int]:
+        """Number of episodes, songs, artists and tracks counted."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM episodes) AS episodes, (SELECT COALESCE(SUM(songs), 0) FROM episodes) AS songs, "
+                "(SELECT COUNT(*) FROM artists) AS artists, (SELECT COUNT(*) FROM tracks) AS tracks").fetchone()
+        return dict(row)
+
+    def clear(self):
+        """Drop every aggregate, before a rebuild."""
+        with self._lock, self._conn:
+            for table in ("episodes", "artists", "tracks"):
+                self._conn.execute(f"DELETE FROM {table}")
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Build the chart-history analytics and print its views.")
+    parser.add_argument("command", choices=["update", "rebuild", "report"],
+                        help="update: add episodes not counted yet; rebuild: recount everything; report: print the views")
+    parser.add_argument("--collection", default=None,
+                        help="Read songs from this collection instead of the local corpus")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    analytics = ChartAnalytics()
+    if args.command in ("update", "rebuild"):
+        if args.collection:
+            from src.MilvusClientASOT import MilvusClientASOT
+            records = MilvusClientASOT().iter_rows(args.collection, OUTPUT_FIELDS)
+        else:
+            from src.episode_store import load_corpus_records
+            records = load_corpus_records()
+        if args.command == "rebuild":
+            analytics.clear()
+        start = time.perf_counter()
+        added = analytics.add_episodes(records)
+        print(f"Added {added} episodes in {time.perf_counter() - start:.2f} s: {analytics.summary()}")
+    else:
+        for title, rows in [("Most-charted artists", analytics.top_artists(args.limit)),
+                            ("Most appearances", analytics.top_tracks(args.limit)),
+                            ("Vote trends", analytics.vote_trends())]:
+            print(f"\n{title}")
+            for row in rows:
+                print("  " + ", ".join(f"{key}={value}" for key, value in row.items()))
@@ -0,0 +1,211 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import os
+import ujson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pymilvus import DataType
+from typing import List, Dict, Any, Iterator
+
+# Bump when the shard layout or manifest changes incompatibly
+SNAPSHOT_FORMAT_VERSION = 2
+# Version 1 snapshots predate the dynamic field column and import unchanged
+READABLE_FORMAT_VERSIONS = (1, 2)
+MANIFEST_FILE = "manifest.json"
+PROJECTION_FILE = "projection.npz"
+SHARD_COMPRESSION = "zstd"
+# Shard column holding the dynamic fields of a row as a JSON object (null when it has none)
+DYNAMIC_COLUMN = "$meta"
+# Shards per import worker, so workers finishing early pick up the remaining ones
+SHARDS_PER_WORKER = 2
+MIN_SHARD_ROWS = 1000
+MAX_SHARD_ROWS = 100000
+
+_SCALAR_TYPES = {
+    DataType.BOOL: pa.bool_(),
+    DataType.INT8: pa.int8(),
+    DataType.INT16: pa.int16(),
+    DataType.INT32: pa.int32(),
+    DataType.INT64: pa.int64(),
+    DataType.FLOAT: pa.float32(),
+    DataType.DOUBLE: pa.float64(),
+    DataType.VARCHAR: pa.string(),
+}
+_VECTOR_TYPES = {DataType.FLOAT_VECTOR, DataType.FLOAT16_VECTOR, DataType.BFLOAT16_VECTOR}
+
+
+def field_manifest(field: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serializable description of a Milvus schema field."""
+    return {
+        "name": field["name"],
+        "type": field["type"].name,
+        "params": field.get("params", {}),
+        "is_primary": field.get("is_primary", False),
+        "auto_id": field.get("auto_id", False),
+    }
+
+
+def shard_rows_for(row_count: int, workers: int) -> int:
+    """Rows per shard giving each of `workers` import workers SHARDS_PER_WORKER shards, within bounds."""
+    target = -(-row_count // max(1, workers * SHARDS_PER_WORKER))
+    return min(MAX_SHARD_ROWS, max(MIN_SHARD_ROWS, target))
+
+
+def shard_schema(fields: List[Dict[str, Any]], dynamic_field: bool = False) -> pa.Schema:
+    """
+    Arrow schema of the shards for the exported fields.
+
+    Dense vectors are stored as fixed-size float32 lists, decoded from whatever
+    precision the collection uses; casting back on import is lossless. With
+    dynamic_field, a DYNAMIC_COLUMN string column carries the dynamic fields.
+    """
+    arrow_fields = []
+    for field in fields:
+        data_type = DataType[field["type"]]
+        if data_type in _VECTOR_TYPES:
+            arrow_fields.append(pa.field(field["name"], pa.list_(pa.float32(), int(field["params"]["dim"]))))
+        elif data_type in _SCALAR_TYPES:
+            arrow_fields.append(pa.field(field["name"], _SCALAR_TYPES[data_type]))
+        else:
+            raise ValueError(f"Field {field['name']} of type {data_type.name} cannot be exported")
+    if dynamic_field:
+        arrow_fields.append(pa.field(DYNAMIC_COLUMN, pa.string()))
+    return pa.schema(arrow_fields)
+
+
+def pack_dynamic_fields(rows: List[Dict[str, Any]], schema_fields: set) -> List[Dict[str, Any]]:
+    """
+    Move the keys of exported rows that are not schema fields into DYNAMIC_COLUMN.
+
+    Args:
+        rows (list): Rows as returned by a query with the '$meta' output field.
+        schema_fields (set): Names of all schema fields, exported or not (e.g. auto IDs).
+
+    Raises:
+        ValueError: If a dynamic field value cannot be serialized to JSON.
+    """
+    for row in rows:
+        dynamic = {key: row.pop(key) for key in [key for key in row if key not in schema_fields]}
+        try:
+            row[DYNAMIC_COLUMN] = ujson.dumps(dynamic) if dynamic else None
+        except (TypeError, OverflowError) as e:
+            raise ValueError(f"Dynamic fields {sorted(dynamic)} cannot be exported: {e}") from e
+    return rows
+
+
+def unpack_dynamic_fields(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Expand DYNAMIC_COLUMN back into top-level keys, for insertion into a collection with a dynamic field."""
+    for row in rows:
+        dynamic = row.pop(DYNAMIC_COLUMN, None)
+        if dynamic:
+            row.update(ujson.loads(dynamic))
+    return rows
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_shard(rows: List[Dict[str, Any]], schema: pa.Schema, snapshot_dir: str, index: int) -> Dict[str, Any]:
+    """
+    Write rows to a compressed Parquet shard.
+
+    Returns:
+        dict: Shard entry for the manifest with 'file', 'rows' and 'sha256'.
+    """
+    file_name = f"shard-{index:05d}.parquet"
+    path = os.path.join(snapshot_dir, file_name)
+    table = pa.Table.from_pylist(rows, schema=schema)
+    pq.write_table(table, path, compression=SHARD_COMPRESSION)
+    return {"file": file_name, "rows": table.num_rows, "sha256": file_sha256(path)}
+
+
+def iter_shard_rows(path: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the rows of a shard in batches of dictionaries."""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
+
+
+def write_manifest(snapshot_dir: str, manifest: Dict[str, Any]):
+    """Atomically write the manifest; its presence marks a complete snapshot."""
+    tmp_path = os.path.join(snapshot_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        ujson.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, MANIFEST_FILE))
+
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    """
+    Read a snapshot manifest.
+
+    Raises:
+        ValueError: If the directory holds no complete snapshot or an unsupported version.
+    """
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise ValueError(f"No snapshot manifest in {snapshot_dir} (incomplete export?)")
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = ujson.load(f)
+    if manifest.get("format_version") not in READABLE_FORMAT_VERSIONS:
+        raise ValueError(f"Unsupported snapshot format version {manifest.get('format_version')}")
+    return manifest
+
+
+def verify_shards(snapshot_dir: str, manifest: Dict[str, Any]):
+    """
+    Check every shard against the checksum and row count recorded in the manifest.
+
+    Raises:
+        ValueError: On a missing, corrupted or truncated shard.
+    """
+    for shard in manifest["shards"]:
+        path = os.path.join(snapshot_dir, shard["file"])
+        if not os.path.exists(path):
+            raise ValueError(f"Missing shard {shard['file']}")
+        if file_sha256(path) != shard["sha256"]:
+            raise ValueError(f"Checksum mismatch for shard {shard['file']}")
+        if pq.ParquetFile(path).metadata.num_rows != shard["rows"]:
+            raise ValueError(f"Row count mismatch for shard {shard['file']}")
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    from src.MilvusClientASOT import MilvusClientASOT
+
+    parser = argparse.ArgumentParser(description="Export a collection to a vector snapshot, or import one.")
+    parser.add_argument("command", choices=["export", "import", "verify"])
+    parser.add_argument("snapshot_dir", help="Snapshot directory")
+    parser.add_argument("--collection", default=None,
+                        help="Collection to export, or to import into (default: the exported collection's name)")
+    parser.add_argument("--shard-rows", type=int, default=None,
+                        help="Rows per shard on export (default: enough shards for the import workers)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Shards imported in parallel, and the import parallelism export sizes shards for")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        manifest = read_manifest(args.snapshot_dir)
+        verify_shards(args.snapshot_dir, manifest)
+        print(f"Snapshot of {manifest['collection']} is intact: {manifest['row_count']} rows in {len(manifest['shards'])} shards")
+        sys.exit(0)
+
+    milvus_client = MilvusClientASOT()
+    if args.command == "export":
+        manifest = milvus_client.export_collection(args.collection or os.getenv("MILVUS_COLLECTION", "asot_songs"),
+                                                   args.snapshot_dir, shard_rows=args.shard_rows,
+                                                   workers=args.workers)
+        print(f"Exported {manifest['row_count']} rows of {manifest['collection']} in {len(manifest['shards'])} shards")
+    else:
+        result = milvus_client.import_collection(args.snapshot_dir, collection_name=args.collection, workers=args.workers)
+        print(f"Imported {result['rows']} rows into {result['collection']}")
@@ -0,0 +1,246 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.unity_json import read_and_merge_json_files, find_json_files, read_json_file
+
+import argparse
+import glob
+import os
+import re
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+from typing import List, Dict, Any, Iterator, Optional
+
+# Typed columns of the consolidated corpus. Field names match the Milvus fields
+# produced by unity_json, so records read from the store can be passed straight
+# to MilvusClientASOT.prepare_data_for_insertion.
+STORE_SCHEMA = pa.schema([
+    ("episode_id", pa.string()),
+    ("ranking", pa.int64()),
+    ("artist", pa.string()),
+    ("collaborators", pa.string()),
+    ("featured_artists", pa.string()),
+    ("title", pa.string()),
+    ("remix_info", pa.string()),
+    ("label", pa.string()),
+    ("popularity_score", pa.int64()),
+    ("vote_count", pa.int64()),
+    ("URL", pa.string()),
+])
+
+_INT_FIELDS = {field.name for field in STORE_SCHEMA if pa.types.is_integer(field.type)}
+
+_EPISODE_FILE = re.compile(r"asot_episode_(\w+)\.json$")
+
+
+def default_store_path() -> str:
+    """Location of the episode store: EPISODE_STORE, or asot_episodes.arrow in OUTPUT_FOLDER."""
+    return os.getenv("EPISODE_STORE", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "asot_episodes.arrow"))
+
+
+def segments_dir(store_path: str) -> str:
+    """Directory of the per-episode segments appended since the last compaction."""
+    return store_path + ".segments"
+
+
+def _segment_path(store_path: str, episode_id: str) -> str:
+    return os.path.join(segments_dir(store_path), f"episode_{episode_id}.arrow")
+
+
+def store_exists(store_path: Optional[str] = None) -> bool:
+    """Whether a compacted store or any appended segment exists."""
+    store_path = store_path or default_store_path()
+    return os.path.exists(store_path) or bool(glob.glob(os.path.join(segments_dir(store_path), "*.arrow")))
+
+
+def _coerce(field: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if field in _INT_FIELDS:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def _episode_sort_key(episode_id: str):
+    return (0, int(episode_id)) if episode_id and episode_id.isdigit() else (1, episode_id or "")
+
+
+def records_to_table(records: List[Dict[str, Any]]) -> pa.Table:
+    """
+    Convert song records into a table with the store schema.
+
+    Values the LLM returned with the wrong type (e.g. a ranking as a string) are
+    coerced, and unparseable ones become nulls. Fields outside the schema are dropped.
+
+    Args:
+        records: Song records with Milvus field names (see unity_json.read_json_file).
+
+    Returns:
+        pa.Table: The records as a typed Arrow table.
+    """
+    columns = {field.name: [_coerce(field.name, record.get(field.name)) for record in records] for field in STORE_SCHEMA}
+    return pa.Table.from_pydict(columns, schema=STORE_SCHEMA)
+
+
+def write_store(table: pa.Table, store_path: str):
+    """Atomically write a table to the store as an uncompressed Arrow IPC file."""
+    directory = os.path.dirname(store_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = store_path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, STORE_SCHEMA) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, store_path)
+
+
+def _read_arrow_file(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def load_episode_table(store_path: Optional[str] = None) -> pa.Table:
+    """
+    Load the episode store as a memory-mapped Arrow table.
+
+    The IPC files are uncompressed, so columns are zero-copy views over the
+    mapped files: loading is near instant and pages are only read when touched.
+    Segments appended since the last compaction are added after the compacted
+    rows, replacing the rows of any episode they re-parsed.
+
+    Args:
+        store_path: Path of the store. Defaults to default_store_path().
+
+    Returns:
+        pa.Table: The corpus, or an empty table if the store does not exist yet.
+    """
+    store_path = store_path or default_store_path()
+    table = _read_arrow_file(store_path) if os.path.exists(store_path) else STORE_SCHEMA.empty_table()
+
+    segment_paths = sorted(glob.glob(os.path.join(segments_dir(store_path), "*.arrow")))
+    if not segment_paths:
+        return table
+    segments = [_read_arrow_file(path) for path in segment_paths]
+    segment_ids = pa.array({episode_id for segment in segments for episode_id in segment.column("episode_id").to_pylist()},
+                           type=pa.string())
+    replaced = pc.is_in(table.column("episode_id"), value_set=segment_ids)
+    if table.num_rows and pc.any(replaced).as_py():
+        table = table.filter(pc.invert(replaced))
+    return pa.concat_tables([table] + segments)
+
+
+def append_episode(records: List[Dict[str, Any]], store_path: Optional[str] = None,
+                   data_dir: Optional[str] = None) -> int:
+    """
+    Add or replace the rows of one or more episodes in the store.
+
+    Each episode is written to its own small segment file next to the compacted
+    store, so an append costs O(episode), not O(corpus). Appending an episode
+    that was re-parsed overwrites its segment. compact_episodes() folds the
+    segments back into a single file.
+
+    When no store exists yet and data_dir is given, the store is first built from
+    every episode JSON file there, so episodes parsed before the store existed
+    are not left out of it.
+
+    Args:
+        records: Song records of the episode(s) to store.
+        store_path: Path of the store. Defaults to default_store_path().
+        data_dir: Directory of the episode JSON files, to build a missing store from.
+
+    Returns:
+        int: Number of rows written.
+    """
+    store_path = store_path or default_store_path()
+    if data_dir is not None and not store_exists(store_path):
+        return compact_episodes(data_dir, store_path)
+
+    by_episode: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_episode.setdefault(str(record.get("episode_id")), []).append(record)
+    for episode_id, episode_records in by_episode.items():
+        write_store(records_to_table(episode_records), _segment_path(store_path, episode_id))
+    return len(records)
+
+
+def compact_episodes(data_dir: str, store_path: Optional[str] = None) -> int:
+    """
+    Consolidate every episode JSON file in data_dir into the columnar store.
+
+    Args:
+        data_dir: Directory containing the asot_episode_N.json files.
+        store_path: Path of the store. Defaults to default_store_path().
+
+    Returns:
+        int: Number of rows written.
+    """
+    store_path = store_path or default_store_path()
+    records = sorted(read_and_merge_json_files(data_dir),
+                     key=lambda record: (_episode_sort_key(record.get("episode_id")), _coerce("ranking", record.get("ranking")) or 0))
+    table = records_to_table(records)
+    write_store(table, store_path)
+    # The JSON files are the source of truth: every appended segment is now in the compacted file
+    for segment_path in glob.glob(os.path.join(segments_dir(store_path), "*.arrow")):
+        os.remove(segment_path)
+    print(f"Compacted {table.num_rows} records into {store_path}")
+    return table.num_rows
+
+
+def iter_store_records(store_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the stored song records as dictionaries, one record batch at a time.
+
+    Args:
+        store_path: Path of the store. Defaults to default_store_path().
+
+    Yields:
+        Song records with Milvus field names.
+    """
+    for batch in load_episode_table(store_path).to_batches():
+        yield from batch.to_pylist()
+
+
+def load_corpus_records(data_dir: Optional[str] = None, store_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load every song record, from the columnar store when it exists.
+
+    Episode JSON files whose episode is not in the store (e.g. parsed before the
+    store was created) are read as well, so no episode is left out; without a
+    store, everything is read from the JSON files.
+
+    Args:
+        data_dir: Directory containing the episode JSON files. Defaults to OUTPUT_FOLDER.
+        store_path: Path of the store. Defaults to default_store_path().
+
+    Returns:
+        list[dict]: Song records with Milvus field names.
+    """
+    store_path = store_path or default_store_path()
+    data_dir = data_dir or os.getenv("OUTPUT_FOLDER", "data")
+    if not store_exists(store_path):
+        return list(read_and_merge_json_files(data_dir))
+
+    records = list(iter_store_records(store_path))
+    stored_ids = {record["episode_id"] for record in records}
+    missing = [path for path in find_json_files(data_dir)
+               if (match := _EPISODE_FILE.search(os.path.basename(path))) and match.group(1) not in stored_ids]
+    for path in missing:
+        records.extend(read_json_file(path))
+    if missing:
+        print(f"Read {len(missing)} episode files missing from {store_path}; "
+              f"run 'python src/episode_store.py' to compact them into the store")
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consolidate episode JSON files into a columnar Arrow store.")
+    parser.add_argument("--data-dir", default=os.getenv("OUTPUT_FOLDER", "data"),
+                        help="Directory containing the asot_episode_N.json files")
+    parser.add_argument("--store", default=None, help="Path of the Arrow store (default: EPISODE_STORE)")
+    args = parser.parse_args()
+
+    compact_episodes(args.data_dir, args.store)
@@ -2,40 +2,130 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.process_asot_episode import process_asot_episode, extract_episode_number
-from src.unity_json import read_and_merge_json_files
+from src.process_asot_episode import extract_episode_number
+from src.unity_json import read_and_merge_json_files, JsonFileManifest
+from src.job_manifest import JobManifest, STAGES
+from src.ingestion_pipeline import run_pipeline, run_stage, track_appearances
+from src.canonical_tracks import ingest_tracks
+from src.ingestion_profile import ingestion_profile, STAGES as PROFILE_STAGES
 from src.MilvusClientASOT import MilvusClientASOT
+from src.TieredSearchASOT import TieredSearchASOT
+from src.ingest_events import IngestEventLog
+from src.chart_analytics import ChartAnalytics
+import argparse
 import os
 
-milvus_client = MilvusClientASOT()
-
-episodes = []
-
-with open('episodes_to_insert.txt', 'r') as file:
-    episodes = file.readlines()
-    # remove possible \n
-    episodes = [episode.strip() for episode in episodes]
+parser = argparse.ArgumentParser(description="Scrape, parse and insert ASOT episodes into Milvus.")
+parser.add_argument("command", nargs="?", default="run", choices=["run", "resume", "retry", "status", "stage"],
+                    help="run: queue episodes_to_insert.txt and process; resume: continue interrupted episodes; "
+                         "retry: rerun only the failed stages; status: show the job manifest; "
+                         "stage: rerun one stage of one episode outside the manifest (for profiling)")
+parser.add_argument("--batch", action="store_true",
+                    help="Parse all tracklists in one Claude Message Batches job (for backfills)")
+parser.add_argument("--poll-interval", type=float, default=30.0,
+                    help="Seconds between batch status checks in --batch mode")
+parser.add_argument("--profile-stage", action="append", default=[], choices=PROFILE_STAGES,
+                    help="Run this stage under cProfile and save the profile (repeatable)")
+parser.add_argument("--episode", help="Episode ID for the 'stage' command")
+parser.add_argument("--stage", choices=STAGES[1:], help="Pipeline stage for the 'stage' command")
+args = parser.parse_args()
+if args.command == "stage" and not (args.episode and args.stage):
+    parser.error("the 'stage' command needs --episode and --stage")
 
 collection_name = os.getenv("MILVUS_COLLECTION")
 data_dir = os.getenv("OUTPUT_FOLDER")
 
-if milvus_client.client.has_collection(collection_name):
-    existing_episodes = milvus_client.list_episodes(collection_name)
+manifest = JobManifest(os.getenv("INGESTION_MANIFEST", os.path.join(data_dir, "ingestion_manifest.db")))
+
+if args.command == "status":
+    summary = manifest.summary()
+    timings = manifest.stage_timings()
+    print(f"{'stage':<10} {'ok':>6} {'running':>8} {'failed':>7} {'avg s':>8}")
+    for stage in STAGES:
+        counts = summary.get(stage, {})
+        average = timings.get(stage, {}).get("average")
+        print(f"{stage:<10} {counts.get('ok', 0):>6} {counts.get('running', 0):>8} {counts.get('failed', 0):>7} "
+              f"{(f'{average:.2f}' if average is not None else '-'):>8}")
+    for entry in manifest.failed():
+        print(f"Episode {entry['episode_id']} failed after '{entry['stage']}': {entry['error']}")
+    sys.exit(0)
+
+milvus_client = MilvusClientASOT()
+# Lets running search apps pick up new episodes (e.g. for autocomplete) without a restart
+milvus_client.add_insert_listener(IngestEventLog().append)
+# Chart-history aggregates are updated with each inserted episode's songs only
+analytics = ChartAnalytics()
+milvus_client.add_insert_listener(lambda collection, rows: analytics.add_episodes(rows))
+
+# With tiering, new episodes land in the hot tier and age out to the cold tier
+# with 'python src/TieredSearchASOT.py rebalance'
+if os.getenv("TIERED_COLLECTIONS", "false").lower() == "true":
+    song_index = TieredSearchASOT(milvus_client)
+    song_index.create_tiers(collection_name)
+    target_collection = song_index.hot_collection(collection_name)
 else:
-    existing_episodes = []
+    song_index = milvus_client
+    milvus_client.create_collection_if_not_exists(collection_name)
+    target_collection = collection_name
+
+ingestion_profile.profile_stages(*args.profile_stage)
+
+def print_profile():
+    print(f"\nIngestion profile:\n{ingestion_profile.report()}")
+    ingestion_profile.save_profiles()
+
+if args.command == "stage":
+    # Reruns a checkpointed stage on its own, e.g. under py-spy:
+    # py-spy record -o embed.svg -- python src/episodes_ingestion.py stage --episode 1100 --stage embedded
+    entry = manifest.get(args.episode)
+    if entry is None:
+        sys.exit(f"Episode {args.episode} is not in the ingestion manifest")
+    ingestion_profile.reset()
+    run_stage(args.stage, entry, milvus_client, target_collection, data_dir)
+    print_profile()
+    sys.exit(0)
+
+if args.command == "run":
+    episodes = []
+
+    with open('episodes_to_insert.txt', 'r') as file:
+        episodes = file.readlines()
+        # remove possible \n
+        episodes = [episode.strip() for episode in episodes]
+
+    existing_episodes = song_index.list_episodes(collection_name)
+
+    for url in episodes:
+        episode_id = extract_episode_number(url)
+        if episode_id and episode_id not in existing_episodes:
+            manifest.register(episode_id, url)
+    episode_ids = [entry["episode_id"] for entry in manifest.incomplete()]
+elif args.command == "resume":
+    episode_ids = [entry["episode_id"] for entry in manifest.incomplete()]
+else:  # retry
+    episode_ids = [entry["episode_id"] for entry in manifest.reset_failed()]
 
-episodes_to_process =  [episode for episode in episodes if extract_episode_number(episode) not in existing_episodes]
+print(f"Processing {len(episode_ids)} episodes ({args.command})")
+ingestion_profile.reset()
+counts = run_pipeline(manifest, episode_ids, milvus_client, target_collection, data_dir,
+                      batch=args.batch, poll_interval=args.poll_interval)
+print(f"Inserted {counts['inserted']} episodes, {counts['failed']} failed. "
+      f"Run 'python src/episodes_ingestion.py retry' to rerun failed stages.")
 
-results = []
-for url in episodes_to_process:
-    try:
-        result = process_asot_episode(url, output_dir=data_dir)
-        results.append(result)
-    except Exception as e:
-        print(f"Error processing {url}: {str(e)}")
+# Episode files not tracked by the manifest (e.g. from earlier runs) are still
+# loaded the old way; insert_episodes skips the ones already in Milvus. Files
+# unchanged since the last successful sweep are not read at all.
+tracked_episodes = {entry["episode_id"] for entry in manifest.episodes()}
+json_manifest = JsonFileManifest(os.getenv("JSON_MANIFEST", os.path.join(data_dir, ".json_manifest")))
+all_records = [record for record in read_and_merge_json_files(data_dir, manifest=json_manifest)
+               if record["episode_id"] not in tracked_episodes]
 
-all_records = read_and_merge_json_files(data_dir) # ready to be loaded into milvus
+# The tracks layer is upserted, so songs of episodes already in Milvus are harmless
+tracks_collection = os.getenv("TRACKS_COLLECTION")
+if tracks_collection and all_records:
+    ingest_tracks(milvus_client, tracks_collection, all_records, track_appearances())
 
-milvus_client.create_collection_if_not_exists(collection_name)
+song_index.insert_episodes(collection_name, all_records)
+json_manifest.save()
 
-milvus_client.insert_episodes(collection_name, all_records)
\ No newline at end of file
+print_profile()
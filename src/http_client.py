@@ -0,0 +1,149 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting, transient server errors and
+# Anthropic's "overloaded" status.
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504, 529}
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("HTTP_READ_TIMEOUT", "120")),
+)
+DEFAULT_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled HTTP session.
+
+    The session keeps connections alive between calls, so repeated requests to
+    the same host (Firecrawl, Anthropic) reuse TCP/TLS connections instead of
+    opening a new one per request.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=DEFAULT_POOL_SIZE,
+                    pool_maxsize=DEFAULT_POOL_SIZE,
+                    max_retries=0,  # retries are handled by request_with_retry
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into a number of seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def compute_backoff(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based attempt number that just failed.
+        base_delay: Delay for the first retry, in seconds.
+        max_delay: Upper bound for any single delay, in seconds.
+
+    Returns:
+        Seconds to sleep before the next attempt.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def request_with_retry(method: str, url: str, max_retries: int = 3, base_delay: float = 1.0,
+                       max_delay: float = 60.0, timeout: Optional[Tuple[float, float]] = None,
+                       **kwargs) -> requests.Response:
+    """
+    Send an HTTP request through the shared session, retrying transient failures.
+
+    Connection errors, timeouts and responses with a status in RETRY_STATUS_CODES
+    are retried with exponential backoff and jitter. A Retry-After header on the
+    response takes precedence over the computed backoff. Any other error status
+    is raised immediately.
+
+    Args:
+        method: HTTP method, e.g. "GET" or "POST".
+        url: Target URL.
+        max_retries: Total number of attempts.
+        base_delay: Base delay for the backoff, in seconds.
+        max_delay: Maximum delay between attempts, in seconds.
+        timeout: (connect, read) timeout tuple. Defaults to DEFAULT_TIMEOUT.
+        **kwargs: Passed through to requests.Session.request.
+
+    Returns:
+        The successful response.
+
+    Raises:
+        requests.HTTPError: On a non-retryable status or when retries are exhausted.
+        requests.RequestException: When the last attempt failed at the transport level.
+    """
+    session = get_session()
+    timeout = timeout or DEFAULT_TIMEOUT
+    attempts = max(1, max_retries)
+
+    for attempt in range(attempts):
+        is_last = attempt == attempts - 1
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if is_last:
+                raise
+            wait = compute_backoff(attempt, base_delay, max_delay)
+            print(f"{method} {url} failed ({e.__class__.__name__}), retrying in {wait:.1f} seconds...")
+            time.sleep(wait)
+            continue
+
+        if response.status_code not in RETRY_STATUS_CODES or is_last:
+            response.raise_for_status()
+            return response
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        wait = min(max_delay, retry_after) if retry_after is not None else compute_backoff(attempt, base_delay, max_delay)
+        print(f"{method} {url} returned {response.status_code}, retrying in {wait:.1f} seconds...")
+        response.close()
+        time.sleep(wait)
+
+    # Unreachable: the last attempt either returns or raises.
+    raise RuntimeError(f"Exhausted retries for {method} {url}")
@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.song_documents import STRING_DEFAULT
+
+import os
+import threading
+import time
+import ujson
+from typing import List, Dict, Any
+
+# Song fields carried by each event, enough to update in-memory indexes without querying Milvus
+EVENT_FIELDS = ["episode_id", "artist", "collaborators", "featured_artists", "title", "remix_info"]
+
+
+def default_events_path() -> str:
+    return os.getenv("INGEST_EVENTS_FILE", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "ingest_events.jsonl"))
+
+
+class IngestEventLog:
+    """
+    Append-only JSON lines file of inserted episodes.
+
+    The ingestion process appends an event per insert (see
+    MilvusClientASOT.add_insert_listener); long-running readers such as the
+    search app poll it and update their in-memory state from the new events
+    only. Each reader instance keeps its own offset, starting at the current
+    end of the file.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or default_events_path()
+        self._offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._lock = threading.Lock()
+
+    def append(self, collection_name: str, records: List[Dict[str, Any]]):
+        """
+        Record the insert of song records into a collection.
+
+        Records without an episode ID (e.g. canonical tracks) are ignored.
+        """
+        records = [{field: record.get(field, STRING_DEFAULT) for field in EVENT_FIELDS}
+                   for record in records if record.get("episode_id") is not None]
+        if not records:
+            return
+        event = {"time": time.time(), "collection": collection_name,
+                 "episode_ids": sorted({record["episode_id"] for record in records}), "records": records}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # A single write of a complete line, so concurrent readers never see half an event
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(ujson.dumps(event) + "\n")
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        """Events appended since the last call (or since this reader was created)."""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return []
+            if os.path.getsize(self.path) < self._offset:
+                # The file was truncated or replaced; start over
+                self._offset = 0
+            events = []
+            with open(self.path, "r", encoding="utf-8") as f:
+                f.seek(self._offset)
+                for line in iter(f.readline, ""):
+                    if not line.endswith("\n"):
+                        # Partial line still being written; read it next time
+                        break
+                    events.append(ujson.loads(line))
+                    self._offset = f.tell()
+            return events
+
+    def follow(self, callback, interval: float = 5.0) -> threading.Thread:
+        """
+        Poll for new events in a daemon thread.
+
+        Args:
+            callback (callable): Called with each new event.
+            interval (float): Seconds between polls.
+
+        Returns:
+            threading.Thread: The started thread.
+        """
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    for event in self.read_new():
+                        callback(event)
+                except Exception as e:
+                    print(f"Failed to process ingest events from {self.path}: {e}")
+
+        thread = threading.Thread(target=poll, name="ingest-events", daemon=True)
+        thread.start()
+        return thread
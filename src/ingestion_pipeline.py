@@ -0,0 +1,241 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.job_manifest import JobManifest, next_stage, STATUS_FAILED
+from src.process_asot_episode import scrape_asot_episode, save_parsed_songs
+from src.song_parser import parse_songs_with_claude
+from src.batch_parser import parse_songs_with_claude_batch
+from src.unity_json import read_json_file
+from src.episode_store import append_episode
+from src.canonical_tracks import ingest_tracks, TrackAppearances
+
+import os
+import numpy as np
+from typing import List, Dict, Any
+
+
+def episode_paths(episode_id: str, output_dir: str) -> Dict[str, str]:
+    """
+    Paths of the artifacts each ingestion stage checkpoints for an episode.
+
+    Args:
+        episode_id: The ASOT episode number.
+        output_dir: Directory holding the episode files.
+
+    Returns:
+        Mapping with 'markdown', 'json' and 'dense' file paths.
+    """
+    return {
+        "markdown": os.path.join(output_dir, f"asot_episode_{episode_id}_raw.md"),
+        "json": os.path.join(output_dir, f"asot_episode_{episode_id}.json"),
+        "dense": os.path.join(output_dir, f"asot_episode_{episode_id}_dense.npy"),
+    }
+
+
+_track_appearances = None
+
+
+def track_appearances() -> TrackAppearances:
+    """The appearances store of the tracks layer, opened once per process."""
+    global _track_appearances
+    if _track_appearances is None:
+        _track_appearances = TrackAppearances()
+    return _track_appearances
+
+
+def store_parsed_episode(episode_id: str, output_dir: str):
+    """
+    Append a freshly parsed episode to the columnar episode store.
+
+    The store is derived data and can always be rebuilt with
+    `python src/episode_store.py`, so a failure here is logged rather than
+    failing the (expensive) parsing stage.
+    """
+    try:
+        append_episode(read_json_file(episode_paths(episode_id, output_dir)["json"]), data_dir=output_dir)
+    except Exception as e:
+        print(f"Could not add episode {episode_id} to the episode store: {str(e)}")
+
+
+def run_stage(stage: str, entry: Dict[str, Any], milvus_client, collection_name: str, output_dir: str,
+              max_retries: int = 3, delay: int = 5):
+    """
+    Execute a single ingestion stage for one episode.
+
+    Each stage reads the checkpoint written by the previous one, so any stage
+    can be rerun on its own after a crash or failure:
+    - scraped: scrape the episode page and save the raw markdown
+    - parsed: parse the saved markdown with Claude, save the JSON and append it
+      to the episode store
+    - embedded: embed the parsed records and save the dense vectors
+    - inserted: add the records to the canonical tracks layer (when
+      TRACKS_COLLECTION is set), then insert them with their saved vectors into Milvus
+
+    Args:
+        stage: The stage to run.
+        entry: The episode's manifest entry.
+        milvus_client: MilvusClientASOT instance used for embedding and insertion.
+        collection_name: Target collection.
+        output_dir: Directory holding the episode files.
+        max_retries: Maximum number of retry attempts for scraping.
+        delay: Delay between retry attempts in seconds.
+    """
+    episode_id, url = entry["episode_id"], entry["url"]
+    paths = episode_paths(episode_id, output_dir)
+
+    if stage == "scraped":
+        scrape_asot_episode(url, output_dir, max_retries=max_retries, delay=delay)
+
+    elif stage == "parsed":
+        with open(paths["markdown"], "r", encoding="utf-8") as f:
+            raw_text = f.read()
+        print(f"Step 4: Parsing song list of episode {episode_id} using Claude...")
+        parsed_songs = parse_songs_with_claude(raw_text, episode_id, url)
+        save_parsed_songs(parsed_songs, episode_id, output_dir)
+        store_parsed_episode(episode_id, output_dir)
+
+    elif stage == "embedded":
+        records = read_json_file(paths["json"])
+        if records:
+            prepared = milvus_client.prepare_data_for_insertion(records)
+            dense = np.asarray([data_point["dense"] for data_point in prepared], dtype=np.float32)
+        else:
+            dense = np.zeros((0, milvus_client.embeddings.dim), dtype=np.float32)
+        np.save(paths["dense"], dense)
+        print(f"Embedded {len(dense)} songs of episode {episode_id}")
+
+    elif stage == "inserted":
+        records = read_json_file(paths["json"])
+        if not records:
+            print(f"Episode {episode_id} has no songs to insert")
+            return
+
+        # Keep the canonical tracks layer in step with the per-appearance collection.
+        # It runs before the songs check below, so a retry after a failure here (or
+        # after a crash) still reaches it; known tracks are not re-embedded and
+        # appearances are upserted, so running it again is harmless.
+        tracks_collection = os.getenv("TRACKS_COLLECTION")
+        if tracks_collection:
+            ingest_tracks(milvus_client, tracks_collection, records, track_appearances())
+
+        # A crash between the insert and the manifest update must not duplicate rows
+        if milvus_client.has_episode(collection_name, episode_id):
+            print(f"Episode {episode_id} already present in {collection_name}, skipping insert")
+            return
+        dense = np.load(paths["dense"])
+        prepared = milvus_client.prepare_data_for_insertion(records, dense_vectors=list(dense))
+        milvus_client.insert_data(collection_name, prepared)
+
+    else:
+        raise ValueError(f"Unknown ingestion stage: {stage}")
+
+
+def advance_episode(manifest: JobManifest, episode_id: str, milvus_client, collection_name: str,
+                    output_dir: str) -> bool:
+    """
+    Run the remaining stages of an episode until it is inserted or a stage fails.
+
+    Returns:
+        bool: True if the episode reached the 'inserted' stage.
+    """
+    entry = manifest.get(episode_id)
+    stage = next_stage(entry["stage"])
+    while stage is not None:
+        try:
+            with manifest.track(episode_id, stage):
+                run_stage(stage, entry, milvus_client, collection_name, output_dir)
+        except Exception as e:
+            print(f"Error in stage '{stage}' for episode {episode_id}: {str(e)}")
+            return False
+        entry = manifest.get(episode_id)
+        stage = next_stage(entry["stage"])
+    return True
+
+
+def batch_parse_episodes(manifest: JobManifest, episode_ids: List[str], output_dir: str,
+                         poll_interval: float = 30.0):
+    """
+    Run the 'parsed' stage for several scraped episodes as one Claude batch job.
+
+    Args:
+        manifest: The job manifest.
+        episode_ids: Episodes whose last completed stage is 'scraped'.
+        output_dir: Directory holding the episode files.
+        poll_interval: Seconds between batch status checks.
+    """
+    items, run_ids = [], {}
+    for episode_id in episode_ids:
+        entry = manifest.get(episode_id)
+        run_ids[episode_id] = manifest.begin(episode_id, "parsed")
+        try:
+            with open(episode_paths(episode_id, output_dir)["markdown"], "r", encoding="utf-8") as f:
+                items.append((f.read(), episode_id, entry["url"]))
+        except Exception as e:
+            manifest.fail(run_ids.pop(episode_id), episode_id, str(e))
+
+    if not items:
+        return
+
+    print(f"Step 4: Parsing {len(items)} song lists using a Claude batch...")
+    try:
+        parsed, errors = parse_songs_with_claude_batch(items, poll_interval=poll_interval)
+    except Exception as e:
+        for episode_id, run_id in run_ids.items():
+            manifest.fail(run_id, episode_id, str(e))
+        raise
+
+    for episode_id, run_id in run_ids.items():
+        if episode_id in parsed:
+            save_parsed_songs(parsed[episode_id], episode_id, output_dir)
+            store_parsed_episode(episode_id, output_dir)
+            manifest.complete(run_id, episode_id, "parsed")
+        else:
+            manifest.fail(run_id, episode_id, errors.get(episode_id, "Missing batch result"))
+
+
+def run_pipeline(manifest: JobManifest, episode_ids: List[str], milvus_client, collection_name: str,
+                 output_dir: str, batch: bool = False, poll_interval: float = 30.0) -> Dict[str, int]:
+    """
+    Drive a set of episodes through the ingestion stages, checkpointing each one.
+
+    In batch mode the scraping stage runs first for every episode, the parsing
+    stage is submitted as a single Claude batch job, and the remaining stages
+    then run per episode.
+
+    Args:
+        manifest: The job manifest.
+        episode_ids: Episodes to advance. Each must already be registered.
+        milvus_client: MilvusClientASOT instance used for embedding and insertion.
+        collection_name: Target collection.
+        output_dir: Directory holding the episode files.
+        batch: Whether to parse through the Message Batches API.
+        poll_interval: Seconds between batch status checks.
+
+    Returns:
+        dict: Number of episodes 'inserted' and 'failed' in this run.
+    """
+    if batch:
+        for episode_id in episode_ids:
+            if manifest.get(episode_id)["stage"] == "pending":
+                try:
+                    with manifest.track(episode_id, "scraped"):
+                        run_stage("scraped", manifest.get(episode_id), milvus_client, collection_name, output_dir)
+                except Exception as e:
+                    print(f"Error in stage 'scraped' for episode {episode_id}: {str(e)}")
+        to_parse = [episode_id for episode_id in episode_ids
+                    if manifest.get(episode_id)["stage"] == "scraped" and manifest.get(episode_id)["status"] != STATUS_FAILED]
+        if to_parse:
+            batch_parse_episodes(manifest, to_parse, output_dir, poll_interval=poll_interval)
+
+    counts = {"inserted": 0, "failed": 0}
+    for episode_id in episode_ids:
+        entry = manifest.get(episode_id)
+        if entry["status"] == STATUS_FAILED:
+            counts["failed"] += 1
+            continue
+        if advance_episode(manifest, episode_id, milvus_client, collection_name, output_dir):
+            counts["inserted"] += 1
+        else:
+            counts["failed"] += 1
+    return counts
@@ -0,0 +1,177 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Spans recorded along the ingestion path, in pipeline order. 'embed' runs inside
+# 'prepare', and 'listeners' (insert listeners) right after 'insert'.
+STAGES = ["scrape", "parse", "batch_parse", "read_json", "prepare", "embed", "insert", "listeners"]
+
+
+def default_profile_dir() -> str:
+    return os.getenv("INGEST_PROFILE_DIR", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "profiles"))
+
+
+class IngestionProfile:
+    """
+    Per-stage timings and counters of an ingestion run.
+
+    Each instrumented function wraps its work in span(stage), which records the
+    wall-clock time, whether it raised, and counters such as rows, bytes and
+    LLM tokens. report() turns the totals into a summary table with throughput
+    per stage, so a slow backfill can be attributed to Firecrawl, Claude,
+    embedding or Milvus.
+
+    Stages listed in INGEST_PROFILE_STAGES (comma-separated, or set with
+    profile_stages()) also run under cProfile; save_profiles() writes one .prof
+    file per stage for snakeviz or pstats.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self._profilers: Dict[str, cProfile.Profile] = {}
+        self.profiled = {stage.strip() for stage in os.getenv("INGEST_PROFILE_STAGES", "").split(",") if stage.strip()}
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded spans and restart the run clock."""
+        with self._lock:
+            self.stages: Dict[str, Dict[str, Any]] = {}
+            self.started = time.perf_counter()
+
+    def profile_stages(self, *stages: str):
+        """Run the spans of these stages under cProfile from now on."""
+        self.profiled.update(stages)
+
+    def _stats(self, stage: str) -> Dict[str, Any]:
+        if stage not in self.stages:
+            self.stages[stage] = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                  "counters": {}}
+        return self.stages[stage]
+
+    def count(self, stage: str, **counters):
+        """Add to the counters of a stage, e.g. count('parse', input_tokens=1200)."""
+        with self._lock:
+            totals = self._stats(stage)["counters"]
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+
+    @contextmanager
+    def span(self, stage: str, **counters):
+        """
+        Time a block as one call of a stage.
+
+        Args:
+            stage (str): Stage name, one of STAGES for the ingestion path.
+            **counters: Counters known up front, e.g. rows=len(records).
+
+        Yields:
+            dict: Counters to fill in inside the block (e.g. bytes of a response),
+                added to the stage totals when the block exits.
+        """
+        counters = dict(counters)
+        profiler = self._start_profiler(stage)
+        failed = False
+        start = time.perf_counter()
+        try:
+            yield counters
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._profile_lock.release()
+            with self._lock:
+                stats = self._stats(stage)
+                stats["calls"] += 1
+                stats["errors"] += failed
+                stats["seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+                for name, value in counters.items():
+                    stats["counters"][name] = stats["counters"].get(name, 0) + value
+
+    def _start_profiler(self, stage: str) -> Optional[cProfile.Profile]:
+        # cProfile supports one active profiler per process: nested profiled
+        # spans are only counted in the outer one
+        if stage not in self.profiled or not self._profile_lock.acquire(blocking=False):
+            return None
+        profiler = self._profilers.setdefault(stage, cProfile.Profile())
+        profiler.enable()
+        return profiler
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals of the run so far.
+
+        Returns:
+            dict: 'elapsed' seconds since reset() and 'stages', mapping each stage to
+                its 'calls', 'errors', 'seconds', 'mean_seconds', 'max_seconds' and counters.
+        """
+        with self._lock:
+            stages = {}
+            for stage, stats in self.stages.items():
+                stages[stage] = {"calls": stats["calls"], "errors": stats["errors"],
+                                 "seconds": stats["seconds"], "max_seconds": stats["max_seconds"],
+                                 "mean_seconds": stats["seconds"] / stats["calls"] if stats["calls"] else 0.0,
+                                 **stats["counters"]}
+            return {"elapsed": time.perf_counter() - self.started, "stages": stages}
+
+    def report(self) -> str:
+        """Summary table of the run: time, share of the run and throughput per stage."""
+        summary = self.summary()
+        elapsed = summary["elapsed"]
+        lines = [f"{'stage':<12} {'calls':>6} {'errors':>6} {'total s':>9} {'mean s':>8} {'max s':>8} {'% run':>6} "
+                 f"{'rows':>8} {'rows/s':>9} {'MB':>8} {'MB/s':>7} {'tok in':>9} {'tok out':>8}"]
+        ordered = [stage for stage in STAGES if stage in summary["stages"]]
+        ordered += sorted(stage for stage in summary["stages"] if stage not in STAGES)
+        for stage in ordered:
+            stats = summary["stages"][stage]
+            seconds = stats["seconds"]
+            rows = stats.get("rows")
+            megabytes = stats["bytes"] / 1e6 if "bytes" in stats else None
+            rate = lambda value: f"{value / seconds:.1f}" if value is not None and seconds else "-"
+            show = lambda value, fmt: format(value, fmt) if value is not None else "-"
+            lines.append(f"{stage:<12} {stats['calls']:>6} {stats['errors']:>6} {seconds:>9.2f} "
+                         f"{stats['mean_seconds']:>8.3f} {stats['max_seconds']:>8.2f} "
+                         f"{(seconds / elapsed * 100 if elapsed else 0):>6.1f} {show(rows, 'd'):>8} {rate(rows):>9} "
+                         f"{show(megabytes, '.2f'):>8} {rate(megabytes):>7} "
+                         f"{show(stats.get('input_tokens'), 'd'):>9} {show(stats.get('output_tokens'), 'd'):>8}")
+        lines.append(f"Run time {elapsed:.1f} s ('embed' is part of 'prepare')")
+        return "\n".join(lines)
+
+    def save_profiles(self, directory: str = None, top: int = 15) -> Dict[str, str]:
+        """
+        Write the cProfile data of each profiled stage and print its hottest functions.
+
+        Args:
+            directory (str, optional): Output directory. Defaults to INGEST_PROFILE_DIR
+                or <OUTPUT_FOLDER>/profiles.
+            top (int): Number of functions to print per stage, by cumulative time.
+
+        Returns:
+            dict: Stage name to .prof file path.
+        """
+        directory = directory or default_profile_dir()
+        paths = {}
+        for stage, profiler in self._profilers.items():
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{stage}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            profiler.dump_stats(path)
+            paths[stage] = path
+            print(f"\ncProfile of stage '{stage}' written to {path}")
+            pstats.Stats(path).sort_stats("cumulative").print_stats(top)
+        return paths
+
+
+# Process-wide profile shared by the ingestion functions
+ingestion_profile = IngestionProfile()
@@ -0,0 +1,232 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+# Ordered stages an episode moves through during ingestion. An episode's
+# `stage` is the last stage it completed successfully.
+STAGES = ["pending", "scraped", "parsed", "embedded", "inserted"]
+
+STATUS_OK = "ok"
+STATUS_RUNNING = "running"
+STATUS_FAILED = "failed"
+
+
+def next_stage(stage: str) -> Optional[str]:
+    """Return the stage that follows `stage`, or None once an episode is inserted."""
+    index = STAGES.index(stage)
+    return STAGES[index + 1] if index + 1 < len(STAGES) else None
+
+
+class JobManifest:
+    """
+    Durable SQLite record of per-episode ingestion progress.
+
+    Each episode has a current stage (the last one it completed) and a status.
+    Every stage attempt is also logged with its timing and error, so an
+    interrupted run can be resumed from the exact stage it stopped at and a
+    retry only repeats the stage that failed.
+    """
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS episodes (
+                    episode_id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS stage_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    episode_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    duration_seconds REAL,
+                    status TEXT NOT NULL,
+                    error TEXT
+                )
+            """)
+
+    def register(self, episode_id: str, url: str) -> bool:
+        """
+        Add an episode to the manifest in the 'pending' stage.
+
+        Args:
+            episode_id (str): The ASOT episode number.
+            url (str): The episode page URL.
+
+        Returns:
+            bool: True if the episode was added, False if it was already tracked.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO episodes (episode_id, url, stage, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (episode_id, url, "pending", STATUS_OK, time.time())
+            )
+            return cursor.rowcount > 0
+
+    def get(self, episode_id: str) -> Optional[Dict[str, Any]]:
+        """Return the manifest entry for an episode, or None if it is not tracked."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM episodes WHERE episode_id = ?", (episode_id,)).fetchone()
+        return dict(row) if row else None
+
+    def episodes(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List tracked episodes, optionally filtered by status.
+
+        Args:
+            status (str, optional): Only return episodes with this status.
+
+        Returns:
+            list[dict]: Manifest entries ordered by episode number.
+        """
+        query = "SELECT * FROM episodes"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return sorted((dict(row) for row in rows), key=lambda row: int(row["episode_id"]) if row["episode_id"].isdigit() else 0)
+
+    def incomplete(self) -> List[Dict[str, Any]]:
+        """
+        Episodes a resume should continue: not inserted yet and not failed.
+
+        Episodes left 'running' by a crashed run are included, they restart the
+        stage they were in.
+        """
+        return [row for row in self.episodes() if row["stage"] != "inserted" and row["status"] != STATUS_FAILED]
+
+    def failed(self) -> List[Dict[str, Any]]:
+        """Episodes whose last stage attempt failed."""
+        return self.episodes(status=STATUS_FAILED)
+
+    def reset_failed(self) -> List[Dict[str, Any]]:
+        """
+        Mark failed episodes as resumable, keeping the stages they already completed.
+
+        Returns:
+            list[dict]: The entries that were reset.
+        """
+        failed = self.failed()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE episodes SET status = ?, updated_at = ? WHERE status = ?",
+                               (STATUS_OK, time.time(), STATUS_FAILED))
+        return failed
+
+    def begin(self, episode_id: str, stage: str) -> int:
+        """
+        Record the start of a stage attempt.
+
+        Args:
+            episode_id (str): The ASOT episode number.
+            stage (str): The stage being attempted.
+
+        Returns:
+            int: The ID of the stage run, to pass to complete() or fail().
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE episodes SET status = ?, attempts = attempts + 1, updated_at = ? WHERE episode_id = ?",
+                               (STATUS_RUNNING, now, episode_id))
+            cursor = self._conn.execute(
+                "INSERT INTO stage_runs (episode_id, stage, started_at, status) VALUES (?, ?, ?, ?)",
+                (episode_id, stage, now, STATUS_RUNNING)
+            )
+            return cursor.lastrowid
+
+    def complete(self, run_id: int, episode_id: str, stage: str):
+        """Record a successful stage attempt and advance the episode to `stage`."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE stage_runs SET finished_at = ?, duration_seconds = ? - started_at, status = ? WHERE id = ?",
+                (now, now, STATUS_OK, run_id)
+            )
+            self._conn.execute(
+                "UPDATE episodes SET stage = ?, status = ?, error = NULL, updated_at = ? WHERE episode_id = ?",
+                (stage, STATUS_OK, now, episode_id)
+            )
+
+    def fail(self, run_id: int, episode_id: str, error: str):
+        """Record a failed stage attempt. The episode keeps its last completed stage."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE stage_runs SET finished_at = ?, duration_seconds = ? - started_at, status = ?, error = ? WHERE id = ?",
+                (now, now, STATUS_FAILED, error, run_id)
+            )
+            self._conn.execute(
+                "UPDATE episodes SET status = ?, error = ?, updated_at = ? WHERE episode_id = ?",
+                (STATUS_FAILED, error, now, episode_id)
+            )
+
+    @contextmanager
+    def track(self, episode_id: str, stage: str):
+        """
+        Context manager recording one stage attempt.
+
+        The episode advances to `stage` if the block succeeds. If it raises, the
+        failure and error are recorded and the exception propagates.
+        """
+        run_id = self.begin(episode_id, stage)
+        try:
+            yield
+        except Exception as e:
+            self.fail(run_id, episode_id, str(e))
+            raise
+        self.complete(run_id, episode_id, stage)
+
+    def stage_timings(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate successful stage durations.
+
+        Returns:
+            dict: Per stage, the number of runs and total/average seconds.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT stage, COUNT(*) AS runs, SUM(duration_seconds) AS total, AVG(duration_seconds) AS average
+                FROM stage_runs WHERE status = ? GROUP BY stage
+            """, (STATUS_OK,)).fetchall()
+        return {row["stage"]: {"runs": row["runs"], "total": row["total"], "average": row["average"]} for row in rows}
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """
+        Count episodes per stage and status.
+
+        Returns:
+            dict: Mapping of stage to a mapping of status to episode count.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT stage, status, COUNT(*) AS n FROM episodes GROUP BY stage, status").fetchall()
+        result = {}
+        for row in rows:
+            result.setdefault(row["stage"], {})[row["status"]] = row["n"]
+        return result
+
+    def close(self):
+        self._conn.close()
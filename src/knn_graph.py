@@ -0,0 +1,149 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.canonical_tracks import identifies_track, track_key
+from src.migrate_vectors import iter_collection
+from src.song_documents import TRACK_TEXT_FIELDS
+
+import argparse
+import os
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+# Neighbours fetched per requested neighbour, to make up for other appearances of the same track
+SIMILAR_OVERFETCH = 4
+
+
+def graph_path(collection_name: str) -> str:
+    """Where the precomputed neighbour graph of a collection is stored."""
+    return os.path.join(os.getenv("KNN_GRAPH_DIR", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "knn_graphs")),
+                        f"{collection_name}.npz")
+
+
+def distinct_neighbours(source_id, source_key: str, hits: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """
+    Drop the source itself, other appearances of the same track and repeated tracks from search hits.
+
+    Args:
+        source_id: Primary key of the track the neighbours are for.
+        source_key (str): Its canonical track key.
+        hits (list): Search hits, best first, with the TRACK_TEXT_FIELDS in their entity.
+        k (int): Number of neighbours to keep.
+
+    Returns:
+        list: At most k hits, each of a different track.
+    """
+    seen = {source_key}
+    neighbours = []
+    for hit in hits:
+        if hit["id"] == source_id:
+            continue
+        # Songs without an artist or a title can't be told apart, so none is a repeat
+        if identifies_track(hit["entity"]):
+            key = track_key(hit["entity"])
+            if key in seen:
+                continue
+            seen.add(key)
+        neighbours.append(hit)
+        if len(neighbours) == k:
+            break
+    return neighbours
+
+
+class KnnGraph:
+    """
+    Precomputed top-k neighbours of every row of a collection.
+
+    Rows are addressed by primary key through a dictionary, so a lookup is
+    O(1) instead of an ANN search. Missing neighbours are padded with -1.
+    """
+
+    def __init__(self, ids: np.ndarray, neighbours: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.neighbours = neighbours
+        self.scores = scores
+        self._rows = {int(primary_key): row for row, primary_key in enumerate(ids)}
+
+    @property
+    def k(self) -> int:
+        return self.neighbours.shape[1]
+
+    def __contains__(self, primary_key) -> bool:
+        return int(primary_key) in self._rows
+
+    def lookup(self, primary_key, k: int) -> List[Tuple[int, float]]:
+        """The (primary key, score) pairs of the k nearest neighbours."""
+        row = self._rows[int(primary_key)]
+        return [(int(neighbour), float(score)) for neighbour, score in
+                zip(self.neighbours[row, :k], self.scores[row, :k]) if neighbour >= 0]
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ids=self.ids, neighbours=self.neighbours, scores=self.scores)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["KnnGraph"]:
+        """Load a saved graph, or return None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(data["ids"], data["neighbours"], data["scores"])
+
+
+def build_knn_graph(milvus_client, collection_name: str, k: int = 20, batch_size: int = 100) -> KnnGraph:
+    """
+    Compute the k most similar distinct tracks of every row of a collection.
+
+    Stored vectors are streamed back with a query iterator and searched in
+    batches, so nothing is re-embedded.
+
+    Args:
+        milvus_client: MilvusClientASOT instance.
+        collection_name (str): Name of the collection.
+        k (int): Neighbours kept per row.
+        batch_size (int): Rows per batched search.
+
+    Returns:
+        KnnGraph: The graph, also saved to graph_path(collection_name).
+    """
+    primary_field = milvus_client.primary_field(collection_name)
+    ids, neighbours, scores = [], [], []
+    start = time.perf_counter()
+
+    for rows in iter_collection(milvus_client, collection_name, [primary_field, "dense"] + TRACK_TEXT_FIELDS, batch_size):
+        results = milvus_client.search_by_vectors(collection_name, [row["dense"] for row in rows],
+                                                  limit=k * SIMILAR_OVERFETCH + 1, output_fields=TRACK_TEXT_FIELDS)
+        for row, hits in zip(rows, results):
+            kept = distinct_neighbours(row[primary_field], track_key(row), hits, k)
+            ids.append(row[primary_field])
+            neighbours.append([hit["id"] for hit in kept] + [-1] * (k - len(kept)))
+            scores.append([hit["distance"] for hit in kept] + [0.0] * (k - len(kept)))
+        print(f"Computed neighbours of {len(ids)} rows ({time.perf_counter() - start:.1f} s)")
+
+    graph = KnnGraph(np.asarray(ids, dtype=np.int64).reshape(-1),
+                     np.asarray(neighbours, dtype=np.int64).reshape(-1, k),
+                     np.asarray(scores, dtype=np.float32).reshape(-1, k))
+    graph.save(graph_path(collection_name))
+    return graph
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    from src.MilvusClientASOT import MilvusClientASOT
+
+    parser = argparse.ArgumentParser(description="Precompute the similar-tracks neighbour graph of a collection.")
+    parser.add_argument("--collection", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--k", type=int, default=20, help="Neighbours kept per track")
+    parser.add_argument("--batch-size", type=int, default=100, help="Tracks searched per request")
+    args = parser.parse_args()
+
+    graph = build_knn_graph(MilvusClientASOT(), args.collection, k=args.k, batch_size=args.batch_size)
+    print(f"Saved the {graph.k}-NN graph of {len(graph.ids)} rows to {graph_path(args.collection)}")
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.vector_compression import VECTOR_TYPES, PCAProjection, decode_vector, projection_path
+
+import argparse
+import os
+import time
+import numpy as np
+from pymilvus import DataType
+
+
+def copied_fields(description: dict) -> list:
+    """
+    Fields to copy from a collection: everything except auto-generated primary
+    keys and BM25 sparse vectors, which the target regenerates.
+    """
+    fields = []
+    for field in description["fields"]:
+        if field.get("auto_id") or field.get("is_function_output") or field["type"] == DataType.SPARSE_FLOAT_VECTOR:
+            continue
+        fields.append(field["name"])
+    return fields
+
+
+def iter_collection(milvus_client, collection_name: str, output_fields: list, batch_size: int = 1000):
+    """Yield the rows of a collection in batches, with dense vectors decoded to float32."""
+    vector_type = milvus_client.dense_config(collection_name)["vector_type"]
+    iterator = milvus_client.client.query_iterator(collection_name, batch_size=batch_size, filter="",
+                                                   output_fields=output_fields)
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            rows = [dict(row) for row in batch]
+            for row in rows:
+                row["dense"] = decode_vector(row["dense"], vector_type)
+            yield rows
+    finally:
+        iterator.close()
+
+
+def migrate_collection(milvus_client, source: str, target: str, vector_type: str = "float16",
+                       pca_dim: int = None, pca_sample: int = 20000, batch_size: int = 1000) -> dict:
+    """
+    Copy a collection into a new one with compressed dense vectors.
+
+    The source must hold full-dimension vectors (of any precision); a PCA projection
+    is fitted on up to `pca_sample` of them when `pca_dim` is given, and saved where
+    the client looks it up at query time.
+
+    Args:
+        milvus_client: MilvusClientASOT instance.
+        source (str): Existing collection.
+        target (str): Collection to create; must not exist yet.
+        vector_type (str): Storage type of the target dense field.
+        pca_dim (int, optional): Reduced dimension of the target dense field.
+        pca_sample (int): Maximum number of vectors used to fit the projection.
+        batch_size (int): Rows per query and insert batch.
+
+    Returns:
+        dict: Number of 'rows' copied and the target 'vector_type' and 'dim'.
+    """
+    if milvus_client.client.has_collection(target):
+        raise ValueError(f"Target collection {target} already exists")
+    if milvus_client.dense_config(source)["projection"] is not None:
+        raise ValueError(f"Source collection {source} is dimension-reduced; migrate from a full-dimension collection")
+
+    description = milvus_client.client.describe_collection(source)
+    fields = copied_fields(description)
+
+    if pca_dim:
+        sample = []
+        for rows in iter_collection(milvus_client, source, ["dense"], batch_size):
+            sample.extend(row["dense"] for row in rows)
+            if len(sample) >= pca_sample:
+                break
+        print(f"Fitting a {pca_dim}-d PCA projection on {len(sample[:pca_sample])} vectors...")
+        PCAProjection.fit(np.asarray(sample[:pca_sample]), pca_dim).save(projection_path(target))
+
+    if "track_id" in fields:
+        milvus_client.create_tracks_collection_if_not_exists(target, vector_type=vector_type, dim=pca_dim)
+    else:
+        milvus_client.create_collection_if_not_exists(target, vector_type=vector_type, dim=pca_dim)
+
+    copied = 0
+    for rows in iter_collection(milvus_client, source, fields, batch_size):
+        milvus_client.insert_data(target, rows)
+        copied += len(rows)
+        print(f"Copied {copied} rows to {target}")
+
+    config = milvus_client.dense_config(target)
+    return {"rows": copied, "vector_type": config["vector_type"], "dim": config["dim"]}
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    from src.MilvusClientASOT import MilvusClientASOT
+
+    parser = argparse.ArgumentParser(description="Convert a collection to half-precision and/or PCA-reduced dense vectors.")
+    parser.add_argument("--source", default=os.getenv("MILVUS_COLLECTION", "asot_songs"))
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--vector-type", choices=sorted(VECTOR_TYPES), default="float16")
+    parser.add_argument("--pca-dim", type=int, default=None, help="Reduce the dense field to this many dimensions")
+    parser.add_argument("--pca-sample", type=int, default=20000, help="Vectors used to fit the projection")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = migrate_collection(MilvusClientASOT(), args.source, args.target, vector_type=args.vector_type,
+                                pca_dim=args.pca_dim, pca_sample=args.pca_sample, batch_size=args.batch_size)
+    print(f"Migrated {result['rows']} rows to {args.target} ({result['vector_type']}, {result['dim']}-d) "
+          f"in {time.perf_counter() - start:.1f} s")
@@ -31,6 +31,34 @@ def process_asot_episode(url: str, output_dir: str = None, max_retries: int = 3,
         - Path to the saved markdown file
         - Path to the saved JSON file
     """
+    episode, raw_text, markdown_filepath = scrape_asot_episode(url, output_dir, max_retries=max_retries, delay=delay)
+    
+    # Parse the song list
+    print("Step 4: Parsing song list using Claude...")
+    parsed_songs = parse_songs_with_claude(raw_text, episode, url)
+    print("Step 4: Song list parsing completed.")
+    
+    json_filepath = save_parsed_songs(parsed_songs, episode, output_dir)
+    
+    print(f"Successfully processed ASOT Episode {episode}.")
+    return parsed_songs, markdown_filepath, json_filepath
+
+def scrape_asot_episode(url: str, output_dir: str = None, max_retries: int = 3, delay: int = 5) -> Tuple[str, str, str]:
+    """
+    Scrape an ASOT episode page and save its raw markdown.
+
+    Args:
+        url: The URL of the ASOT episode
+        output_dir: Directory to save output files (if None, uses current directory)
+        max_retries: Maximum number of retry attempts for scraping
+        delay: Delay between retry attempts in seconds
+
+    Returns:
+        Tuple containing:
+        - The episode number
+        - The raw markdown content
+        - Path to the saved markdown file
+    """
     # Extract episode number from URL
     episode = extract_episode_number(url)
     if not episode:
@@ -46,7 +74,6 @@ def process_asot_episode(url: str, output_dir: str = None, max_retries: int = 3,
     
     # Define output filenames
     markdown_filepath = os.path.join(output_dir, f"asot_episode_{episode}_raw.md")
-    json_filepath = os.path.join(output_dir, f"asot_episode_{episode}.json")
     
     # Scrape the web content
     print("Step 2: Starting web scraping...")
@@ -63,10 +90,23 @@ def process_asot_episode(url: str, output_dir: str = None, max_retries: int = 3,
         f.write(raw_text)
     print(f"Step 3: Saved raw markdown to {markdown_filepath}")
     
-    # Parse the song list
-    print("Step 4: Parsing song list using Claude...")
-    parsed_songs = parse_songs_with_claude(raw_text, episode, url)
-    print("Step 4: Song list parsing completed.")
+    return episode, raw_text, markdown_filepath
+
+def save_parsed_songs(parsed_songs: List[Dict[str, Any]], episode: str, output_dir: str = None) -> str:
+    """
+    Save an episode's parsed song list to its JSON file.
+
+    Args:
+        parsed_songs: List of dictionaries containing the parsed song data
+        episode: The ASOT episode number
+        output_dir: Directory to save output files (if None, uses current directory)
+
+    Returns:
+        Path to the saved JSON file
+    """
+    if output_dir is None:
+        output_dir = os.getcwd()
+    json_filepath = os.path.join(output_dir, f"asot_episode_{episode}.json")
     
     # Save parsed data to JSON file
     print("Step 5: Saving parsed data to JSON...")
@@ -74,8 +114,7 @@ def process_asot_episode(url: str, output_dir: str = None, max_retries: int = 3,
         json.dump(parsed_songs, f, indent=2, ensure_ascii=False)
     print(f"Step 5: Saved parsed song data to {json_filepath}")
     
-    print(f"Successfully processed ASOT Episode {episode}.")
-    return parsed_songs, markdown_filepath, json_filepath
+    return json_filepath
 
 def extract_episode_number(url: str) -> str:
     """
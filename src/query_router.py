@@ -0,0 +1,181 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, Callable, List, Tuple
+import numpy as np
+
+# ASOT 001 aired on 18 May 2001; the show has been (nearly) weekly since
+ASOT_FIRST_BROADCAST = date(2001, 5, 18)
+
+# Latency samples kept per route
+LATENCY_WINDOW = 1000
+
+_EPISODE_PREFIX = r"(?:asot|a state of trance|episode|ep\.?)[\s_-]*#?\s*(\d{1,4})"
+
+# "asot 1119 number 1", "episode 329 #3", "ep 500 track 2"
+EPISODE_RANKING_PATTERN = re.compile(
+    rf"^{_EPISODE_PREFIX}\s*(?:number|no\.?|nr\.?|#|rank(?:ing)?|position|pos\.?|track)\s*(\d{{1,3}})$")
+# "episode 329", "asot1119", "asot-1110"
+EPISODE_PATTERN = re.compile(rf"^{_EPISODE_PREFIX}$")
+# "top voted tracks 2008", "most popular songs", "top voted of 2010"
+TOP_PATTERN = re.compile(
+    r"^(?:the\s+)?(?:top|most|best)[\s-]+(voted|popular)(?:\s+(?:tracks?|songs?))?(?:\s+(?:of|in|from))?(?:\s+(\d{4}))?$")
+# "tracks by Armin van Buuren", "by Aly & Fila"
+ARTIST_PREFIX_PATTERN = re.compile(r"^(?:(?:tracks?|songs?)\s+)?by\s+")
+
+# Field ranked by each TOP_PATTERN keyword
+TOP_SORT_FIELDS = {"voted": "vote_count", "popular": "popularity_score"}
+
+
+def normalize_query(query_text: str) -> str:
+    """Lowercase and collapse whitespace."""
+    return " ".join(query_text.lower().split())
+
+
+def quote(value: str) -> str:
+    """Quote a string literal for a Milvus filter expression."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def episodes_of_year(year: int) -> List[str]:
+    """
+    Approximate episode IDs broadcast in a year, assuming one episode a week since ASOT 001.
+
+    The show skipped weeks over the years, so the boundaries drift by up to a few
+    dozen episodes in later years; good enough to rank a year's votes, not to date an episode.
+    """
+    first = max(1, (date(year, 1, 1) - ASOT_FIRST_BROADCAST).days // 7 + 2)
+    last = (date(year, 12, 31) - ASOT_FIRST_BROADCAST).days // 7 + 1
+    return [str(episode) for episode in range(first, last + 1)]
+
+
+def episode_year(episode_number: int) -> int:
+    """Approximate broadcast year of an episode; the inverse of episodes_of_year."""
+    return (ASOT_FIRST_BROADCAST + timedelta(weeks=episode_number - 1)).year
+
+
+class QueryRouter:
+    """
+    Query understanding in front of the search methods.
+
+    Structural queries (an episode, a position in an episode, the top voted
+    tracks, an exact artist name) are answered with scalar filters, skipping
+    the embedding model and the ANN search; anything else goes to vector
+    search. The latency of every route is recorded.
+    """
+
+    def __init__(self, search_client, collection_name: str, artist_refresh_seconds: float = 600):
+        """
+        Args:
+            search_client: MilvusClientASOT or TieredSearchASOT instance.
+            collection_name (str): Collection the scalar queries run against.
+            artist_refresh_seconds (float): How long the list of known artists is cached.
+        """
+        self.search_client = search_client
+        self.collection_name = collection_name
+        self.artist_refresh_seconds = artist_refresh_seconds
+        self._artists = {}
+        self._artists_loaded_at = None
+        self._artists_lock = threading.Lock()
+        self._latencies = {}
+
+    def known_artists(self) -> Dict[str, str]:
+        """Normalized artist name -> stored artist name, refreshed periodically."""
+        with self._artists_lock:
+            now = time.monotonic()
+            if self._artists_loaded_at is None or now - self._artists_loaded_at > self.artist_refresh_seconds:
+                artists = self.search_client.list_artists(self.collection_name)
+                self._artists = {normalize_query(artist): artist for artist in artists}
+                self._artists_loaded_at = now
+            return self._artists
+
+    def parse(self, query_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a query.
+
+        Args:
+            query_text (str): The user query.
+
+        Returns:
+            dict | None: 'route', 'filter', 'sort_by' and 'descending' for a structural
+                query, or None when the query needs a vector search.
+        """
+        query = normalize_query(query_text)
+
+        match = EPISODE_RANKING_PATTERN.match(query)
+        if match:
+            episode_id, ranking = str(int(match.group(1))), int(match.group(2))
+            return {"route": "episode_ranking", "filter": f"episode_id == {quote(episode_id)} and ranking == {ranking}",
+                    "sort_by": "ranking", "descending": False}
+
+        match = EPISODE_PATTERN.match(query)
+        if match:
+            episode_id = str(int(match.group(1)))
+            return {"route": "episode", "filter": f"episode_id == {quote(episode_id)}",
+                    "sort_by": "ranking", "descending": False}
+
+        match = TOP_PATTERN.match(query)
+        if match:
+            sort_by = TOP_SORT_FIELDS[match.group(1)]
+            filter_expr = f"{sort_by} > 0"
+            if match.group(2):
+                filter_expr += f" and episode_id in {episodes_of_year(int(match.group(2)))}"
+            return {"route": "top", "filter": filter_expr, "sort_by": sort_by, "descending": True}
+
+        artist = self.known_artists().get(ARTIST_PREFIX_PATTERN.sub("", query))
+        if artist is not None:
+            return {"route": "artist", "filter": f"artist == {quote(artist)}",
+                    "sort_by": "episode_id", "descending": True}
+
+        return None
+
+    def search(self, query_text: str, limit: int, vector_search: Callable[[], list]) -> Tuple[list, str, float]:
+        """
+        Answer a query through the matching route.
+
+        Args:
+            query_text (str): The user query.
+            limit (int): Maximum number of results.
+            vector_search (callable): Runs the vector search for free-text queries.
+
+        Returns:
+            Tuple containing:
+            - The hits
+            - The route taken ('episode', 'episode_ranking', 'top', 'artist' or 'vector')
+            - The latency in milliseconds
+        """
+        start = time.perf_counter()
+        parsed = self.parse(query_text)
+        if parsed is None:
+            route, results = "vector", vector_search()
+        else:
+            route = parsed["route"]
+            results = self.search_client.scalar_search(self.collection_name, parsed["filter"], limit=limit,
+                                                       sort_by=parsed["sort_by"], descending=parsed["descending"])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._latencies.setdefault(route, deque(maxlen=LATENCY_WINDOW)).append(elapsed_ms)
+        return results, route, elapsed_ms
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Latency of each route over the last LATENCY_WINDOW queries.
+
+        Returns:
+            dict: Route -> 'count', 'mean_ms', 'p50_ms' and 'p95_ms'.
+        """
+        summary = {}
+        for route, samples in list(self._latencies.items()):
+            values = np.asarray(samples)
+            summary[route] = {
+                "count": len(values),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(np.percentile(values, 50)),
+                "p95_ms": float(np.percentile(values, 95)),
+            }
+        return summary
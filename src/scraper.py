@@ -2,33 +2,55 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from firecrawl.firecrawl import FirecrawlApp
+from src.http_client import request_with_retry
+from src.ingestion_profile import ingestion_profile
 
 import os
-import time
 
-app = FirecrawlApp(api_key=os.getenv("FIREWCRAWL_API_KEY"))
+FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
 
 def scrape_url_with_retry(url, max_retries=3, delay=5):
-    """Scrape a URL with retry logic"""
-    for attempt in range(max_retries):
+    """
+    Scrape a URL with retry logic.
+
+    Transient HTTP failures (timeouts, 429 and 5xx responses) are retried with
+    exponential backoff and jitter by the shared HTTP client, honoring any
+    Retry-After header, while client errors such as an invalid API key fail
+    fast. A response without markdown is reported as a failure, not retried.
+
+    Args:
+        url: The URL to scrape.
+        max_retries: Maximum number of attempts.
+        delay: Base delay for the backoff, in seconds.
+
+    Returns:
+        The Firecrawl scrape data (containing a 'markdown' key), or None on failure.
+    """
+    headers = {
+        "Authorization": f"Bearer {os.getenv('FIREWCRAWL_API_KEY')}",
+        "Content-Type": "application/json",
+    }
+    payload = {"url": url, "formats": ["markdown"]}
+
+    with ingestion_profile.span("scrape") as counters:
         try:
-            print(f"Scraping {url} (Attempt {attempt + 1}/{max_retries})")
-            scrape_status = app.scrape_url(
-                url,
-                params={'formats': ['markdown']}
+            print(f"Scraping {url} (up to {max_retries} attempts)")
+            response = request_with_retry(
+                "POST",
+                f"{FIRECRAWL_API_URL}/v1/scrape",
+                max_retries=max_retries,
+                base_delay=delay,
+                headers=headers,
+                json=payload,
             )
-            
-            # Check if the scrape was successful
-            if scrape_status and 'markdown' in scrape_status:
-                return scrape_status
-            
-            print(f"Scrape incomplete, retrying in {delay} seconds...")
-            time.sleep(delay)
+            scrape_status = response.json().get("data")
         except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
-            print(f"Retrying in {delay} seconds...")
-            time.sleep(delay)
-    
-    print(f"Failed to scrape {url} after {max_retries} attempts")
-    return None
\ No newline at end of file
+            print(f"Failed to scrape {url}: {str(e)}")
+            return None
+
+        # Check if the scrape was successful
+        if not scrape_status or not scrape_status.get('markdown'):
+            print(f"Scrape of {url} returned no markdown")
+            return None
+        counters["bytes"] = len(scrape_status['markdown'].encode('utf-8'))
+        return scrape_status
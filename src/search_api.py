@@ -0,0 +1,496 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.Logger import Logger
+from src.canonical_tracks import TrackAppearances, search_tracks, similar_canonical_tracks
+from src import search_metrics
+
+import argparse
+import json
+import os
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, Any, List, Tuple
+
+SEARCH_TYPES = ["dense", "sparse", "hybrid", "rrf", "tracks"]
+MAX_LIMIT = 100
+ENDPOINTS = ["/search", "/similar", "/suggest", "/stats", "/health", "/metrics"]
+# Seconds between checks, while a keep-alive connection is idle, of whether others wait for its thread
+IDLE_POLL = 0.25
+
+api_requests = search_metrics.registry.counter("asot_api_requests_total", "API requests by endpoint and status.",
+                                               ("endpoint", "status"))
+api_duration = search_metrics.registry.histogram("asot_api_request_duration_seconds",
+                                                 "API request latency, until the response is sent.", ("endpoint",))
+
+
+class BadRequest(ValueError):
+    """Invalid request parameters, answered with a 400."""
+
+
+class Overloaded(RuntimeError):
+    """Every operation worker is busy (including with timed-out operations), answered with a 503."""
+
+
+def raw_hit(hit) -> Dict[str, Any]:
+    """Plain JSON-serializable copy of a search hit."""
+    return {"id": hit["id"], "distance": float(hit["distance"]), "entity": dict(hit["entity"])}
+
+
+def _int_param(params: Dict[str, Any], name: str, default: int, minimum: int = 1, maximum: int = MAX_LIMIT) -> int:
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise BadRequest(f"'{name}' must be an integer")
+    if not minimum <= value <= maximum:
+        raise BadRequest(f"'{name}' must be between {minimum} and {maximum}")
+    return value
+
+
+def _float_param(params: Dict[str, Any], name: str, default: float) -> float:
+    try:
+        return float(params.get(name, default))
+    except (TypeError, ValueError):
+        raise BadRequest(f"'{name}' must be a number")
+
+
+class SearchAPI:
+    """
+    The operations behind the JSON API, on objects shared with the search UI.
+
+    Hits are returned as stored, without DataFrame formatting. The embedding
+    model and Milvus connection are those of the given clients, so running the
+    API inside the Gradio process costs no extra memory.
+    """
+
+    def __init__(self, search_client, collection_name: str, query_router=None, typeahead=None, stats_service=None,
+                 milvus_client=None, tracks_collection: str = None, track_appearances=None):
+        """
+        Args:
+            search_client: MilvusClientASOT or TieredSearchASOT instance.
+            collection_name (str): Song collection searched.
+            query_router (QueryRouter, optional): Answers structural queries with scalar filters.
+            typeahead (TypeaheadIndex, optional): Backs /suggest.
+            stats_service (StatsService, optional): Backs /stats.
+            milvus_client (MilvusClientASOT, optional): Client of the canonical tracks collection.
+            tracks_collection (str, optional): Canonical tracks collection, for type=tracks.
+            track_appearances (TrackAppearances, optional): Appearance store of the tracks collection.
+        """
+        self.search_client = search_client
+        self.collection_name = collection_name
+        self.query_router = query_router
+        self.typeahead = typeahead
+        self.stats_service = stats_service
+        self.milvus_client = milvus_client
+        self.tracks_collection = tracks_collection
+        self.track_appearances = track_appearances
+        if stats_service is not None:
+            search_metrics.registry.gauge("asot_stats_cache_age_seconds",
+                                          "Seconds since the cached collection stats were computed.",
+                                          stats_service.age_seconds)
+
+    def search(self, params: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Run a search.
+
+        Args:
+            params (dict): 'q', and optionally 'type' (one of SEARCH_TYPES, default
+                'hybrid'), 'limit', 'sparse_weight', 'dense_weight', 'k' (RRF) and
+                'route' ('false' to skip the query router).
+
+        Returns:
+            Tuple containing:
+            - Metadata: 'query', 'type', 'route' and 'took_ms'
+            - The raw hits
+        """
+        query = str(params.get("q", "")).strip()
+        if not query:
+            raise BadRequest("'q' is required")
+        search_type = params.get("type", "hybrid")
+        if search_type not in SEARCH_TYPES:
+            raise BadRequest(f"'type' must be one of {SEARCH_TYPES}")
+        limit = _int_param(params, "limit", 10)
+        weights = {"sparse_weight": _float_param(params, "sparse_weight", 0.3),
+                   "dense_weight": _float_param(params, "dense_weight", 0.7)}
+        rrf_k = _int_param(params, "k", 60, maximum=1000)
+
+        start = time.perf_counter()
+        route = "vector"
+        if search_type == "tracks":
+            if self.tracks_collection is None:
+                raise BadRequest("The canonical tracks collection is not configured")
+            results = search_tracks(self.milvus_client, self.tracks_collection, query, self.track_appearances,
+                                    limit=limit, ranker_type="weighted", **weights)
+        else:
+            def vector_search():
+                if search_type == "sparse":
+                    return self.search_client.sparse_search(self.collection_name, query, limit=limit)
+                if search_type == "dense":
+                    return self.search_client.dense_search(self.collection_name, query, limit=limit)
+                if search_type == "rrf":
+                    return self.search_client.hybrid_search(self.collection_name, query, limit=limit,
+                                                            ranker_type="rrf", k=rrf_k)
+                return self.search_client.hybrid_search(self.collection_name, query, limit=limit,
+                                                        ranker_type="weighted", **weights)
+
+            if self.query_router is not None and str(params.get("route", "true")).lower() != "false":
+                results, route, _ = self.query_router.search(query, limit, vector_search)
+            else:
+                results = vector_search()
+
+        meta = {"query": query, "type": search_type, "route": route,
+                "took_ms": round((time.perf_counter() - start) * 1000, 3)}
+        return meta, [raw_hit(hit) for hit in results]
+
+    def similar(self, params: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Tracks similar to 'id' (of the song collection, or of the tracks collection with type=tracks)."""
+        try:
+            primary_key = int(params["id"])
+        except (KeyError, TypeError, ValueError):
+            raise BadRequest("'id' must be an integer primary key")
+        k = _int_param(params, "k", 10)
+
+        start = time.perf_counter()
+        if params.get("type") == "tracks":
+            if self.tracks_collection is None:
+                raise BadRequest("The canonical tracks collection is not configured")
+            results = similar_canonical_tracks(self.milvus_client, self.tracks_collection, primary_key,
+                                               self.track_appearances, k=k)
+        else:
+            results = self.search_client.similar_tracks(self.collection_name, primary_key, k=k)
+        meta = {"id": primary_key, "took_ms": round((time.perf_counter() - start) * 1000, 3)}
+        return meta, [raw_hit(hit) for hit in results]
+
+    def suggest(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.typeahead is None:
+            raise BadRequest("Autocomplete is disabled")
+        return {"suggestions": self.typeahead.suggest(str(params.get("q", "")), limit=_int_param(params, "limit", 8))}
+
+    def stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self.stats_service is None:
+            raise BadRequest("Collection stats are not available")
+        return self.stats_service.get()
+
+
+class SearchAPIHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP/1.1.
+
+    Connections are kept alive between requests until they sit idle for the
+    server's idle timeout, or until other connections are waiting for a
+    connection thread. Hit lists are streamed with chunked transfer
+    encoding, one hit per chunk, so clients can parse while the rest is sent.
+
+    GET (query string) or POST (JSON body):
+        /search   q, type, limit, sparse_weight, dense_weight, k, route
+        /similar  id, k, type
+        /suggest  q, limit
+        /stats
+        /health
+        /metrics  Prometheus text format (GET)
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "AISOTSearchAPI/1.0"
+
+    def setup(self):
+        # Socket timeout: bounds both slow request reads and idle keep-alive connections
+        self.timeout = self.server.idle_timeout
+        super().setup()
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._await_request():
+            self.handle_one_request()
+
+    def _await_request(self) -> bool:
+        """Wait for the next request of a kept-alive connection; False when it should be closed instead."""
+        deadline = time.monotonic() + self.server.idle_timeout
+        while True:
+            # A pipelined request may already be buffered, where select() cannot see it
+            self.connection.setblocking(False)
+            try:
+                if self.rfile.peek(1):
+                    return True
+            except OSError:
+                return False
+            finally:
+                self.connection.settimeout(self.timeout)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.server.saturated():
+                return False
+            readable, _, _ = select.select([self.connection], [], [], min(IDLE_POLL, remaining))
+            if readable:
+                return True
+
+    def log_message(self, format, *args):
+        self.server.logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self._dispatch(url.path, {name: values[-1] for name, values in parse_qs(url.query).items()})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            if not isinstance(params, dict):
+                raise ValueError("the body must be a JSON object")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+        self._dispatch(url.path, params)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def _dispatch(self, path: str, params: Dict[str, Any]):
+        if not search_metrics.registry.enabled:
+            self._respond(path, params)
+            return
+        start = time.perf_counter()
+        self._status = None
+        try:
+            self._respond(path, params)
+        finally:
+            # Unknown paths share one label, so scanners cannot grow the series without bound
+            endpoint = path if path in ENDPOINTS else "other"
+            api_duration.observe((endpoint,), time.perf_counter() - start)
+            api_requests.inc((endpoint, str(self._status)))
+
+    def _respond(self, path: str, params: Dict[str, Any]):
+        api = self.server.api
+        operations = {"/search": api.search, "/similar": api.similar, "/suggest": api.suggest, "/stats": api.stats}
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+            return
+        if path == "/metrics":
+            self._send_text(200, search_metrics.registry.render(), search_metrics.CONTENT_TYPE)
+            return
+        if path not in operations:
+            self._send_json(404, {"error": f"Unknown endpoint {path}"})
+            return
+
+        try:
+            result = self.server.run(operations[path], params)
+        except BadRequest as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except FutureTimeoutError:
+            self._send_json(504, {"error": f"Request timed out after {self.server.request_timeout} s"})
+            return
+        except Overloaded as e:
+            self._send_json(503, {"error": str(e)}, headers={"Retry-After": "1"})
+            return
+        except Exception as e:
+            self.server.logger.error(f"{path} failed: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+
+        if isinstance(result, tuple):
+            self._stream_hits(*result)
+        else:
+            self._send_json(200, result)
+
+    def end_headers(self):
+        # Connections waiting for a thread go first: end this one instead of keeping it alive
+        if not self.close_connection and self.server.saturated():
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_text(self, status: int, text: str, content_type: str):
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _stream_hits(self, meta: Dict[str, Any], hits: List[Dict[str, Any]]):
+        """Send {...meta, "count": n, "hits": [...]} as one chunk per hit."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        head = json.dumps({**meta, "count": len(hits)}, default=str)
+        self._write_chunk((head[:-1] + ', "hits": [').encode("utf-8"))
+        for i, hit in enumerate(hits):
+            self._write_chunk(((", " if i else "") + json.dumps(hit, default=str)).encode("utf-8"))
+        self._write_chunk(b"]}")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class SearchAPIServer(HTTPServer):
+    """
+    HTTP server handling connections and operations on two thread pools.
+
+    Keep-alive connections are served by a pool of `connections` threads, a
+    thread per open connection. When every connection thread is taken, idle
+    connections are closed and the next response on each busy one closes it,
+    so connections waiting to be served are not held up by idle ones.
+
+    Operations run on a pool of `workers` threads, so a request that takes
+    longer than `request_timeout` is answered with a 504 instead of holding its
+    connection indefinitely. A timed-out operation keeps its worker until it
+    finishes; new requests wait for a free worker for at most `request_timeout`
+    and are answered with a 503 otherwise, instead of queueing without bound.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, api: SearchAPI, host: str = None, port: int = None, workers: int = None,
+                 request_timeout: float = None, idle_timeout: float = None, connections: int = None):
+        """
+        Args:
+            api (SearchAPI): Operations to serve.
+            host (str, optional): Defaults to SEARCH_API_HOST or 127.0.0.1.
+            port (int, optional): Defaults to SEARCH_API_PORT or 8000.
+            workers (int, optional): Concurrent operations (searches). Defaults to SEARCH_API_WORKERS or 8.
+            request_timeout (float, optional): Seconds an operation may take. Defaults to SEARCH_API_TIMEOUT or 10.
+            idle_timeout (float, optional): Seconds a keep-alive connection may stay idle.
+                Defaults to SEARCH_API_IDLE_TIMEOUT or 15.
+            connections (int, optional): Connections served at a time. Defaults to
+                SEARCH_API_CONNECTIONS, or four per operation worker.
+        """
+        self.api = api
+        self.logger = Logger('api_logger', os.getenv("LOG_MISC", "DEBUG")).logger
+        # Empty values, as in env.example, count as unset
+        self.workers = workers or int(os.getenv("SEARCH_API_WORKERS") or 8)
+        self.connections = connections or int(os.getenv("SEARCH_API_CONNECTIONS") or 4 * self.workers)
+        self.request_timeout = request_timeout or float(os.getenv("SEARCH_API_TIMEOUT") or 10)
+        self.idle_timeout = idle_timeout or float(os.getenv("SEARCH_API_IDLE_TIMEOUT") or 15)
+        self._connections = ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="api-conn")
+        self._operations = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="api-op")
+        # One slot per operation worker, held until the operation finishes (not until it times out)
+        self._operation_slots = threading.BoundedSemaphore(self.workers)
+        self._open_connections = 0
+        self._open_lock = threading.Lock()
+        super().__init__((host or os.getenv("SEARCH_API_HOST") or "127.0.0.1",
+                          port if port is not None else int(os.getenv("SEARCH_API_PORT") or 8000)), SearchAPIHandler)
+
+    def run(self, operation, params: Dict[str, Any]):
+        """Run an operation on the operation pool, waiting at most request_timeout in all."""
+        deadline = time.monotonic() + self.request_timeout
+        if not self._operation_slots.acquire(timeout=self.request_timeout):
+            raise Overloaded(f"All {self.workers} workers busy for {self.request_timeout} s")
+        try:
+            future = self._operations.submit(operation, params)
+        except BaseException:
+            self._operation_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._operation_slots.release())
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+
+    def saturated(self) -> bool:
+        """Whether accepted connections are waiting for a connection thread."""
+        return self._open_connections > self.connections
+
+    def process_request(self, request, client_address):
+        with self._open_lock:
+            self._open_connections += 1
+        self._connections.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._open_lock:
+                self._open_connections -= 1
+
+    def server_close(self):
+        super().server_close()
+        self._connections.shutdown(wait=False, cancel_futures=True)
+        self._operations.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> threading.Thread:
+        """Serve in a daemon thread, e.g. alongside the Gradio app."""
+        thread = threading.Thread(target=self.serve_forever, name="search-api", daemon=True)
+        thread.start()
+        self.logger.info(f"Search API listening on http://{self.server_address[0]}:{self.server_address[1]} "
+                         f"with {self.workers} workers and {self.connections} connections")
+        return thread
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    from src.MilvusClientASOT import MilvusClientASOT
+    from src.TieredSearchASOT import TieredSearchASOT
+    from src.query_router import QueryRouter
+    from src.typeahead import build_from_collections, build_from_corpus
+    from src.stats_service import StatsService
+    from src.ingest_events import IngestEventLog
+
+    parser = argparse.ArgumentParser(description="Serve the search methods as a JSON API (without the Gradio UI).")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--connections", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds a request may take")
+    args = parser.parse_args()
+
+    milvus_client = MilvusClientASOT()
+    collection_name = os.getenv("MILVUS_COLLECTION", "asot_songs")
+    tiered = os.getenv("TIERED_COLLECTIONS", "false").lower() == "true"
+    search_client = TieredSearchASOT(milvus_client) if tiered else milvus_client
+    query_router = (QueryRouter(search_client, collection_name)
+                    if os.getenv("QUERY_ROUTER", "true").lower() == "true" else None)
+    tracks_collection = os.getenv("TRACKS_COLLECTION") or None
+
+    # Autocomplete and collection stats as in the search app, kept current from the ingest events
+    searched_collections = ([TieredSearchASOT.hot_collection(collection_name),
+                             TieredSearchASOT.cold_collection(collection_name)] if tiered else [collection_name])
+    ingest_events = IngestEventLog()
+    typeahead_source = os.getenv("TYPEAHEAD", "collection").lower()
+    typeahead = None
+    if typeahead_source != "off":
+        typeahead = (build_from_corpus() if typeahead_source == "corpus"
+                     else build_from_collections(milvus_client, searched_collections))
+    stats_service = StatsService(search_client, collection_name)
+    stats_service.start()
+
+    def on_ingest(event):
+        if event["collection"] not in searched_collections:
+            return
+        if typeahead is not None:
+            typeahead.add(event["records"])
+        stats_service.notify()
+
+    ingest_events.follow(on_ingest)
+
+    api = SearchAPI(search_client, collection_name, query_router=query_router, typeahead=typeahead,
+                    stats_service=stats_service, milvus_client=milvus_client, tracks_collection=tracks_collection,
+                    track_appearances=TrackAppearances() if tracks_collection else None)
+
+    server = SearchAPIServer(api, host=args.host, port=args.port, workers=args.workers, request_timeout=args.timeout,
+                             connections=args.connections)
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,289 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Upper bounds of the latency histograms, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the result size histograms, in hits
+RESULT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with one value per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        """Add to the counter of a label combination, given as a tuple in labelnames order."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(values)]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, one series per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per series: [count per bucket (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        """Record a value for a label combination, given as a tuple in labelnames order."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = []
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time, e.g. the age of a cache."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        value = self.callback()
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+
+    Metrics are registered once by name; registering an existing name returns
+    the metric already registered, so modules can declare the metrics they use
+    at import time.
+    """
+
+    def __init__(self, enabled: bool = None):
+        """
+        Args:
+            enabled (bool, optional): Whether instrumented code records anything.
+                Defaults to SEARCH_METRICS (true unless set to false).
+        """
+        self.enabled = enabled if enabled is not None else os.getenv("SEARCH_METRICS", "true").lower() == "true"
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback) -> Gauge:
+        """Register (or replace) a gauge read from callback() when rendering."""
+        gauge = Gauge(name, documentation, callback)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry, rendered by the search API's /metrics endpoint
+registry = MetricsRegistry()
+
+search_requests = registry.counter("asot_search_requests_total", "Searches by method and ranker.",
+                                   ("method", "ranker"))
+search_errors = registry.counter("asot_search_errors_total", "Failed searches by method, ranker and exception.",
+                                 ("method", "ranker", "error"))
+search_duration = registry.histogram("asot_search_duration_seconds",
+                                     "Search latency, including embedding and Milvus calls.", ("method", "ranker"))
+embedding_duration = registry.histogram("asot_embedding_duration_seconds", "Query embedding latency.", ("method",))
+rpc_duration = registry.histogram("asot_milvus_rpc_duration_seconds",
+                                  "Milvus search call latency, including result decoding.", ("method", "ranker"))
+result_size = registry.histogram("asot_search_results", "Hits returned per search.", ("method", "ranker"),
+                                 buckets=RESULT_BUCKETS)
+cache_requests = registry.counter("asot_cache_requests_total", "Client cache lookups by cache and result.",
+                                  ("cache", "result"))
+
+
+RANKER_TYPES = ("weighted", "rrf")
+
+
+def ranker_label(ranker_type: str) -> str:
+    """The 'ranker' label of a hybrid search, bounded to known types (anything else is 'unknown')."""
+    ranker_type = ranker_type.lower()
+    return ranker_type if ranker_type in RANKER_TYPES else "unknown"
+
+
+class SearchObservation:
+    """
+    Measurements of one search, recorded when its `with` block exits.
+
+    Created by track(); the search calls time_embedding() and time_rpc() around
+    the embedding model and Milvus, and results() on what it returns.
+    """
+
+    __slots__ = ("labels", "method", "start")
+
+    def __init__(self, method: str, ranker: str):
+        self.method = method
+        self.labels = (method, ranker)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        search_duration.observe(self.labels, time.perf_counter() - self.start)
+        search_requests.inc(self.labels)
+        if exc_type is not None:
+            search_errors.inc(self.labels + (exc_type.__name__,))
+        return False
+
+    def time_embedding(self, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        embedding_duration.observe((self.method,), time.perf_counter() - start)
+        return result
+
+    def time_rpc(self, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        rpc_duration.observe(self.labels, time.perf_counter() - start)
+        return result
+
+    def results(self, hits):
+        result_size.observe(self.labels, len(hits))
+        return hits
+
+
+class _NoObservation:
+    """Stand-in for SearchObservation when metrics are disabled: calls straight through."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def time_embedding(self, function, *args):
+        return function(*args)
+
+    def time_rpc(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+    def results(self, hits):
+        return hits
+
+
+_NO_OBSERVATION = _NoObservation()
+
+
+def track(method: str, ranker: str = "none"):
+    """
+    Instrument one search.
+
+    Example:
+        with track("dense_search") as observation:
+            vector = observation.time_embedding(embed, text)
+            hits = observation.time_rpc(client.search, ...)[0]
+            return observation.results(hits)
+
+    Args:
+        method (str): Client method name, the 'method' label.
+        ranker (str): Hybrid ranker type, the 'ranker' label ('none' for single searches).
+    """
+    return SearchObservation(method, ranker) if registry.enabled else _NO_OBSERVATION
+
+
+def cache_lookup(cache: str, hit: bool):
+    """Count a lookup of one of the client's caches."""
+    if registry.enabled:
+        cache_requests.inc((cache, "hit" if hit else "miss"))
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Dict, Any
+
+# Fields concatenated into the searchable 'text' field
+TEXT_FIELDS = ['episode_id', 'ranking', 'artist', 'collaborators', 'featured_artists', 'title', 'remix_info', 'popularity_score', 'vote_count', 'URL']
+
+# Scalar fields returned with every search hit
+OUTPUT_FIELDS = ["episode_id", "text", "ranking", "artist", "collaborators", "featured_artists", "title", "remix_info", "popularity_score", "vote_count", "URL"]
+
+# Placeholder stored for missing values, per field type
+STRING_DEFAULT = 'nav'
+INT_DEFAULT = -1
+INT_FIELDS = {"ranking", "popularity_score", "vote_count"}
+
+# Prefix the e5 models expect in front of every embedded text
+EMBEDDING_PREFIX = "query: "
+
+
+def build_document_text(doc: Dict[str, Any]) -> str:
+    """
+    Construct the text field of a song by concatenating its TEXT_FIELDS.
+
+    Args:
+        doc (dict): Song record with Milvus field names.
+
+    Returns:
+        str: The text that is both BM25-indexed and embedded.
+    """
+    text_parts = []
+    for field in TEXT_FIELDS:
+        value = doc.get(field)
+        # Only include non-null, non-default values
+        if value is not None and value != STRING_DEFAULT and value != INT_DEFAULT:
+            text_parts.append(str(value))
+    return " ".join(text_parts)
+
+
+def build_data_point(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the scalar fields stored for a song, replacing missing values with placeholders.
+
+    Args:
+        doc (dict): Song record with Milvus field names.
+
+    Returns:
+        dict: Every field of OUTPUT_FIELDS except 'text'.
+    """
+    # Explicitly handle None values for each field
+    data_point = {}
+    for field in OUTPUT_FIELDS:
+        if field == "text":
+            continue
+        value = doc.get(field)
+        if value is None:
+            value = INT_DEFAULT if field in INT_FIELDS else STRING_DEFAULT
+        data_point[field] = value
+    return data_point
+
+
+# Fields describing a track independently of where it charted
+TRACK_TEXT_FIELDS = ['artist', 'collaborators', 'featured_artists', 'title', 'remix_info']
+
+# Scalar fields returned with every hit of the canonical tracks collection
+TRACK_OUTPUT_FIELDS = ["track_key", "text", "artist", "collaborators", "featured_artists", "title", "remix_info"]
+
+
+def build_track_text(doc: Dict[str, Any]) -> str:
+    """
+    Construct the text of a canonical track, leaving out episode-specific fields.
+
+    Args:
+        doc (dict): Song record with Milvus field names.
+
+    Returns:
+        str: The text that is both BM25-indexed and embedded for the track.
+    """
+    text_parts = []
+    for field in TRACK_TEXT_FIELDS:
+        value = doc.get(field)
+        if value is not None and value != STRING_DEFAULT:
+            text_parts.append(str(value))
+    return " ".join(text_parts)
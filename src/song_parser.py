@@ -2,29 +2,84 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import requests
+from src.http_client import request_with_retry
+from src.ingestion_profile import ingestion_profile
+
 import json
 import os
 import re
 from typing import List, Dict, Any, Optional
 
-def parse_songs_with_claude(raw_text: str, episode: str, url: str) -> List[Dict[str, Any]]:
+ANTHROPIC_API_URL = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com")
+CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-sonnet-20240229")
+
+def clean_tracklist(raw_text: str) -> str:
     """
-    Parse ASOT song list using Claude LLM with robust handling of varied formats.
-    
+    Reduce a scraped episode page to its tracklist.
+
+    Episode pages carry a navigation header before the first top-level heading
+    and a long newsletter form after the tracklist. Both are cut, along with
+    image/link-only lines and blank lines. Falls back to the raw text if no
+    tracklist section can be found.
+
     Args:
-        raw_text: Raw text with song listings in any format
-        episode: The ASOT episode number or identifier.
-        url: The URL source of the song list.
-        
+        raw_text: Raw markdown scraped from the episode page.
+
     Returns:
-        List of dictionaries with parsed song data, including episode and url fields.
+        The cleaned tracklist text.
+    """
+    lines = raw_text.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith("# ")), None)
+    if start is None:
+        return raw_text
+
+    section = []
+    for line in lines[start:]:
+        stripped = line.strip()
+        if stripped.startswith("#### Newsletter"):
+            break
+        if not stripped or re.fullmatch(r'!?\[.*\]\(.*\)', stripped):
+            continue
+        section.append(stripped)
+
+    # Only the heading survived: keep the raw text rather than sending nothing.
+    if len(section) <= 1:
+        return raw_text
+    return "\n".join(section)
+
+def get_claude_headers() -> Dict[str, str]:
+    """
+    Build the request headers for the Anthropic API.
+
+    Returns:
+        Dictionary of HTTP headers including the API key.
     """
     # Get API key from env if not provided
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError("Claude API key required. Set ANTHROPIC_API_KEY or pass api_key parameter.")
-    
+
+    return {
+        "x-api-key": api_key,
+        "content-type": "application/json",
+        "anthropic-version": "2023-06-01"
+    }
+
+def build_parse_request(raw_text: str) -> Dict[str, Any]:
+    """
+    Build the Messages API request body used to parse an ASOT song list.
+
+    The text is reduced to its tracklist with clean_tracklist first, so the
+    synchronous and batch parsers send the same prompt.
+
+    Args:
+        raw_text: Raw text with song listings in any format
+
+    Returns:
+        Request body for the Messages API (also used as batch request params).
+    """
+    raw_text = clean_tracklist(raw_text)
+
     # Create prompt for Claude - more flexible about format and fields
     prompt = f"""
     <task>
@@ -57,34 +112,60 @@ def parse_songs_with_claude(raw_text: str, episode: str, url: str) -> List[Dict[
     {raw_text}
     </song_list>
     """
-    
-    # Call Claude API
-    headers = {
-        "x-api-key": api_key,
-        "content-type": "application/json",
-        "anthropic-version": "2023-06-01"
-    }
-    
-    data = {
-        "model": "claude-3-sonnet-20240229",
+
+    return {
+        "model": CLAUDE_MODEL,
         "max_tokens": 4000,
         "temperature": 0,
         "messages": [
             {"role": "user", "content": prompt}
         ]
     }
+
+def parse_songs_with_claude(raw_text: str, episode: str, url: str) -> List[Dict[str, Any]]:
+    """
+    Parse ASOT song list using Claude LLM with robust handling of varied formats.
     
-    response = requests.post(
-        "https://api.anthropic.com/v1/messages",
-        headers=headers,
-        json=data
-    )
-    response.raise_for_status()
-    
-    # Extract JSON from response
-    result = response.json()
-    content = result["content"][0]["text"]
-    
+    Args:
+        raw_text: Raw text with song listings in any format
+        episode: The ASOT episode number or identifier.
+        url: The URL source of the song list.
+        
+    Returns:
+        List of dictionaries with parsed song data, including episode and url fields.
+    """
+    with ingestion_profile.span("parse", bytes=len(raw_text.encode("utf-8"))) as counters:
+        # Call Claude API
+        response = request_with_retry(
+            "POST",
+            f"{ANTHROPIC_API_URL}/v1/messages",
+            headers=get_claude_headers(),
+            json=build_parse_request(raw_text)
+        )
+
+        # Extract JSON from response
+        result = response.json()
+        usage = result.get("usage", {})
+        counters["input_tokens"] = usage.get("input_tokens", 0)
+        counters["output_tokens"] = usage.get("output_tokens", 0)
+        content = result["content"][0]["text"]
+
+        songs = extract_songs_from_response(content, episode, url)
+        counters["rows"] = len(songs)
+        return songs
+
+def extract_songs_from_response(content: str, episode: str, url: str) -> List[Dict[str, Any]]:
+    """
+    Extract the parsed song list from the text of a Claude response.
+
+    Args:
+        content: Text content of the Claude message.
+        episode: The ASOT episode number or identifier.
+        url: The URL source of the song list.
+
+    Returns:
+        List of dictionaries with parsed song data, including episode and url fields.
+    """
     # Find JSON array in response - more flexible pattern matching
     json_pattern = r'(\[\s*\{.*?\}\s*\])'
     json_match = re.search(json_pattern, content, re.DOTALL)
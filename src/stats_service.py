@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class StatsService:
+    """
+    Collection statistics computed off the request path.
+
+    Listing episodes scans the whole collection, so the stats are computed once,
+    cached, and recomputed by a background thread every `refresh_seconds` or as
+    soon as notify() reports an ingest. Readers always get the last snapshot
+    from memory, with the time it was computed.
+    """
+
+    def __init__(self, search_client, collection_name: str, refresh_seconds: float = None):
+        """
+        Args:
+            search_client: MilvusClientASOT or TieredSearchASOT instance.
+            collection_name (str): Collection to describe.
+            refresh_seconds (float, optional): Interval between background refreshes.
+                Defaults to STATS_REFRESH_SECONDS or 300.
+        """
+        self.search_client = search_client
+        self.collection_name = collection_name
+        self.refresh_seconds = refresh_seconds or float(os.getenv("STATS_REFRESH_SECONDS", "300"))
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def compute(self) -> Dict[str, Any]:
+        """Query the collection for fresh stats (slow; prefer get())."""
+        start = time.perf_counter()
+        snapshot = {"exists": self.search_client.has_collection(self.collection_name),
+                    "stats": {}, "episodes": [], "error": None}
+        if snapshot["exists"]:
+            snapshot["stats"] = self.search_client.get_collection_stats(self.collection_name)
+            snapshot["episodes"] = self.search_client.list_episodes(self.collection_name)
+        snapshot["computed_at"] = time.time()
+        snapshot["compute_ms"] = (time.perf_counter() - start) * 1000
+        return snapshot
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Recompute the stats now and cache them.
+
+        On failure the previous stats are kept, with the error attached.
+
+        Returns:
+            dict: The new snapshot.
+        """
+        with self._refresh_lock:
+            try:
+                self._snapshot = self.compute()
+            except Exception as e:
+                previous = self._snapshot or {"exists": None, "stats": {}, "episodes": [], "computed_at": None,
+                                              "compute_ms": None}
+                self._snapshot = {**previous, "error": str(e)}
+            return self._snapshot
+
+    def get(self) -> Dict[str, Any]:
+        """
+        The cached stats, computed on the first call only.
+
+        Returns:
+            dict: 'exists', 'stats' (as get_collection_stats), 'episodes', 'computed_at'
+                (epoch seconds), 'compute_ms' and 'error' (None if the last refresh worked).
+        """
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.refresh()
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the cached stats were computed, None before the first refresh."""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot["computed_at"] is None:
+            return None
+        return time.time() - snapshot["computed_at"]
+
+    def notify(self):
+        """Ask the background thread to refresh now, e.g. after an ingest."""
+        self._wake.set()
+
+    def start(self) -> threading.Thread:
+        """Compute the stats in the background now, then every refresh_seconds or on notify()."""
+        if self._thread is not None:
+            return self._thread
+
+        def run():
+            while True:
+                self.refresh()
+                self._wake.wait(self.refresh_seconds)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=run, name="stats-refresh", daemon=True)
+        self._thread.start()
+        return self._thread
@@ -0,0 +1,221 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.canonical_tracks import normalize_text, split_artists
+
+import argparse
+import bisect
+import threading
+import time
+from collections import Counter
+from typing import List, Dict, Any, Iterable
+
+# Fields suggested from, and the kind of suggestion each one yields
+ARTIST_FIELDS = ["artist", "collaborators", "featured_artists"]
+TITLE_FIELDS = ["title"]
+
+# Prefixes shorter than this match too many keys to scan; their best entries are kept ready
+SHORT_PREFIX = 3
+TOP_PER_PREFIX = 20
+# Keys scanned for a longer prefix before ranking
+SCAN_LIMIT = 200
+# Share of the query's trigrams a fuzzy match must contain
+TRIGRAM_THRESHOLD = 0.5
+# Trigrams shared by more entries than this say little and are skipped, keeping fuzzy lookups fast
+MAX_TRIGRAM_POSTINGS = 500
+# New keys per batch above which the key list is re-sorted instead of inserted into
+BULK_INSERT = 64
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of a normalized string, padded so short words have some."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TypeaheadIndex:
+    """
+    In-memory autocomplete over artist and title values.
+
+    Every value is indexed under its normalized form starting at each word, so
+    "buur" finds "Armin van Buuren", in a sorted key list searched with bisect.
+    Artists are suggested as credited ("Above & Beyond"); the individual names
+    of a credit are indexed as aliases of it, so "beyond" suggests the full credit.
+    Prefixes of one or two characters are answered from precomputed top lists.
+    When no prefix matches (typos, mid-word fragments), a trigram index
+    finds close values instead. Suggestions rank by the number of songs a value appears on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Entry: [display value, kind, song count, normalized value]
+        self._entries = []
+        self._entry_ids = {}
+        self._keys = []
+        self._top = {}
+        self._trigrams = {}
+        # Entry ID -> one and two character prefixes of its words, and of its aliases' words
+        self._short_prefixes = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add_value(self, value: str, kind: str, new_keys: list, aliases: Iterable[str] = ()):
+        normalized = normalize_text(value)
+        if not normalized:
+            return
+        entry_id = self._entry_ids.get((normalized, kind))
+        if entry_id is None:
+            entry_id = len(self._entries)
+            self._entries.append([value.strip(), kind, 0, normalized])
+            self._entry_ids[(normalized, kind)] = entry_id
+            self._index_text(normalized, entry_id, new_keys)
+            # Names within a credit ("Beyond" in "Above & Beyond") lead back to the full credit
+            for alias in {normalize_text(alias) for alias in aliases} - {"", normalized}:
+                self._index_text(alias, entry_id, new_keys)
+        entry = self._entries[entry_id]
+        entry[2] += 1
+
+        # Counts only grow, so an entry can only move up the top lists of its prefixes
+        for prefix in self._short_prefixes.get(entry_id, ()):
+            top = self._top.setdefault(prefix, [])
+            if entry_id not in top:
+                if len(top) == TOP_PER_PREFIX and self._entries[top[-1]][2] >= entry[2]:
+                    continue
+                top.append(entry_id)
+            top.sort(key=lambda candidate: -self._entries[candidate][2])
+            del top[TOP_PER_PREFIX:]
+
+    def _index_text(self, normalized: str, entry_id: int, new_keys: list):
+        words = normalized.split()
+        new_keys.extend((" ".join(words[i:]), entry_id) for i in range(len(words)))
+        for trigram in trigrams(normalized):
+            self._trigrams.setdefault(trigram, set()).add(entry_id)
+        self._short_prefixes.setdefault(entry_id, set()).update(
+            word[:length] for word in words for length in range(1, SHORT_PREFIX))
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Index the artists and titles of song records.
+
+        Args:
+            records (Iterable): Song records or query rows with the ARTIST_FIELDS and TITLE_FIELDS.
+
+        Returns:
+            int: Number of records indexed.
+        """
+        count = 0
+        new_keys = []
+        with self._lock:
+            for record in records:
+                for field in ARTIST_FIELDS:
+                    credit = record.get(field)
+                    names = split_artists(credit)
+                    if names:
+                        self._add_value(str(credit), "artist", new_keys, aliases=names)
+                for field in TITLE_FIELDS:
+                    if record.get(field) is not None:
+                        self._add_value(str(record[field]), "title", new_keys)
+                count += 1
+
+            # An initial build sorts once; an ingest of a few episodes inserts in place
+            if len(new_keys) > BULK_INSERT:
+                self._keys.extend(new_keys)
+                self._keys.sort()
+            else:
+                for key in new_keys:
+                    bisect.insort(self._keys, key)
+        return count
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Complete a partially typed query.
+
+        Args:
+            prefix (str): What the user typed so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            list: Dictionaries with 'value', 'kind' ('artist' or 'title') and 'count', best first.
+        """
+        query = normalize_text(prefix)
+        if not query:
+            return []
+
+        with self._lock:
+            if len(query) < SHORT_PREFIX:
+                candidates = list(self._top.get(query, []))
+            else:
+                candidates = []
+                seen = set()
+                start = bisect.bisect_left(self._keys, (query,))
+                for key, entry_id in self._keys[start:start + SCAN_LIMIT]:
+                    if not key.startswith(query):
+                        break
+                    if entry_id not in seen:
+                        seen.add(entry_id)
+                        candidates.append(entry_id)
+
+            # Values that start with the query first, then word matches, each by song count
+            candidates.sort(key=lambda entry_id: (not self._entries[entry_id][3].startswith(query),
+                                                  -self._entries[entry_id][2]))
+            candidates = candidates[:limit]
+
+            if not candidates and len(query) >= SHORT_PREFIX:
+                query_trigrams = trigrams(query)
+                shared = Counter()
+                for trigram in query_trigrams:
+                    postings = self._trigrams.get(trigram, ())
+                    if len(postings) <= MAX_TRIGRAM_POSTINGS:
+                        shared.update(postings)
+                candidates = [entry_id for entry_id, hits in shared.items()
+                              if hits >= TRIGRAM_THRESHOLD * len(query_trigrams)]
+                candidates.sort(key=lambda entry_id: (-shared[entry_id], -self._entries[entry_id][2]))
+                candidates = candidates[:limit]
+
+            return [{"value": self._entries[entry_id][0], "kind": self._entries[entry_id][1],
+                     "count": self._entries[entry_id][2]} for entry_id in candidates]
+
+
+def build_from_collections(milvus_client, collection_names: List[str]) -> TypeaheadIndex:
+    """Build a typeahead index from Milvus collections (e.g. both tiers of a tiered collection)."""
+    index = TypeaheadIndex()
+    for collection_name in collection_names:
+        if milvus_client.has_collection(collection_name):
+            index.add(milvus_client.iter_rows(collection_name, ARTIST_FIELDS + TITLE_FIELDS))
+    return index
+
+
+def build_from_corpus(data_dir: str = None) -> TypeaheadIndex:
+    """Build a typeahead index from the local corpus (Arrow store or episode JSON files)."""
+    from src.episode_store import load_corpus_records
+
+    index = TypeaheadIndex()
+    index.add(load_corpus_records(data_dir))
+    return index
+
+
+if __name__ == "__main__":
+    import dotenv
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Build the typeahead index and try some completions.")
+    parser.add_argument("prefixes", nargs="+", help="Prefixes to complete")
+    parser.add_argument("--collection", default=None, help="Build from this collection instead of the local corpus")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.collection:
+        from src.MilvusClientASOT import MilvusClientASOT
+        index = build_from_collections(MilvusClientASOT(), [args.collection])
+    else:
+        index = build_from_corpus()
+    print(f"Indexed {len(index)} values in {time.perf_counter() - start:.2f} s")
+
+    for prefix in args.prefixes:
+        start = time.perf_counter()
+        suggestions = index.suggest(prefix, limit=args.limit)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"{prefix!r} ({elapsed_us:.0f} us): " + ", ".join(f"{s['value']} [{s['kind']}, {s['count']}]" for s in suggestions))
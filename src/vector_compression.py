@@ -0,0 +1,131 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import os
+import numpy as np
+from typing import Optional
+
+# Supported storage types of the dense field and their size per dimension
+VECTOR_TYPES = {"float32": 4, "float16": 2, "bfloat16": 2}
+
+
+def default_vector_type() -> str:
+    """Storage type of the dense field for new collections, from DENSE_VECTOR_TYPE."""
+    vector_type = os.getenv("DENSE_VECTOR_TYPE", "float32").lower()
+    if vector_type not in VECTOR_TYPES:
+        raise ValueError(f"Unsupported DENSE_VECTOR_TYPE {vector_type}, expected one of {sorted(VECTOR_TYPES)}")
+    return vector_type
+
+
+def cast_vectors(vectors, vector_type: str) -> list:
+    """
+    Convert dense vectors to the numpy dtype Milvus expects for the field type.
+
+    Args:
+        vectors: 2D array-like of float vectors.
+        vector_type (str): 'float32', 'float16' or 'bfloat16'.
+
+    Returns:
+        list: One 1D numpy array per vector.
+
+    Raises:
+        ImportError: For bfloat16 when the optional ml_dtypes package is missing.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if vector_type == "float32":
+        return list(matrix)
+    if vector_type == "float16":
+        return list(matrix.astype(np.float16))
+    if vector_type == "bfloat16":
+        try:
+            import ml_dtypes
+        except ImportError as e:
+            raise ImportError("bfloat16 vectors require the ml_dtypes package (pip install ml_dtypes)") from e
+        return list(matrix.astype(ml_dtypes.bfloat16))
+    raise ValueError(f"Unsupported vector type: {vector_type}")
+
+
+def decode_vector(value, vector_type: str) -> np.ndarray:
+    """
+    Turn a dense vector returned by a Milvus query back into float32.
+
+    Half-precision vectors come back as raw bytes (or a one-element list of bytes).
+    """
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], bytes):
+        value = value[0]
+    if isinstance(value, bytes):
+        if vector_type == "float16":
+            return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+        # bfloat16 is the upper half of a float32
+        return (np.frombuffer(value, dtype=np.uint16).astype(np.uint32) << 16).view(np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def projection_path(collection_name: str) -> str:
+    """Where the PCA projection of a dimension-reduced collection is stored."""
+    return os.path.join(os.getenv("DENSE_PROJECTION_DIR", os.path.join(os.getenv("OUTPUT_FOLDER", "data"), "projections")),
+                        f"{collection_name}.npz")
+
+
+class PCAProjection:
+    """
+    Linear dimension reduction of the e5 embeddings, fitted once per collection.
+
+    The same projection must be applied to stored vectors and to query vectors,
+    so it is saved next to the data and loaded by the client at query time.
+    Projected vectors are re-normalized to keep inner product equal to cosine.
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, vectors, dim: int) -> "PCAProjection":
+        """
+        Fit the projection on a sample of vectors.
+
+        Args:
+            vectors: 2D array-like of float vectors.
+            dim (int): Number of dimensions to keep.
+
+        Returns:
+            PCAProjection: The fitted projection.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if dim >= matrix.shape[1]:
+            raise ValueError(f"PCA dimension {dim} must be smaller than the input dimension {matrix.shape[1]}")
+        if dim > matrix.shape[0]:
+            raise ValueError(f"Need at least {dim} vectors to fit a {dim}-d projection, got {matrix.shape[0]}")
+        mean = matrix.mean(axis=0)
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        return cls(mean, vt[:dim])
+
+    def transform(self, vectors) -> np.ndarray:
+        """Project and re-normalize vectors."""
+        projected = (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.maximum(norms, 1e-12)
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, mean=self.mean, components=self.components)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PCAProjection"]:
+        """Load a saved projection, or return None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"])
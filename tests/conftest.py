@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import numpy as np
+import pytest
+from typing import List
+
+
+class FakeEmbeddings:
+    """
+    Deterministic bag-of-words embeddings standing in for the e5 model.
+
+    Each word sets one dimension picked by its hash, so texts sharing words are
+    close, and nothing is downloaded or loaded.
+    """
+
+    dim = 32
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dim] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+
+@pytest.fixture
+def fake_embeddings():
+    return FakeEmbeddings()
+
+
+@pytest.fixture(scope="session")
+def milvus_client(tmp_path_factory):
+    """A MilvusClientASOT on a throwaway Milvus Lite database, with the fake embeddings."""
+    pytest.importorskip("milvus_lite")
+    import src.MilvusClientASOT as milvus_module
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(milvus_module, "SentenceTransformerEmbeddingFunction", FakeEmbeddings)
+        client = milvus_module.MilvusClientASOT(uri=str(tmp_path_factory.mktemp("milvus") / "test.db"))
+    yield client
+    client.client.close()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from src.collection_snapshot import shard_rows_for, pack_dynamic_fields, unpack_dynamic_fields, DYNAMIC_COLUMN
+
+SONGS = [
+    {"episode_id": "329", "ranking": 1, "artist": "SiA", "title": "The Girl You Lost To Cocaine", "label": "Doorn"},
+    {"episode_id": "329", "ranking": 2, "artist": "Marco Demark", "title": "Hold On", "label": "Armada"},
+    {"episode_id": "870", "ranking": 1, "artist": "Armin van Buuren", "title": "Blah Blah Blah", "label": "Armind"},
+    {"episode_id": "870", "ranking": 2, "artist": "Ferry Corsten", "title": "Punk"},
+    {"episode_id": "1119", "ranking": 1, "artist": "Gouryella", "title": "Anahera", "label": "Flashover"},
+]
+
+
+def query_songs(milvus_client, collection_name):
+    rows = milvus_client.client.query(collection_name, filter="", output_fields=["*"], limit=len(SONGS) + 1)
+    return sorted(rows, key=lambda row: (int(row["episode_id"]), row["ranking"]))
+
+
+def test_pack_dynamic_fields_round_trip():
+    rows = [{"title": "Punk", "label": "Flashover", "plays": 3}, {"title": "Hold On"}]
+
+    packed = pack_dynamic_fields([dict(row) for row in rows], {"title"})
+
+    assert packed == [{"title": "Punk", DYNAMIC_COLUMN: '{"label":"Flashover","plays":3}'},
+                      {"title": "Hold On", DYNAMIC_COLUMN: None}]
+    assert unpack_dynamic_fields(packed) == rows
+
+
+@pytest.mark.parametrize("row_count, workers, expected", [(0, 4, 1000), (10_000, 4, 1250), (10_000_000, 4, 100_000)])
+def test_shard_rows_for(row_count, workers, expected):
+    assert shard_rows_for(row_count, workers) == expected
+
+
+def test_snapshot_round_trip_keeps_dynamic_fields(milvus_client, tmp_path):
+    milvus_client.create_collection_if_not_exists("snapshot_source")
+    rows = milvus_client.prepare_data_for_insertion(SONGS)
+    for row, song in zip(rows, SONGS):
+        if "label" in song:
+            row["label"] = song["label"]
+    milvus_client.insert_data("snapshot_source", rows)
+
+    manifest = milvus_client.export_collection("snapshot_source", str(tmp_path / "snapshot"), shard_rows=2)
+    assert manifest["row_count"] == len(SONGS)
+    assert manifest["dynamic_field"]
+
+    result = milvus_client.import_collection(str(tmp_path / "snapshot"), "snapshot_restored")
+    assert result == {"collection": "snapshot_restored", "rows": len(SONGS)}
+
+    source, restored = query_songs(milvus_client, "snapshot_source"), query_songs(milvus_client, "snapshot_restored")
+    assert [row.get("label") for row in restored] == ["Doorn", "Armada", "Armind", None, "Flashover"]
+    assert [row["title"] for row in restored] == [row["title"] for row in source]
+    for source_row, restored_row in zip(source, restored):
+        np.testing.assert_allclose(restored_row["dense"], source_row["dense"], rtol=1e-6)
+
+    hits = milvus_client.dense_search("snapshot_restored", "Gouryella Anahera", limit=1)
+    assert hits[0]["entity"]["title"] == "Anahera"
+
+
+def test_snapshot_refuses_existing_snapshot(milvus_client, tmp_path):
+    milvus_client.create_collection_if_not_exists("snapshot_twice")
+    milvus_client.insert_data("snapshot_twice", milvus_client.prepare_data_for_insertion(SONGS[:1]))
+    milvus_client.export_collection("snapshot_twice", str(tmp_path / "snapshot"))
+
+    with pytest.raises(ValueError):
+        milvus_client.export_collection("snapshot_twice", str(tmp_path / "snapshot"))
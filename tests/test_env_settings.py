@@ -0,0 +1,79 @@
+import socketserver
+
+import pytest
+
+from src.TieredSearchASOT import TieredSearchASOT
+from src.search_api import SearchAPIServer
+
+# Keys env.example leaves empty, which must behave like unset ones
+EMPTY_IN_ENV_EXAMPLE = ["TIERED_SEARCH_WORKERS", "SEARCH_API_PORT", "SEARCH_API_CONNECTIONS"]
+
+
+@pytest.fixture
+def unbound_server(monkeypatch):
+    """Build SearchAPIServers without binding their port."""
+    monkeypatch.setattr(socketserver.TCPServer, "server_bind", lambda self: None)
+    monkeypatch.setattr(socketserver.TCPServer, "server_activate", lambda self: None)
+    servers = []
+
+    def build(**kwargs):
+        server = SearchAPIServer(None, **kwargs)
+        servers.append(server)
+        return server
+
+    yield build
+    for server in servers:
+        server.server_close()
+
+
+@pytest.fixture
+def empty_env(monkeypatch):
+    for key in EMPTY_IN_ENV_EXAMPLE + ["SEARCH_API_WORKERS", "SEARCH_API_TIMEOUT", "SEARCH_API_IDLE_TIMEOUT",
+                                       "SEARCH_API_HOST", "HOT_EPISODES"]:
+        monkeypatch.setenv(key, "")
+
+
+def test_tiered_defaults_with_empty_env(empty_env):
+    tiers = TieredSearchASOT(milvus_client=object())
+
+    assert tiers.hot_episodes == 52
+    assert tiers.search_workers == 16
+
+
+def test_tiered_workers_follow_api_workers(empty_env, monkeypatch):
+    monkeypatch.setenv("SEARCH_API_WORKERS", "3")
+
+    assert TieredSearchASOT(milvus_client=object()).search_workers == 6
+
+
+def test_tiered_workers_from_env(monkeypatch):
+    monkeypatch.setenv("TIERED_SEARCH_WORKERS", "5")
+
+    assert TieredSearchASOT(milvus_client=object()).search_workers == 5
+
+
+def test_search_api_defaults_with_empty_env(empty_env, unbound_server):
+    server = unbound_server()
+
+    assert server.workers == 8
+    assert server.connections == 32
+    assert server.request_timeout == 10
+    assert server.idle_timeout == 15
+    assert server.server_address == ("127.0.0.1", 8000)
+
+
+def test_search_api_settings_from_env(monkeypatch, unbound_server):
+    monkeypatch.setenv("SEARCH_API_WORKERS", "2")
+    monkeypatch.setenv("SEARCH_API_CONNECTIONS", "")
+    monkeypatch.setenv("SEARCH_API_PORT", "9100")
+
+    server = unbound_server()
+
+    assert server.connections == 8
+    assert server.server_address[1] == 9100
+
+
+def test_search_api_arguments_override_env(empty_env, unbound_server):
+    server = unbound_server(port=0, workers=1, connections=3)
+
+    assert (server.workers, server.connections, server.server_address[1]) == (1, 3, 0)
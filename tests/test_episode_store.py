@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from src.episode_store import (append_episode, compact_episodes, load_corpus_records, load_episode_table,
+                               segments_dir, store_exists)
+
+
+def write_episode(data_dir, episode, titles):
+    """Write an episode JSON file the way the parser saves it."""
+    songs = [{"ranking": ranking, "artist": f"Artist {ranking}", "title": title, "episode": episode,
+              "url": f"https://www.astateoftrance.com/episode-{episode}/"}
+             for ranking, title in enumerate(titles, start=1)]
+    with open(os.path.join(data_dir, f"asot_episode_{episode}.json"), "w", encoding="utf-8") as f:
+        json.dump(songs, f)
+
+
+def episode_records(episode, titles):
+    """Song records of an episode with Milvus field names."""
+    return [{"episode_id": episode, "ranking": ranking, "artist": f"Artist {ranking}", "title": title}
+            for ranking, title in enumerate(titles, start=1)]
+
+
+def titles_by_episode(records):
+    titles = {}
+    for record in records:
+        titles.setdefault(record["episode_id"], []).append(record["title"])
+    return titles
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    path.mkdir()
+    write_episode(str(path), "100", ["A", "B"])
+    write_episode(str(path), "101", ["C"])
+    return str(path)
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "store" / "asot_episodes.arrow")
+
+
+def test_compact_writes_sorted_store(data_dir, store_path):
+    assert compact_episodes(data_dir, store_path) == 3
+
+    table = load_episode_table(store_path)
+    assert table.column("episode_id").to_pylist() == ["100", "100", "101"]
+    assert table.column("ranking").to_pylist() == [1, 2, 1]
+
+
+def test_append_writes_a_segment(data_dir, store_path):
+    compact_episodes(data_dir, store_path)
+
+    assert append_episode(episode_records("102", ["D", "E"]), store_path) == 2
+
+    assert os.listdir(segments_dir(store_path)) == ["episode_102.arrow"]
+    assert titles_by_episode(load_episode_table(store_path).to_pylist()) == {
+        "100": ["A", "B"], "101": ["C"], "102": ["D", "E"]}
+
+
+def test_segment_replaces_reparsed_episode(data_dir, store_path):
+    compact_episodes(data_dir, store_path)
+
+    append_episode(episode_records("101", ["C (fixed)", "F"]), store_path)
+
+    assert titles_by_episode(load_episode_table(store_path).to_pylist())["101"] == ["C (fixed)", "F"]
+
+
+def test_compaction_folds_segments(data_dir, store_path):
+    compact_episodes(data_dir, store_path)
+    write_episode(data_dir, "102", ["D"])
+    append_episode(episode_records("102", ["D"]), store_path)
+
+    assert compact_episodes(data_dir, store_path) == 4
+
+    assert os.listdir(segments_dir(store_path)) == []
+    assert load_episode_table(store_path).num_rows == 4
+
+
+def test_first_append_builds_store_from_json(data_dir, store_path):
+    assert not store_exists(store_path)
+
+    append_episode(episode_records("100", ["A", "B"]), store_path, data_dir=data_dir)
+
+    assert store_exists(store_path)
+    assert load_episode_table(store_path).num_rows == 3
+
+
+def test_corpus_merges_json_missing_from_store(data_dir, store_path):
+    compact_episodes(data_dir, store_path)
+    write_episode(data_dir, "102", ["D"])
+
+    records = load_corpus_records(data_dir, store_path)
+
+    assert titles_by_episode(records) == {"100": ["A", "B"], "101": ["C"], "102": ["D"]}
+
+
+def test_corpus_without_store_reads_json(data_dir, store_path):
+    assert len(load_corpus_records(data_dir, store_path)) == 3
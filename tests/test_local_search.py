@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.LocalSearchASOT import LocalSearchASOT
+
+SONGS = [
+    {"episode_id": "329", "ranking": 1, "artist": "SiA", "title": "The Girl You Lost To Cocaine",
+     "remix_info": "Sander van Doorn remix"},
+    {"episode_id": "329", "ranking": 2, "artist": "Marco Demark", "title": "Hold On"},
+    {"episode_id": "870", "ranking": 1, "artist": "Armin van Buuren", "title": "Blah Blah Blah"},
+]
+NEW_SONGS = [
+    {"episode_id": "1119", "ranking": 1, "artist": "Ferry Corsten", "title": "Punk"},
+    {"episode_id": "1119", "ranking": 2, "artist": "Gouryella", "title": "Anahera"},
+]
+
+
+@pytest.fixture
+def engine(tmp_path, fake_embeddings):
+    return LocalSearchASOT(str(tmp_path / "index"), embeddings=fake_embeddings)
+
+
+def dense_rows(engine, collection_name):
+    """The stored float16 matrix, read straight from the collection's file."""
+    path = os.path.join(engine.index_dir, collection_name, "dense.f16")
+    return np.fromfile(path, dtype=np.float16).reshape(-1, engine.embeddings.dim)
+
+
+def test_insert_creates_collection(engine):
+    assert engine.insert_data("songs", SONGS) == len(SONGS)
+
+    stats = engine.get_collection_stats("songs")
+    assert stats["row_count"] == len(SONGS)
+    assert stats["dim"] == engine.embeddings.dim
+    assert engine.list_episodes("songs") == ["329", "870"]
+
+
+def test_append_keeps_existing_vectors(engine):
+    engine.insert_data("songs", SONGS)
+    before = dense_rows(engine, "songs")
+
+    assert engine.insert_data("songs", NEW_SONGS) == len(SONGS) + len(NEW_SONGS)
+
+    after = dense_rows(engine, "songs")
+    assert after.shape == (len(SONGS) + len(NEW_SONGS), engine.embeddings.dim)
+    np.testing.assert_array_equal(after[:len(SONGS)], before)
+    assert engine.list_episodes("songs") == ["1119", "329", "870"]
+
+
+def test_append_after_interrupted_insert(engine):
+    engine.insert_data("songs", SONGS)
+    # Rows written past the count in meta.json by an insert that never finished
+    with open(os.path.join(engine.index_dir, "songs", "dense.f16"), "ab") as f:
+        f.write(np.ones((3, engine.embeddings.dim), dtype=np.float16).tobytes())
+
+    engine.insert_data("songs", NEW_SONGS)
+
+    assert dense_rows(engine, "songs").shape[0] == len(SONGS) + len(NEW_SONGS)
+    assert engine.dense_search("songs", "Ferry Corsten Punk", limit=1)[0]["entity"]["title"] == "Punk"
+
+
+def test_insert_episodes_skips_known_episodes(engine):
+    engine.insert_episodes("songs", SONGS)
+
+    assert engine.insert_episodes("songs", SONGS + NEW_SONGS) == len(NEW_SONGS)
+    assert engine.insert_episodes("songs", NEW_SONGS) == 0
+    assert engine.get_collection_stats("songs")["row_count"] == len(SONGS) + len(NEW_SONGS)
+
+
+def test_searches_find_appended_songs(engine):
+    engine.insert_data("songs", SONGS)
+    engine.insert_data("songs", NEW_SONGS)
+
+    assert engine.sparse_search("songs", "anahera", limit=3)[0]["entity"]["title"] == "Anahera"
+    assert engine.dense_search("songs", "Gouryella Anahera", limit=1)[0]["entity"]["title"] == "Anahera"
+    for ranker_type in ("weighted", "rrf"):
+        hits = engine.hybrid_search("songs", "cocaine", limit=2, ranker_type=ranker_type)
+        assert hits[0]["entity"]["title"] == "The Girl You Lost To Cocaine"